@@ -0,0 +1,246 @@
+"""
+Member listings of project archives, read without extracting them.
+
+Zip files (including wheels and jars) are listed from their central
+directory. Tar files are read as a stream, so compressed members are
+decompressed in memory but never written to disk. A MemoryListing serves
+the same interface from a mapping, for tests and generated trees.
+"""
+
+import abc
+import os
+import posixpath
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+from .project_scanner import BUDGET_CHECK_FILES, ScanBudget
+
+
+# Suffixes of the archives a project can be scanned from
+ZIP_SUFFIXES = (".zip", ".whl", ".jar")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar.zst", ".tzst")
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+
+_ZSTD_SUFFIXES = (".tar.zst", ".tzst")
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be listed."""
+
+
+class ArchiveMember(NamedTuple):
+    """A file or directory inside an archive."""
+
+    path: str
+    size: int
+    is_dir: bool
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    """Check whether a path names an archive that can be listed."""
+    return os.fspath(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _normalize(name: str) -> Optional[str]:
+    """
+    Normalize a member name to a relative POSIX path.
+
+    Returns:
+        The path, or None for the archive root and for names escaping it
+    """
+    path = posixpath.normpath(name.replace("\\", "/").lstrip("/"))
+    if path in (".", "") or path == ".." or path.startswith("../"):
+        return None
+    return path
+
+
+class ArchiveListing(abc.ABC):
+    """Source of the members of one archive."""
+
+    def __init__(self, name: str):
+        """
+        Initialize the listing.
+
+        Args:
+            name: Path or label the listing is reported under
+        """
+        self.name = name
+
+    @abc.abstractmethod
+    def members(self) -> Iterator[ArchiveMember]:
+        """
+        Iterate over the members in archive order.
+
+        Raises:
+            ArchiveError: If the archive cannot be read
+        """
+
+
+class ZipListing(ArchiveListing):
+    """Zip, wheel and jar files, listed from the central directory."""
+
+    def members(self) -> Iterator[ArchiveMember]:
+        try:
+            with zipfile.ZipFile(self.name) as archive:
+                infos = archive.infolist()
+        except (OSError, zipfile.BadZipFile) as e:
+            raise ArchiveError(f"Cannot list {self.name}: {e}") from e
+        for info in infos:
+            path = _normalize(info.filename)
+            if path is not None:
+                yield ArchiveMember(path, info.file_size, info.is_dir())
+
+
+class TarListing(ArchiveListing):
+    """Tar files, plain or compressed with gzip, bzip2, xz or zstd."""
+
+    def members(self) -> Iterator[ArchiveMember]:
+        try:
+            with open(self.name, "rb") as f:
+                stream = f
+                if self.name.lower().endswith(_ZSTD_SUFFIXES):
+                    stream = _zstd_reader(f)
+                # Stream mode reads members in order without seeking, so
+                # compressed data is only decompressed once
+                with tarfile.open(fileobj=stream, mode="r|*") as archive:
+                    for info in archive:
+                        path = _normalize(info.name)
+                        if path is None:
+                            continue
+                        if info.isdir():
+                            yield ArchiveMember(path, 0, True)
+                        elif info.isfile():
+                            yield ArchiveMember(path, info.size, False)
+        except (OSError, EOFError, tarfile.TarError) as e:
+            raise ArchiveError(f"Cannot list {self.name}: {e}") from e
+
+
+def _zstd_reader(f):
+    """Wrap a file in a zstd decompressing reader."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ArchiveError("Reading .tar.zst archives requires the zstandard package "
+                           "(pip install 'serena-cli[archives]')") from None
+    return zstandard.ZstdDecompressor().stream_reader(f)
+
+
+class MemoryListing(ArchiveListing):
+    """Members given as a mapping of path to size; paths ending in "/" are directories."""
+
+    def __init__(self, files: Mapping[str, int], name: str = "<memory>"):
+        """
+        Initialize the listing.
+
+        Args:
+            files: Member path -> size in bytes
+            name: Label the listing is reported under
+        """
+        super().__init__(name)
+        self.files = dict(files)
+
+    def members(self) -> Iterator[ArchiveMember]:
+        for name, size in self.files.items():
+            path = _normalize(name)
+            if path is not None:
+                yield ArchiveMember(path, 0 if name.endswith("/") else size, name.endswith("/"))
+
+
+def open_listing(path: Union[str, Path]) -> ArchiveListing:
+    """
+    Get the listing for an archive file.
+
+    Args:
+        path: Archive path
+
+    Returns:
+        Listing matching the archive suffix
+
+    Raises:
+        ArchiveError: If the suffix is not a supported archive type
+    """
+    name = os.fspath(path)
+    lower = name.lower()
+    if lower.endswith(ZIP_SUFFIXES):
+        return ZipListing(name)
+    if lower.endswith(TAR_SUFFIXES):
+        return TarListing(name)
+    raise ArchiveError(f"Unsupported archive type: {name}")
+
+
+class ArchiveTree:
+    """Files of an archive, relative to the project root inside it."""
+
+    __slots__ = ("files", "root_names", "root_dirs", "prefix", "stopped_by")
+
+    def __init__(self, files: List[Tuple[str, int]], root_names: Set[str], root_dirs: Set[str], prefix: str,
+                 stopped_by: Optional[str] = None):
+        # (path, size) of the regular files, sorted by path
+        self.files = files
+        # Names of the files and directories at the project root
+        self.root_names = root_names
+        self.root_dirs = root_dirs
+        # Top-level directory stripped from every path, "" if none
+        self.prefix = prefix
+        # Budget that ended the listing early, None if it was read in full
+        self.stopped_by = stopped_by
+
+    @classmethod
+    def from_members(cls, members: Iterator[ArchiveMember], budget: Optional[ScanBudget] = None) -> "ArchiveTree":
+        """
+        Collect the files of a listing.
+
+        Release archives usually hold a single top-level directory such as
+        ``name-1.0/``; when every member is inside one, it becomes the
+        project root.
+
+        Args:
+            members: Archive members in any order
+            budget: Limits after which the rest of the listing is skipped
+
+        Returns:
+            The tree below the project root
+
+        Raises:
+            ArchiveError: If the archive cannot be read
+        """
+        files: Dict[str, int] = {}
+        dirs: Set[str] = set()
+        stopped_by = None
+        size_bytes = 0
+        for member in members:
+            if member.is_dir:
+                dirs.add(member.path)
+                continue
+            collected = len(files)
+            if (budget is not None and (not collected % BUDGET_CHECK_FILES or collected == budget.max_files)
+                    and budget.exhausted(collected, size_bytes)):
+                stopped_by = budget.stopped_by
+                break
+            # A later member of the same name replaces the earlier one
+            files[member.path] = member.size
+            size_bytes += member.size
+
+        prefix = ""
+        top_level = {path.split("/", 1)[0] for path in files} | {path.split("/", 1)[0] for path in dirs}
+        if len(top_level) == 1:
+            top = next(iter(top_level))
+            if top not in files:
+                prefix = top + "/"
+
+        start = len(prefix)
+        root_names: Set[str] = set()
+        root_dirs: Set[str] = set()
+        for path in files.keys() | dirs:
+            if not path.startswith(prefix):
+                continue
+            rel = path[start:]
+            slash = rel.find("/")
+            if slash >= 0 or path in dirs:
+                root_dirs.add(rel[:slash] if slash >= 0 else rel)
+            root_names.add(rel[:slash] if slash >= 0 else rel)
+
+        tree_files = sorted((path[start:], size) for path, size in files.items() if path.startswith(prefix))
+        return cls(tree_files, root_names, root_dirs, prefix, stopped_by)
@@ -8,23 +8,54 @@ import os
 import sys
 import subprocess
 import json
-import shutil
 from pathlib import Path
 from typing import Optional
 
 import click
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from rich.table import Table
 from rich.text import Text
+from rich.tree import Tree
 
 from .serena_manager import SerenaManager
 from .project_detector import ProjectDetector
 from .config_manager import ConfigManager
 from .mcp_server import SerenaCLIMCPServer
+from .project_registry import ProjectRegistry
+from .results import LanguageStats, SubProject
+from .toolchain import KNOWN_TOOLS, Toolchain
+from .wheelhouse import SERENA_SOURCE, WheelhouseError, build_wheelhouse, default_wheelhouse_dir
+from .serena_env import DEFAULT_SERENA_REF, SerenaEnvError, SerenaEnvironments
 
 console = Console()
 
+# Tools shared by the wizard steps of one run
+_toolchain: Optional[Toolchain] = None
+
+# Whether serena is registered with `claude mcp`, once a step has found out
+_claude_serena_configured: Optional[bool] = None
+
+
+def _get_toolchain() -> Toolchain:
+    """Get the toolchain shared by this process."""
+    global _toolchain
+    if _toolchain is None:
+        _toolchain = Toolchain()
+    return _toolchain
+
+
+def _serena_command(*args: str) -> list:
+    """Get the command running serena from the pinned environment, or through uvx without one."""
+    try:
+        with console.status("Preparing the pinned Serena environment..."):
+            return SerenaEnvironments(toolchain=_get_toolchain()).launch_command(*args)
+    except (SerenaEnvError, OSError) as e:
+        console.print(f"⚠️  无法使用固定的 Serena 环境，改用 uvx: {e}")
+        return [_get_toolchain().get("uvx").path or "uvx", "--from", SERENA_SOURCE, "serena"] + list(args)
+
+
 @click.group(invoke_without_command=True)
 @click.version_option(version="1.0.11", prog_name="serena-cli")
 @click.option("-v", "--verbose", is_flag=True, help="Enable verbose logging")
@@ -65,6 +96,13 @@ def check_env(project):
         except ImportError:
             console.print(f"❌ {dep}: Not installed")
     
+    # Check external tools
+    for tool in _get_toolchain().discover(KNOWN_TOOLS).values():
+        if tool.available:
+            console.print(f"✅ {tool.name}: {tool.version or 'unknown version'} ({tool.path})")
+        else:
+            console.print(f"❌ {tool.name}: Not found")
+    
     # Serena compatibility assessment
     console.print("\n📊 Serena compatibility:")
     if python_version.major == 3 and python_version.minor >= 10 and python_version.minor <= 12:
@@ -97,29 +135,113 @@ def check_env(project):
     console.print("\n✅ Environment check completed!")
 
 @cli.command()
-@click.option("--project", help="Project path (leave blank to use current directory)")
-def info(project):
+@click.option("--project", help="Project path or archive (.zip/.whl/.tar.gz/.tar.zst; leave blank to use current directory)")
+@click.option("--lines", is_flag=True, help="Count lines of code per language")
+@click.option("--jobs", "-j", type=click.IntRange(min=0), default=1, show_default=True,
+              help="Worker processes for scanning (0 = one per CPU)")
+@click.option("--max-seconds", type=click.FloatRange(min=0), help="Stop scanning after this many seconds")
+@click.option("--max-files", type=click.IntRange(min=1), help="Stop scanning after this many files")
+@click.option("--follow-symlinks", type=click.Choice(["none", "files", "all"]), default="files", show_default=True,
+              help="Which symlinks to follow while scanning")
+@click.option("--one-file-system", is_flag=True, help="Do not scan directories on other filesystems")
+@click.option("--probe-timeout", type=click.FloatRange(min=0, min_open=True), default=5.0, show_default=True,
+              help="Seconds a filesystem call may hang before the mount is treated as unresponsive")
+@click.option("--breakdown", is_flag=True, help="Show the largest directories and files and a file-size histogram")
+@click.option("--top", type=click.IntRange(min=1), default=10, show_default=True,
+              help="Number of directories and files listed by --breakdown")
+def info(project, lines, jobs, max_seconds, max_files, follow_symlinks, one_file_system, probe_timeout,
+         breakdown, top):
     """Get project information"""
     project_path = project or os.getcwd()
     
     try:
-        detector = ProjectDetector()
-        project_info = detector.get_project_info(project_path)
+        detector = ProjectDetector(
+            count_lines=lines,
+            jobs=jobs,
+            follow_symlinks=follow_symlinks,
+            one_filesystem=one_file_system,
+            probe_timeout=probe_timeout,
+            registry=ProjectRegistry()
+        )
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("{task.description}"),
+            BarColumn(),
+            TimeElapsedColumn(),
+            console=console,
+            transient=True,
+        ) as progress:
+            total = max_files or max_seconds
+            task = progress.add_task("Scanning...", total=total)
+            
+            def on_progress(files, size_bytes, elapsed):
+                progress.update(
+                    task,
+                    description=f"Scanning: {files:,} files, {size_bytes / (1024 * 1024):.1f} MB",
+                    completed=files if max_files else elapsed if max_seconds else None,
+                )
+            
+            project_info = detector.get_project_info(
+                project_path, max_seconds=max_seconds, max_files=max_files, progress=on_progress,
+                top_k=top if breakdown else 0
+            )
         
         if project_info:
-            console.print(f"\n📁 Project: {project_info['name']}")
-            console.print(f"📍 Path: {project_info['path']}")
-            console.print(f"🔧 Type: {project_info['type']}")
-            console.print(f"📊 Status: {'✅ Enabled' if project_info['enabled'] else '❌ Not enabled'}")
+            console.print(f"\n📁 Project: {project_info.name}")
+            console.print(f"📍 Path: {project_info.path}")
+            console.print(f"🔧 Type: {project_info.type}")
+            if len(project_info.types) > 1:
+                console.print(f"🧬 Types: {', '.join(project_info.types)}")
+            console.print(f"📊 Status: {'✅ Enabled' if project_info.enabled else '❌ Not enabled'}")
+            
+            if project_info.config:
+                console.print(f"⚙️  Config: {project_info.config}")
+            
+            size = project_info.size
+            console.print(f"📦 Size: {size.total_files} files, {size.total_size_mb} MB")
             
-            if project_info['config']:
-                console.print(f"⚙️  Config: {project_info['config']}")
+            coverage = project_info.coverage
+            if coverage.degraded:
+                console.print("⚠️  Slow network filesystem: only project indicators were checked")
+            elif not coverage.complete:
+                limit = "time limit" if coverage.stopped_by == "time" else "file limit"
+                console.print(
+                    f"⚠️  Partial scan: stopped by {limit} after {coverage.elapsed_seconds:.3f}s, "
+                    f"{coverage.dirs_pending} directories not scanned"
+                )
+            
+            if project_info.language_stats:
+                _print_language_stats(project_info.language_stats)
+            
+            if project_info.subprojects.children:
+                _print_subprojects(project_info.subprojects)
+            
+            if project_info.breakdown is not None:
+                _print_breakdown(project_info.breakdown.to_dict())
         else:
             console.print("❌ No project detected at the specified path")
             
     except Exception as e:
         console.print(f"❌ Error getting project info: {e}")
 
+def _print_language_stats(language_stats: LanguageStats):
+    """Print per-language files, size and lines of code"""
+    table = Table(title="Languages")
+    table.add_column("Language", style="cyan")
+    table.add_column("Files", justify="right")
+    table.add_column("Size (MB)", justify="right")
+    table.add_column("Lines", justify="right", style="green")
+    
+    for language, files, size, lines in language_stats.items():
+        table.add_row(
+            language,
+            str(files),
+            f"{size / (1024 * 1024):.2f}",
+            f"{lines:,}" if lines is not None else "-"
+        )
+    
+    console.print(table)
+
 @cli.command()
 @click.option("--project", help="Project path (leave blank to use current directory)")
 def status(project):
@@ -131,13 +253,21 @@ def status(project):
         status = serena_manager.get_status_sync(project_path)
         
         console.print(f"\n📊 Serena Status for: {os.path.basename(project_path)}")
-        console.print(f"🔧 Enabled: {'✅ Yes' if status['serena_enabled'] else '❌ No'}")
-        console.print(f"📁 Project: {status['project_path']}")
-        console.print(f"🐍 Python: {status['python_version']}")
+        console.print(f"🔧 Enabled: {'✅ Yes' if status.serena_enabled else '❌ No'}")
+        console.print(f"📁 Project: {status.project_path}")
+        console.print(f"🐍 Python: {status.python_version}")
+        installation = status.installation
+        if installation.installed:
+            console.print(f"📦 Serena: {installation.version or 'unknown version'} ({installation.location})")
+        else:
+            console.print("📦 Serena: not installed")
+        tools = serena_manager.toolchain.discover(KNOWN_TOOLS).values()
+        console.print("🧰 Tools: " + ", ".join(
+            f"{tool.name} {tool.version or '?'}" if tool.available else f"{tool.name} ✗" for tool in tools))
         
-        if status['serena_enabled']:
-            console.print(f"📦 Installation: {status['installation_method']}")
-            console.print(f"⚙️  Context: {status['serena_context']}")
+        if status.serena_enabled:
+            console.print(f"📦 Installation: {status.installation_method}")
+            console.print(f"⚙️  Context: {status.serena_context}")
         
     except Exception as e:
         console.print(f"❌ Error getting status: {e}")
@@ -160,15 +290,57 @@ def config(config_type, project):
     except Exception as e:
         console.print(f"❌ Error editing config: {e}")
 
+def _print_subprojects(root: SubProject):
+    """Print the tree of nested build manifests"""
+    def label(node):
+        types = ", ".join(node.types) or "-"
+        return f"[cyan]{node.path}[/cyan] ({types})"
+    
+    def add_children(tree, node):
+        for child in node.children:
+            add_children(tree.add(label(child)), child)
+    
+    tree = Tree(f"🧩 Sub-projects: {label(root)}")
+    add_children(tree, root)
+    console.print(tree)
+
+def _print_breakdown(breakdown: dict):
+    """Print the largest directories and files and the file-size histogram"""
+    for key, title in (("largest_dirs", "Largest directories (own files)"), ("largest_files", "Largest files")):
+        table = Table(title=title)
+        table.add_column("Path", style="cyan")
+        table.add_column("Size (MB)", justify="right")
+        for item in breakdown[key]:
+            table.add_row(item['path'], f"{item['size_bytes'] / (1024 * 1024):.2f}")
+        console.print(table)
+    
+    table = Table(title="File sizes")
+    table.add_column("Size", style="cyan")
+    table.add_column("Files", justify="right", style="green")
+    for bucket in breakdown['size_histogram']:
+        low, high = bucket['min_bytes'], bucket['max_bytes']
+        label = f"≥ {_format_bytes(low)}" if high is None else f"{_format_bytes(low)} – {_format_bytes(high + 1)}"
+        table.add_row(label, f"{bucket['files']:,}")
+    console.print(table)
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count with a binary unit"""
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size:g} {unit}"
+        size /= 1024
+
 @cli.command()
 @click.option("--project", help="Project path (leave blank to use current directory)")
-def enable(project):
+@click.option("--wheelhouse", envvar="SERENA_CLI_WHEELHOUSE", type=click.Path(file_okay=False),
+              help="Install Serena offline from this wheelhouse first (see `wheelhouse build`)")
+def enable(project, wheelhouse):
     """Enable Serena in specified or current project"""
     project_path = project or os.getcwd()
     
     try:
         serena_manager = SerenaManager()
-        result = serena_manager.enable_serena(project_path)
+        result = serena_manager.enable_serena(project_path, wheelhouse=wheelhouse)
         
         if result['success']:
             console.print("✅ Serena enabled successfully!")
@@ -181,6 +353,108 @@ def enable(project):
     except Exception as e:
         console.print(f"❌ Error enabling Serena: {e}")
 
+@cli.group()
+def wheelhouse():
+    """Build and manage offline Serena wheelhouses"""
+
+@wheelhouse.command("build")
+@click.option("--dir", "directory", type=click.Path(file_okay=False),
+              help="Wheelhouse directory (default: ~/.serena-cli/wheelhouse)")
+@click.option("--source", default=SERENA_SOURCE, show_default=True, help="pip requirement or path to build Serena from")
+@click.option("--no-build-isolation", is_flag=True, help="Build with the packages already installed")
+def wheelhouse_build(directory, source, no_build_isolation):
+    """Build Serena and its dependencies into a local wheelhouse"""
+    directory = directory or str(default_wheelhouse_dir())
+    console.print(f"📦 Building wheelhouse from {source}...")
+    
+    try:
+        with console.status("Resolving and building wheels..."):
+            result = build_wheelhouse(directory, source, build_isolation=not no_build_isolation)
+    except WheelhouseError as e:
+        console.print(f"❌ Failed to build wheelhouse: {e}")
+        return
+    
+    wheels = sum(1 for name in os.listdir(result.directory) if name.endswith(".whl"))
+    console.print(f"✅ Wheelhouse ready: {result.directory}")
+    console.print(f"   {result.requirement} ({result.wheel}), {wheels} wheels in total")
+    console.print(f"   Python {result.python_version} on {result.platform}")
+    console.print(f"💡 Install offline with: serena-cli enable --wheelhouse {result.directory}")
+
+@cli.command()
+@click.option("--ref", default=DEFAULT_SERENA_REF, show_default=True,
+              help="Serena branch, tag or commit to pin (HEAD = default branch)")
+@click.option("--prune", is_flag=True, help="Remove the environments of earlier pins")
+def upgrade(ref, prune):
+    """Move the pinned Serena environment to the latest commit of a ref"""
+    environments = SerenaEnvironments(toolchain=_get_toolchain())
+    previous = environments.pinned()
+    
+    try:
+        with console.status(f"Resolving and installing Serena {ref}..."):
+            env = environments.pin(ref)
+    except (SerenaEnvError, OSError) as e:
+        console.print(f"❌ Failed to upgrade Serena: {e}")
+        return
+    
+    if previous is not None and previous.commit == env.commit:
+        console.print(f"✅ Serena is already pinned to {env.commit[:12]} ({ref})")
+    else:
+        old = previous.commit[:12] if previous is not None else "none"
+        console.print(f"✅ Serena pinned: {old} → {env.commit[:12]} ({ref})")
+    console.print(f"📁 Environment: {env.env_dir}")
+    
+    if prune:
+        removed = environments.prune()
+        console.print(f"🧹 Removed {len(removed)} old environment(s)")
+
+@cli.command()
+@click.option("--context", help="Only projects using this Serena context")
+@click.option("--type", "project_type", help="Only projects of this type")
+@click.option("--json", "as_json", is_flag=True, help="Print the projects as JSON")
+@click.option("--prune", is_flag=True, help="Forget projects whose configuration no longer exists")
+def projects(context, project_type, as_json, prune):
+    """List the projects Serena is enabled in"""
+    try:
+        registry = ProjectRegistry()
+        if prune:
+            for path in registry.prune():
+                console.print(f"🗑️  Removed: {path}")
+        
+        entries = registry.list_projects(context=context, project_type=project_type)
+        if as_json:
+            click.echo(json.dumps([entry.to_dict() for entry in entries], indent=2, ensure_ascii=False))
+            return
+        
+        if not entries:
+            console.print("No registered projects. Enable Serena in a project with: serena-cli enable")
+            return
+        
+        table = Table(title=f"Serena Projects ({len(entries)})")
+        table.add_column("Project", style="cyan")
+        table.add_column("Type")
+        table.add_column("Context")
+        table.add_column("Files", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Languages")
+        table.add_column("Path", style="dim")
+        
+        for entry in entries:
+            scanned = entry.scanned_at is not None
+            table.add_row(
+                entry.name,
+                entry.type or "-",
+                entry.context or "-",
+                f"{entry.total_files:,}" if scanned else "-",
+                _format_bytes(entry.total_size_bytes) if scanned else "-",
+                ", ".join(entry.languages) or "-",
+                entry.path
+            )
+        
+        console.print(table)
+        
+    except Exception as e:
+        console.print(f"❌ Error listing projects: {e}")
+
 @cli.command()
 def mcp_tools():
     """Show available MCP tools information"""
@@ -201,31 +475,33 @@ def mcp_tools():
         console.print(f"❌ Error getting MCP tools: {e}")
 
 @cli.command()
-def start_mcp_server():
+@click.option("--watch", is_flag=True, help="Keep project status in memory using filesystem events")
+def start_mcp_server(watch):
     """Start MCP server"""
     console.print("🚀 Starting Serena CLI MCP server...")
     console.print("📡 Server will be available for MCP clients")
     console.print("⚠️  Note: If you encounter TaskGroup errors, use 'start-mcp-simple' instead")
     
     try:
-        _start_mcp_server()
+        _start_mcp_server(watch=watch)
     except Exception as e:
         console.print(f"❌ Failed to start server: {e}")
         console.print("💡 Try using 'serena-cli start-mcp-simple' for a simplified version")
 
 @cli.command()
-def start_mcp_simple():
+@click.option("--watch", is_flag=True, help="Keep project status in memory using filesystem events")
+def start_mcp_simple(watch):
     """Start simplified MCP server (avoids TaskGroup issues)"""
     console.print("🚀 Starting Serena CLI simplified MCP server...")
     console.print("📡 This version avoids known TaskGroup compatibility issues")
     
     try:
-        _start_mcp_simple()
+        _start_mcp_simple(watch=watch)
     except Exception as e:
         console.print(f"❌ Failed to start simplified server: {e}")
         console.print("💡 You can still use all CLI commands directly")
 
-def _start_mcp_server():
+def _start_mcp_server(watch: bool = False):
     """Start the MCP server with smart wizard"""
     try:
         # 启动智能 MCP 服务器向导
@@ -242,7 +518,7 @@ def _start_mcp_server():
         # 只有在向导成功或传统模式成功时才启动 MCP 服务器
         if wizard_success:
             console.print("\n🚀 启动 MCP 服务器...")
-            server = SerenaCLIMCPServer()
+            server = SerenaCLIMCPServer(watch=watch)
             
             # 使用 asyncio 正确运行协程
             import asyncio
@@ -261,12 +537,12 @@ def _start_mcp_server():
         console.print(f"❌ Server startup failed: {e}")
         console.print("💡 CLI functionality remains fully operational")
 
-def _start_mcp_simple():
+def _start_mcp_simple(watch: bool = False):
     """Start a simplified MCP server"""
     try:
         # Import here to avoid circular imports
         from .mcp_server import SerenaCLIMCPServer
-        server = SerenaCLIMCPServer()
+        server = SerenaCLIMCPServer(watch=watch)
         
         # 使用 asyncio 正确运行协程
         import asyncio
@@ -393,31 +669,21 @@ def check_dependencies():
     
     missing_tools = []
     
-    # 检查 uv
-    if not shutil.which("uv"):
-        missing_tools.append("uv")
-        console.print("❌ uv 未安装")
-    else:
-        console.print("✅ uv 已安装")
-    
-    # 检查 uvx
-    if not shutil.which("uvx"):
-        missing_tools.append("uvx")
-        console.print("❌ uvx 未安装")
-    else:
-        console.print("✅ uvx 已安装")
-    
-    # 检查 pip (备用方案)
-    if not shutil.which("pip"):
-        missing_tools.append("pip")
-        console.print("❌ pip 未安装")
-    else:
-        console.print("✅ pip 已安装")
+    # 检查 uv、uvx 和 pip (备用方案)，版本探测并发进行
+    toolchain = _get_toolchain()
+    for tool in toolchain.discover(("uv", "uvx", "pip")).values():
+        if not tool.available:
+            missing_tools.append(tool.name)
+            console.print(f"❌ {tool.name} 未安装")
+        else:
+            console.print(f"✅ {tool.name} 已安装 ({tool.version or '未知版本'})")
     
     # 安装缺失的工具
     if missing_tools:
         console.print(f"\n🔧 正在安装缺失依赖: {', '.join(missing_tools)}...")
-        if not install_missing_tools(missing_tools):
+        installed = install_missing_tools(missing_tools)
+        toolchain.invalidate()
+        if not installed:
             console.print("❌ 依赖安装失败")
             return False
     
@@ -475,7 +741,7 @@ def install_uvx():
     console.print("📦 正在安装 uvx...")
     
     try:
-        result = subprocess.run(["uv", "pip", "install", "uvx"], 
+        result = subprocess.run([_get_toolchain().get("uv").path or "uv", "pip", "install", "uvx"], 
                               capture_output=True, text=True)
         if result.returncode == 0:
             console.print("✅ uvx 安装成功")
@@ -597,6 +863,7 @@ def configure_target_platform(platform):
 
 def configure_claude():
     """配置 Claude Desktop"""
+    global _claude_serena_configured
     console.print("🤖 配置 Claude Desktop...")
     
     try:
@@ -604,8 +871,14 @@ def configure_claude():
         current_project = os.getcwd()
         context = "ide-assistant"
         
+        toolchain = _get_toolchain()
+        claude = toolchain.get("claude").path
+        if claude is None:
+            console.print("❌ 未找到 claude 命令")
+            return False
+        
         # 首先检查是否已经存在 serena MCP server
-        check_command = ["claude", "mcp", "list"]
+        check_command = [claude, "mcp", "list"]
         check_result = subprocess.run(check_command, capture_output=True, text=True)
         
         if check_result.returncode == 0 and "serena" in check_result.stdout:
@@ -613,7 +886,7 @@ def configure_claude():
             console.print("💡 正在移除旧配置...")
             
             # 移除旧的 serena 配置
-            remove_command = ["claude", "mcp", "remove", "serena"]
+            remove_command = [claude, "mcp", "remove", "serena"]
             remove_result = subprocess.run(remove_command, capture_output=True, text=True)
             
             if remove_result.returncode != 0:
@@ -626,15 +899,14 @@ def configure_claude():
                 time.sleep(1)
         
         # 执行 Claude MCP 命令
-        command = [
-            "claude", "mcp", "add", "serena", "--",
-            "uvx", "--from", "git+https://github.com/oraios/serena",
-            "serena", "start-mcp-server", "--context", context, "--project", current_project
-        ]
+        command = [claude, "mcp", "add", "serena", "--"] + _serena_command(
+            "start-mcp-server", "--context", context, "--project", current_project)
         
         result = subprocess.run(command, capture_output=True, text=True)
         
         if result.returncode == 0:
+            # The verification step can trust this instead of listing again
+            _claude_serena_configured = True
             console.print("✅ 成功添加到 Claude MCP!")
             console.print(f"   Context: {context}")
             console.print(f"   Project: {current_project}")
@@ -779,10 +1051,7 @@ def start_traditional_serena_web_server():
                 console.print(f"💡 请手动打开: http://127.0.0.1:24282/dashboard/index.html")
         else:
             # 启动 Serena Web 服务器
-            serena_web_cmd = [
-                "uvx", "--from", "git+https://github.com/oraios/serena", 
-                "serena", "start-mcp-server"
-            ]
+            serena_web_cmd = _serena_command("start-mcp-server")
             
             serena_process = subprocess.Popen(
                 serena_web_cmd,
@@ -829,8 +1098,15 @@ def verify_configuration(platform):
 def verify_claude_config():
     """验证 Claude 配置"""
     try:
-        result = subprocess.run(["claude", "mcp", "list"], capture_output=True, text=True)
-        if result.returncode == 0 and "serena" in result.stdout:
+        configured = _claude_serena_configured
+        if configured is None:
+            claude = _get_toolchain().get("claude").path
+            if claude is None:
+                console.print("⚠️  无法验证 Claude MCP 配置")
+                return False
+            result = subprocess.run([claude, "mcp", "list"], capture_output=True, text=True)
+            configured = result.returncode == 0 and "serena" in result.stdout
+        if configured:
             console.print("✅ Claude MCP 配置验证通过!")
             return True
         else:
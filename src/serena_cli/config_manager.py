@@ -11,6 +11,7 @@ from typing import Any, Dict, Optional
 import yaml
 
 from .project_detector import ProjectDetector
+from .project_registry import REGISTRY_FILE, ProjectRegistry
 
 
 class ConfigManager:
@@ -22,6 +23,8 @@ class ConfigManager:
         self.global_config_dir = Path.home() / ".serena-cli"
         self.global_config_file = self.global_config_dir / "config.yml"
         self.logs_dir = self.global_config_dir / "logs"
+        self.project_detector = ProjectDetector()
+        self.registry = ProjectRegistry(self.global_config_dir / REGISTRY_FILE)
         
         # Ensure directories exist
         self.global_config_dir.mkdir(exist_ok=True)
@@ -68,8 +71,7 @@ class ConfigManager:
             return self._read_yaml(self.global_config_file) or {}
         elif config_type == "project":
             if not project_path:
-                detector = ProjectDetector()
-                project_path = detector.detect_current_project()
+                project_path = self.project_detector.detect_current_project()
             
             if not project_path:
                 return {}
@@ -108,6 +110,7 @@ class ConfigManager:
                 "search_for_pattern"
             ],
             "excluded_tools": [],
+            "excluded_paths": [],
             "project_settings": {
                 "memory_enabled": True,
                 "language_servers": [],
@@ -116,6 +119,11 @@ class ConfigManager:
         }
         
         self._write_yaml(project_config_file, default_project_config)
+        self.registry.register(
+            project_path,
+            default_project_config["serena_context"],
+            self.project_detector.detect_project_type(str(project_path))
+        )
         return default_project_config
     
     def update_config(self, config_type: str, updates: Dict[str, Any], project_path: Optional[str] = None) -> bool:
@@ -129,8 +137,7 @@ class ConfigManager:
             
             elif config_type == "project":
                 if not project_path:
-                    detector = ProjectDetector()
-                    project_path = detector.detect_current_project()
+                    project_path = self.project_detector.detect_current_project()
                 
                 if not project_path:
                     return False
@@ -161,8 +168,7 @@ class ConfigManager:
                     self._create_default_config()
             elif config_type == "project":
                 if not project_path:
-                    detector = ProjectDetector()
-                    project_path = detector.detect_current_project()
+                    project_path = self.project_detector.detect_current_project()
                 
                 if not project_path:
                     return {"success": False, "error": "无法检测到项目路径"}
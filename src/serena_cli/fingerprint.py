@@ -0,0 +1,304 @@
+"""
+Cheap project fingerprints for change detection.
+
+A fingerprint is a Merkle tree over the project's directories: each
+directory hashes its own stat data, optionally the size and mtime of its
+files, and the digests of its subdirectories. Equal root digests mean
+nothing observable changed; comparing two fingerprints names the
+directories that did.
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import time
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
+
+from .ignore_rules import IGNORE_FILE_NAMES, IgnoreRules
+from .scan_index import RACY_WINDOW_NS
+
+if TYPE_CHECKING:
+    from .project_scanner import ScanBudget
+
+logger = logging.getLogger(__name__)
+
+
+# Bytes of the blake2b digests kept per directory
+FINGERPRINT_DIGEST_SIZE = 16
+
+# (size, mtime_ns) of a directory or file
+_STAT = struct.Struct("<qq")
+
+
+class _DirNode:
+    """Stat data and digest of one directory."""
+
+    __slots__ = ("mtime_ns", "size", "subdirs", "files", "ignore_files", "digest")
+
+    def __init__(self, mtime_ns: int, size: int, subdirs: Tuple[str, ...], files: bytes,
+                 ignore_files: Tuple[str, ...] = ()):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # Names of the subdirectories that are fingerprinted, sorted
+        self.subdirs = subdirs
+        # Digest of the directory's own file entries, empty if not hashed
+        self.files = files
+        # Ignore files present in the directory, whose rules apply below it
+        self.ignore_files = ignore_files
+        self.digest = b""
+
+    def same_listing(self, other: "_DirNode") -> bool:
+        """Whether both nodes describe the same directory contents."""
+        return (self.mtime_ns, self.size, self.files, self.subdirs) == (
+            other.mtime_ns, other.size, other.files, other.subdirs)
+
+
+class ProjectFingerprint:
+    """Merkle fingerprint of a project tree."""
+
+    __slots__ = ("root", "digest", "taken_ns", "files", "git_state", "nodes")
+
+    def __init__(self, root: str, digest: str, taken_ns: int, files: bool,
+                 git_state: Optional[Tuple[object, ...]], nodes: Dict[str, _DirNode]):
+        self.root = root
+        # Hex digest of the whole tree
+        self.digest = digest
+        # Wall-clock time the walk started, used to distrust racy mtimes
+        self.taken_ns = taken_ns
+        # Whether file sizes and mtimes are part of the digest
+        self.files = files
+        # HEAD and index state when the git shortcut was used
+        self.git_state = git_state
+        # Relative directory ("" for the root) -> node
+        self.nodes = nodes
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ProjectFingerprint):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def changed_dirs(self, previous: "ProjectFingerprint") -> List[str]:
+        """
+        Find the directories whose contents differ from a previous fingerprint.
+
+        Args:
+            previous: Earlier fingerprint of the same project
+
+        Returns:
+            Sorted relative paths of changed, added and removed directories
+        """
+        if self.digest == previous.digest:
+            return []
+        old_nodes = previous.nodes
+        changed = [
+            rel for rel, node in self.nodes.items()
+            if rel not in old_nodes or not node.same_listing(old_nodes[rel])
+        ]
+        changed.extend(rel for rel in old_nodes if rel not in self.nodes)
+        return sorted(changed)
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=FINGERPRINT_DIGEST_SIZE)
+
+
+def read_git_state(root: str) -> Optional[Tuple[object, ...]]:
+    """
+    Read the state of a git checkout that changes with commits and staging.
+
+    Args:
+        root: Worktree root
+
+    Returns:
+        HEAD, the commit it points to and the index mtime and size, or None if
+        root is not the top of a git checkout
+    """
+    git_dir = os.path.join(root, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+
+    commit = head
+    if head.startswith("ref: "):
+        try:
+            with open(os.path.join(git_dir, head[5:]), "r", encoding="utf-8") as f:
+                commit = f.read().strip()
+        except OSError:
+            # Packed refs; their file changes whenever a packed ref moves
+            try:
+                st = os.stat(os.path.join(git_dir, "packed-refs"))
+                commit = f"packed:{st.st_mtime_ns}:{st.st_size}"
+            except OSError:
+                commit = ""
+
+    try:
+        st = os.stat(os.path.join(git_dir, "index"))
+        index_state = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        index_state = (0, 0)
+    return (head, commit) + index_state
+
+
+def compute_fingerprint(
+    root: str,
+    previous: Optional[ProjectFingerprint] = None,
+    files: bool = True,
+    use_git: bool = False,
+    skip_dirs: FrozenSet[str] = frozenset(),
+    rules: Optional[IgnoreRules] = None,
+    ignore_files: bool = False,
+    budget: Optional["ScanBudget"] = None
+) -> Optional[ProjectFingerprint]:
+    """
+    Fingerprint a project tree.
+
+    With files=False only directories are stat'ed. Directories whose mtime
+    and size match the previous fingerprint are not listed again, so an
+    unchanged tree costs one stat() per directory. In-place edits of files
+    do not move a directory mtime and are only seen with files=True, which
+    lists every directory and stat's its files.
+
+    Excluded directories are never descended into. Excluded files are
+    left out with files=True; with files=False they still move their
+    directory's mtime.
+
+    With use_git on a git checkout, the previous fingerprint is returned as
+    is while HEAD and the index are unchanged. That skips the walk entirely
+    but misses worktree edits that were not staged yet.
+
+    Args:
+        root: Absolute project root
+        previous: Earlier fingerprint of the same root to reuse
+        files: Include the size and mtime of every file
+        use_git: Use the git HEAD and index as a shortcut
+        skip_dirs: Directory names that are not descended into
+        rules: Root-level exclude rules; excluded files and directories are
+            left out, as in a scan with the same rules
+        ignore_files: Also apply the .gitignore-style files found in the tree
+        budget: Scan budget the walk counts against
+
+    Returns:
+        The fingerprint, or None if the budget ran out first
+
+    Raises:
+        OSError: If the root cannot be read
+    """
+    if previous is not None and (previous.root != root or previous.files != files):
+        previous = None
+
+    git_state = read_git_state(root) if use_git else None
+    if git_state is not None and previous is not None and previous.git_state == git_state:
+        return previous
+
+    taken_ns = time.time_ns()
+    old_nodes = previous.nodes if previous is not None else {}
+    # Listings of directories modified this close to the last walk may be stale
+    trusted_before = previous.taken_ns - RACY_WINDOW_NS if previous is not None else 0
+
+    nodes: Dict[str, _DirNode] = {}
+    order: List[str] = []
+    stack: List[Tuple[str, Optional[IgnoreRules]]] = [("", rules)]
+    while stack:
+        if budget is not None and budget.exhausted(0):
+            return None
+        rel, dir_rules = stack.pop()
+        path = os.path.join(root, rel) if rel else root
+        try:
+            st = os.stat(path)
+        except OSError:
+            if not rel:
+                raise
+            # Removed while walking
+            continue
+
+        old = old_nodes.get(rel)
+        if (not files and old is not None and old.mtime_ns == st.st_mtime_ns and old.size == st.st_size
+                and st.st_mtime_ns < trusted_before):
+            node = _DirNode(old.mtime_ns, old.size, old.subdirs, old.files, old.ignore_files)
+            if dir_rules is not None and node.ignore_files:
+                dir_rules = dir_rules.with_ignore_files(path, rel, node.ignore_files)
+        else:
+            node, dir_rules = _list_dir(path, rel, st, files, skip_dirs, dir_rules, ignore_files)
+        nodes[rel] = node
+        order.append(rel)
+        stack.extend((f"{rel}/{name}" if rel else name, dir_rules) for name in node.subdirs)
+
+    # Children were listed after their parents, so hash in reverse order
+    for rel in reversed(order):
+        node = nodes[rel]
+        h = _new_hash()
+        if not files:
+            h.update(_STAT.pack(node.size, node.mtime_ns))
+        # With files, the filtered entries say it all and excluded entries leave no trace
+        h.update(node.files)
+        for name in node.subdirs:
+            child = nodes.get(f"{rel}/{name}" if rel else name)
+            if child is not None:
+                h.update(name.encode("utf-8", "surrogateescape"))
+                h.update(b"\0")
+                h.update(child.digest)
+        node.digest = h.digest()
+
+    root_hash = _new_hash()
+    root_hash.update(nodes[""].digest)
+    if git_state is not None:
+        root_hash.update(repr(git_state).encode("utf-8", "surrogateescape"))
+    return ProjectFingerprint(root, root_hash.hexdigest(), taken_ns, files, git_state, nodes)
+
+
+def _list_dir(path: str, rel: str, st: os.stat_result, files: bool, skip_dirs: FrozenSet[str],
+              rules: Optional[IgnoreRules], ignore_files: bool) -> Tuple[_DirNode, Optional[IgnoreRules]]:
+    """
+    List one directory into a node; unreadable directories get no entries.
+
+    Returns:
+        The node, and the rules that apply to the directory's entries and below
+    """
+    subdirs = []
+    file_entries = []
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError as e:
+        if not rel:
+            raise
+        logger.debug(f"Cannot list {path} for fingerprint: {e}")
+        entries = []
+
+    present = ()
+    if ignore_files and rules is not None:
+        present = tuple(sorted(entry.name for entry in entries if entry.name in IGNORE_FILE_NAMES))
+        if present:
+            rules = rules.with_ignore_files(path, rel, present)
+
+    for entry in entries:
+        name = entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if name in skip_dirs or (rules is not None and rules.is_ignored(
+                        f"{rel}/{name}" if rel else name, name, True)):
+                    continue
+                subdirs.append(name)
+            elif files:
+                if rules is not None and rules.is_ignored(f"{rel}/{name}" if rel else name, name, False):
+                    continue
+                entry_st = entry.stat(follow_symlinks=False)
+                file_entries.append((name, entry_st.st_size, entry_st.st_mtime_ns))
+        except OSError:
+            continue
+
+    file_digest = b""
+    if files:
+        h = _new_hash()
+        for name, size, mtime_ns in sorted(file_entries):
+            h.update(name.encode("utf-8", "surrogateescape"))
+            h.update(b"\0")
+            h.update(_STAT.pack(size, mtime_ns))
+        file_digest = h.digest()
+    return _DirNode(st.st_mtime_ns, st.st_size, tuple(sorted(subdirs)), file_digest, present), rules
@@ -0,0 +1,334 @@
+"""
+Filesystem probes with timeouts and slow-mount detection.
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+# Seconds a single probe may take before it is abandoned
+DEFAULT_PROBE_TIMEOUT = 5.0
+
+# Probe latency above which a network mount is treated as slow
+DEFAULT_SLOW_MOUNT_SECONDS = 0.5
+
+# Seconds a slow mount stays degraded before it is measured again
+SLOW_MOUNT_TTL = 60.0
+
+# Seconds the mount table is cached
+MOUNTS_TTL = 30.0
+
+# Filesystem types whose operations go over the network or through FUSE
+NETWORK_FS_TYPES = frozenset({
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "ncpfs", "9p", "ceph",
+    "glusterfs", "lustre", "gpfs", "beegfs", "davfs", "fuse.sshfs",
+    "fuse.rclone", "fuse.s3fs", "fuse.gcsfuse", "fuse.glusterfs", "fuse.cephfs",
+})
+
+# Escapes used for spaces, tabs and newlines in mountinfo fields
+_OCTAL_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+class ProbeTimeout(TimeoutError):
+    """Raised when a filesystem probe does not finish within its timeout."""
+
+
+class MountInfo(NamedTuple):
+    """A mounted filesystem from /proc/self/mountinfo."""
+
+    mount_point: str
+    fs_type: str
+    source: str
+
+    @property
+    def network(self) -> bool:
+        """Whether operations on this mount may block on the network."""
+        return self.fs_type in NETWORK_FS_TYPES
+
+
+def _unescape(field: str) -> str:
+    """Decode the octal escapes (e.g. ``\\040`` for a space) used in mountinfo."""
+    return _OCTAL_ESCAPE.sub(lambda match: chr(int(match.group(1), 8)), field)
+
+
+def parse_mountinfo(text: str) -> List[MountInfo]:
+    """
+    Parse the contents of a mountinfo file.
+
+    Args:
+        text: File contents, one mount per line
+
+    Returns:
+        Mounts in table order; malformed lines are skipped
+    """
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            separator = fields.index("-", 6)
+            mounts.append(MountInfo(_unescape(fields[4]), fields[separator + 1], _unescape(fields[separator + 2])))
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+
+def read_mounts(path: str = MOUNTINFO_PATH) -> List[MountInfo]:
+    """
+    Read the mount table of this process.
+
+    Args:
+        path: mountinfo file to read
+
+    Returns:
+        Mounts in table order, empty where /proc is not available
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+            return parse_mountinfo(f.read())
+    except OSError:
+        return []
+
+
+def find_mount(path: str, mounts: List[MountInfo]) -> Optional[MountInfo]:
+    """
+    Find the mount a path lives on.
+
+    Args:
+        path: Absolute path
+        mounts: Mount table, later entries stacking over earlier ones
+
+    Returns:
+        The innermost mount containing path, or None if none does
+    """
+    best = None
+    for mount in mounts:
+        point = mount.mount_point
+        if path == point or path.startswith(point.rstrip("/") + "/"):
+            if best is None or len(point) >= len(best.mount_point):
+                best = mount
+    return best
+
+
+class ProbePool:
+    """
+    Worker threads for calls that may block indefinitely.
+
+    Unlike ThreadPoolExecutor, the workers are daemon threads and are not
+    joined at exit, so a call stuck on a hung mount cannot keep the process
+    alive.
+    """
+
+    def __init__(self, max_workers: int = 4, thread_name_prefix: str = "serena-cli-probe"):
+        """
+        Initialize the pool; threads are started on demand.
+
+        Args:
+            max_workers: Maximum number of worker threads
+            thread_name_prefix: Name prefix of the worker threads
+        """
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: "queue.SimpleQueue[Optional[Tuple[Future, Callable[..., Any], tuple]]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._idle = 0
+        self._local = threading.local()
+
+    @property
+    def in_worker(self) -> bool:
+        """Whether the current thread is one of this pool's workers."""
+        return getattr(self._local, "worker", False)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Schedule fn(*args) on a worker thread.
+
+        Returns:
+            Future of the call
+        """
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        with self._lock:
+            if self._idle == 0 and self._threads < self.max_workers:
+                self._threads += 1
+                threading.Thread(
+                    target=self._work,
+                    name=f"{self.thread_name_prefix}-{self._threads}",
+                    daemon=True,
+                ).start()
+        return future
+
+    def shutdown(self):
+        """Let the workers exit once the queued calls are done, without waiting for them."""
+        with self._lock:
+            for _ in range(self._threads):
+                self._queue.put(None)
+            self._threads = 0
+
+    def _work(self):
+        """Run queued calls until a shutdown marker is received."""
+        self._local.worker = True
+        while True:
+            with self._lock:
+                self._idle += 1
+            item = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class FilesystemProbe:
+    """
+    Runs filesystem calls with a timeout and tracks slow network mounts.
+
+    Calls on network filesystems are timed; a mount whose latency crosses
+    the threshold, or where a call timed out, is reported as slow for
+    SLOW_MOUNT_TTL seconds so that callers can fall back to cheaper work.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_PROBE_TIMEOUT,
+        slow_seconds: float = DEFAULT_SLOW_MOUNT_SECONDS,
+        max_workers: int = 4,
+        mountinfo_path: str = MOUNTINFO_PATH
+    ):
+        """
+        Initialize the probe.
+
+        Args:
+            timeout: Seconds after which a call raises ProbeTimeout
+            slow_seconds: Latency above which a network mount is slow
+            max_workers: Threads available for concurrent calls
+            mountinfo_path: Mount table to classify paths with
+        """
+        self.timeout = timeout
+        self.slow_seconds = slow_seconds
+        self.mountinfo_path = mountinfo_path
+        self.pool = ProbePool(max_workers)
+        self._mounts: List[MountInfo] = []
+        self._mounts_read = float("-inf")
+        # Mount point -> monotonic time it was found slow
+        self._slow: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mount_for(self, path: str) -> Optional[MountInfo]:
+        """
+        Get the mount a path lives on.
+
+        Args:
+            path: Absolute path
+
+        Returns:
+            Mount, or None if the mount table is unavailable
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._mounts_read >= MOUNTS_TTL:
+                self._mounts = read_mounts(self.mountinfo_path)
+                self._mounts_read = now
+            mounts = self._mounts
+        return find_mount(os.fspath(path), mounts)
+
+    def call(self, path: Any, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(*args) on a worker thread, waiting at most the timeout.
+
+        Calls made from a worker thread run directly, so nested probes
+        cannot exhaust the pool.
+
+        Args:
+            path: Path the call touches, used to attribute its latency
+            fn: Filesystem call
+            timeout: Seconds to wait instead of the probe's default
+
+        Returns:
+            The call's result; its exceptions propagate
+
+        Raises:
+            ProbeTimeout: If the call did not finish in time
+        """
+        if self.pool.in_worker:
+            return fn(*args)
+
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        future = self.pool.submit(fn, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            mount = self.mount_for(path)
+            if mount is not None and mount.network:
+                self.mark_slow(mount)
+            raise ProbeTimeout(f"Filesystem call on {path} did not finish within {timeout}s") from None
+        finally:
+            elapsed = time.monotonic() - started
+            if elapsed > self.slow_seconds and future.done():
+                mount = self.mount_for(path)
+                if mount is not None and mount.network:
+                    self.mark_slow(mount)
+
+    def mark_slow(self, mount: MountInfo):
+        """Treat a mount as slow for the next SLOW_MOUNT_TTL seconds."""
+        with self._lock:
+            if mount.mount_point not in self._slow:
+                logger.warning(f"Slow filesystem at {mount.mount_point} ({mount.fs_type}), using cheap scans")
+            self._slow[mount.mount_point] = time.monotonic()
+
+    def is_slow(self, path: Any) -> bool:
+        """
+        Check whether a path lives on a slow network mount.
+
+        A network mount that is not known to be slow is measured with one
+        stat() of the path.
+
+        Args:
+            path: Absolute path
+
+        Returns:
+            True if scans below path should be degraded
+        """
+        mount = self.mount_for(path)
+        if mount is None or not mount.network:
+            return False
+
+        with self._lock:
+            since = self._slow.get(mount.mount_point)
+            if since is not None:
+                if time.monotonic() - since < SLOW_MOUNT_TTL:
+                    return True
+                del self._slow[mount.mount_point]
+
+        try:
+            self.call(path, os.stat, path)
+        except ProbeTimeout:
+            return True
+        except OSError:
+            pass
+        with self._lock:
+            return mount.mount_point in self._slow
+
+    def on_network_mount(self, path: Any) -> bool:
+        """Check whether a path lives on a network filesystem."""
+        mount = self.mount_for(path)
+        return mount is not None and mount.network
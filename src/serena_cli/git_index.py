@@ -0,0 +1,232 @@
+"""
+Reader for git's index file (.git/index).
+"""
+
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Fixed-size part of an index entry: ctime, mtime, dev, ino, mode, uid, gid,
+# size, object id and flags
+_ENTRY_HEADER = struct.Struct(">10I20sH")
+
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE_MASK = 0x3000
+_FLAG_NAME_MASK = 0x0FFF
+
+_MODE_TYPE_MASK = 0o170000
+_MODE_REGULAR = 0o100000
+
+# Extensions that move entries elsewhere; the file alone is then incomplete
+_UNSUPPORTED_EXTENSIONS = {
+    b"link": "split index",
+    b"sdir": "sparse index",
+}
+
+# Size of the trailing checksum (SHA-1 object format only, see find_git_index)
+_CHECKSUM_SIZE = 20
+
+# "End of index entry" extension: offset of the extensions and a hash, placed
+# last so the extension table can be found without walking the entries
+_EOIE_SIGNATURE = b"EOIE"
+_EOIE_SIZE = 8 + 4 + _CHECKSUM_SIZE
+
+
+class GitIndexError(Exception):
+    """Raised when an index file cannot be used to enumerate tracked files."""
+
+
+class GitIndexEntry(NamedTuple):
+    """A tracked file from the index."""
+
+    path: str
+    mode: int
+    size: int
+    mtime_ns: int
+
+
+def find_git_index(project_path: Union[str, Path]) -> Optional[Path]:
+    """
+    Locate the index file of a git working tree.
+
+    Args:
+        project_path: Working tree root
+
+    Returns:
+        Index file path, or None if the project is not a git checkout
+    """
+    git_path = Path(project_path) / ".git"
+    try:
+        if git_path.is_dir():
+            git_dir = git_path
+        elif git_path.is_file():
+            # Worktrees and submodules use a "gitdir: <path>" file
+            content = git_path.read_text(encoding="utf-8").strip()
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = Path(content[len("gitdir:"):].strip())
+            if not git_dir.is_absolute():
+                git_dir = Path(project_path) / git_dir
+        else:
+            return None
+
+        # Index entries embed object ids, whose size depends on the hash
+        config_path = git_dir / "config"
+        if config_path.is_file():
+            config = config_path.read_text(encoding="utf-8", errors="replace").lower()
+            if "objectformat = sha256" in config:
+                return None
+
+        index_path = git_dir / "index"
+        return index_path if index_path.is_file() else None
+
+    except OSError as e:
+        logger.debug(f"Cannot locate git index for {project_path}: {e}")
+        return None
+
+
+def _read_varint(data, offset: int):
+    """Decode git's offset varint used by index version 4."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def _skip_entries(data, version: int, count: int) -> int:
+    """Get the offset just past the entries, without decoding them."""
+    offset = 12
+    for _ in range(count):
+        flags = struct.unpack_from(">H", data, offset + _ENTRY_HEADER.size - 2)[0]
+        entry_start = offset
+        offset += _ENTRY_HEADER.size
+        if version >= 3 and flags & _FLAG_EXTENDED:
+            offset += 2
+        if version == 4:
+            _, offset = _read_varint(data, offset)
+            end = data.find(b"\0", offset)
+            if end < 0:
+                raise ValueError("unterminated entry name")
+            offset = end + 1
+        else:
+            name_length = flags & _FLAG_NAME_MASK
+            end = offset + name_length if name_length < _FLAG_NAME_MASK else data.find(b"\0", offset)
+            if end < 0:
+                raise ValueError("unterminated entry name")
+            offset = entry_start + ((end - entry_start + 8) & ~7)
+    return offset
+
+
+def _extensions_offset(data, version: int, count: int) -> int:
+    """Find where the extension table starts, from EOIE if present."""
+    eoie = len(data) - _CHECKSUM_SIZE - _EOIE_SIZE
+    if eoie >= 12:
+        signature, length, offset = struct.unpack_from(">4sII", data, eoie)
+        if signature == _EOIE_SIGNATURE and length == _EOIE_SIZE - 8 and 12 <= offset <= eoie:
+            return offset
+    return _skip_entries(data, version, count)
+
+
+def _check_extensions(data, offset: int):
+    """
+    Reject indexes whose extensions move entries out of the file.
+
+    Raises:
+        GitIndexError: If a split or sparse index extension is present
+    """
+    while offset + 8 <= len(data) - _CHECKSUM_SIZE:
+        extension, length = struct.unpack_from(">4sI", data, offset)
+        if extension in _UNSUPPORTED_EXTENSIONS:
+            raise GitIndexError(f"{_UNSUPPORTED_EXTENSIONS[extension]} is not supported")
+        offset += 8 + length
+
+
+def iter_git_index(index_path: Union[str, Path], regular_files_only: bool = True) -> Iterator[GitIndexEntry]:
+    """
+    Iterate over the stage-0 entries of an index file.
+
+    The file is memory-mapped and decoded in place. Index versions 2, 3 and
+    4 are supported. The header and extension table are checked before any
+    entry is yielded, so split and sparse indexes, whose entry list is
+    incomplete, raise GitIndexError up front. The table is located through
+    the EOIE extension when git wrote one, otherwise by skipping over the
+    entries once without decoding them.
+
+    Args:
+        index_path: Path to the index file
+        regular_files_only: Skip symlinks and submodule entries
+
+    Returns:
+        Iterator over index entries
+
+    Raises:
+        GitIndexError: If the file is not a usable index
+    """
+    try:
+        with open(index_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < 12:
+                raise GitIndexError(f"{index_path} is too short")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError as e:
+        raise GitIndexError(f"Cannot read {index_path}: {e}") from e
+
+    try:
+        signature, version, count = struct.unpack_from(">4sII", data, 0)
+        if signature != b"DIRC":
+            raise GitIndexError(f"{index_path} is not a git index")
+        if version not in (2, 3, 4):
+            raise GitIndexError(f"Unsupported index version {version}")
+        _check_extensions(data, _extensions_offset(data, version, count))
+
+        offset = 12
+        previous = b""
+        for _ in range(count):
+            (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size,
+             _, flags) = _ENTRY_HEADER.unpack_from(data, offset)
+            entry_start = offset
+            offset += _ENTRY_HEADER.size
+            if version >= 3 and flags & _FLAG_EXTENDED:
+                offset += 2
+
+            if version == 4:
+                strip, offset = _read_varint(data, offset)
+                end = data.find(b"\0", offset)
+                name = previous[:len(previous) - strip] + data[offset:end]
+                offset = end + 1
+                previous = name
+            else:
+                name_length = flags & _FLAG_NAME_MASK
+                if name_length < _FLAG_NAME_MASK:
+                    end = offset + name_length
+                else:
+                    end = data.find(b"\0", offset)
+                name = data[offset:end]
+                # Entries are NUL-padded to a multiple of eight bytes
+                offset = entry_start + ((end - entry_start + 8) & ~7)
+
+            if flags & _FLAG_STAGE_MASK:
+                continue
+            if regular_files_only and mode & _MODE_TYPE_MASK != _MODE_REGULAR:
+                continue
+
+            yield GitIndexEntry(
+                name.decode("utf-8", "surrogateescape"),
+                mode,
+                size,
+                mtime_s * 1_000_000_000 + mtime_ns,
+            )
+
+    except (struct.error, IndexError, ValueError) as e:
+        raise GitIndexError(f"Corrupt index {index_path}: {e}") from e
+    finally:
+        data.close()
@@ -0,0 +1,274 @@
+"""
+Gitignore-style exclude rules for project scans.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Directories that never describe the project itself and dominate walk I/O
+DEFAULT_EXCLUDES = (
+    # Version control metadata
+    ".git/",
+    ".hg/",
+    ".svn/",
+
+    # Dependencies and virtual environments
+    "node_modules/",
+    "bower_components/",
+    ".venv/",
+    "venv/",
+    ".tox/",
+    ".nox/",
+
+    # Caches
+    "__pycache__/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".gradle/",
+
+    # Build output
+    "target/",
+    "build/",
+
+    # Tool state
+    ".serena/",
+    ".serena-cli/",
+)
+
+# Per-directory files whose patterns are applied while walking
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+
+class IgnoreRule:
+    """A single compiled gitignore pattern."""
+
+    __slots__ = ("pattern", "regex", "negate", "dir_only", "anchored", "base")
+
+    def __init__(self, pattern: str, regex: Pattern, negate: bool, dir_only: bool,
+                 anchored: bool, base: str):
+        self.pattern = pattern
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+        self.base = base
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """
+        Check whether the rule matches a path.
+
+        Args:
+            rel_path: Path relative to the scan root, '/' separated
+            name: Final path component
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the rule matches, False otherwise
+        """
+        if self.dir_only and not is_dir:
+            return False
+
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+
+        if self.anchored:
+            return self.regex.match(rel_path) is not None
+        return self.regex.match(name) is not None
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression."""
+    result = []
+    i = 0
+    n = len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                # '**/' matches zero or more directories, a trailing '/**'
+                # matches everything inside
+                if pattern.startswith("**/", i):
+                    result.append("(?:.*/)?")
+                    i += 3
+                    continue
+                result.append(".*")
+                i += 2
+                continue
+            result.append("[^/]*")
+        elif c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+
+    return "".join(result) + r"\Z"
+
+
+def parse_rule(line: str, base: str = "") -> Optional[IgnoreRule]:
+    """
+    Parse one line of a gitignore file.
+
+    Args:
+        line: Raw line from the ignore file
+        base: Directory of the ignore file relative to the scan root
+
+    Returns:
+        Compiled rule, or None for blank lines and comments
+    """
+    line = line.rstrip("\n\r")
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+
+    if not line or line.startswith("#"):
+        return None
+
+    negate = False
+    if line.startswith("!"):
+        negate = True
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    try:
+        regex = re.compile(_translate(line))
+    except re.error as e:
+        logger.debug(f"Ignoring invalid pattern {line!r}: {e}")
+        return None
+
+    return IgnoreRule(line, regex, negate, dir_only, anchored, base)
+
+
+class IgnoreRules:
+    """An ordered set of ignore rules; later rules take precedence."""
+
+    def __init__(self, rules: Optional[Tuple[IgnoreRule, ...]] = None):
+        """Initialize with an optional tuple of compiled rules."""
+        self.rules: Tuple[IgnoreRule, ...] = rules or ()
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str], base: str = "") -> "IgnoreRules":
+        """
+        Build rules from gitignore-style pattern strings.
+
+        Args:
+            patterns: Pattern lines
+            base: Directory the patterns are relative to
+
+        Returns:
+            New rule set
+        """
+        return cls().extend(patterns, base)
+
+    def extend(self, patterns: Iterable[str], base: str = "") -> "IgnoreRules":
+        """
+        Return a new rule set with extra patterns appended.
+
+        Args:
+            patterns: Pattern lines
+            base: Directory the patterns are relative to
+
+        Returns:
+            New rule set; self is left unchanged so parents can share it
+        """
+        added = [rule for rule in (parse_rule(p, base) for p in patterns) if rule is not None]
+        if not added:
+            return self
+        return IgnoreRules(self.rules + tuple(added))
+
+    def with_ignore_files(self, directory: str, rel_dir: str, names: Iterable[str]) -> "IgnoreRules":
+        """
+        Return a rule set extended with the ignore files found in a directory.
+
+        Args:
+            directory: Absolute directory path
+            rel_dir: Directory path relative to the scan root
+            names: Ignore file names present in the directory
+
+        Returns:
+            Extended rule set
+        """
+        rules = self
+        for name in IGNORE_FILE_NAMES:
+            if name in names:
+                rules = rules.extend(read_ignore_file(os.path.join(directory, name)), rel_dir)
+        return rules
+
+    def is_ignored(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """
+        Check whether a path is excluded.
+
+        Args:
+            rel_path: Path relative to the scan root, '/' separated
+            name: Final path component
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the last matching rule excludes the path
+        """
+        for rule in reversed(self.rules):
+            if rule.matches(rel_path, name, is_dir):
+                return not rule.negate
+        return False
+
+    def signature(self) -> str:
+        """Get a stable digest of the rules, used to invalidate cached scans."""
+        digest = hashlib.sha1()
+        for rule in self.rules:
+            digest.update(f"{rule.base}\0{rule.pattern}\0{rule.negate:d}{rule.dir_only:d}{rule.anchored:d}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+def read_ignore_file(path: str) -> List[str]:
+    """
+    Read the pattern lines of an ignore file.
+
+    Args:
+        path: Ignore file path
+
+    Returns:
+        List of lines, empty if the file cannot be read
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+    except OSError as e:
+        logger.debug(f"Cannot read ignore file {path}: {e}")
+        return []
@@ -0,0 +1,287 @@
+"""
+Pre-flight checks and a single install strategy for Serena.
+
+Trying pip plain, then --user, then --break-system-packages one after
+another, each with a long timeout, can stall for many minutes when the
+network is down or the interpreter is externally managed. The planner
+instead inspects the interpreter first (virtual environment, PEP 668
+marker, writable site-packages, reachable hosts) and picks the one
+command that can work. The command's output is streamed line by line,
+and the install is stopped on the first line that shows it cannot
+succeed.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import site
+import socket
+import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+from .toolchain import Toolchain
+
+logger = logging.getLogger(__name__)
+
+
+# Package index used when PIP_INDEX_URL / UV_INDEX_URL are not set
+DEFAULT_INDEX_URL = "https://pypi.org/simple"
+
+# Seconds a TCP connection to the index or source host may take
+REACHABILITY_TIMEOUT = 3.0
+
+# Seconds the chosen install command may take in total
+INSTALL_TIMEOUT = 300
+
+# Lines after which an install cannot succeed anymore
+FATAL_OUTPUT_PATTERNS: Tuple[Pattern[str], ...] = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"externally-managed-environment",
+    r"No matching distribution found|Could not find a version that satisfies",
+    r"requires a different Python|No solution found when resolving",
+    r"No space left on device",
+))
+
+# Network and permission failures are fatal only on error lines: pip also
+# reports them in "WARNING: Retrying ..." lines before a retry succeeds
+ERROR_OUTPUT_PATTERNS: Tuple[Pattern[str], ...] = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"Could not resolve host|Temporary failure in name resolution|Name or service not known",
+    r"Failed to establish a new connection|Network is unreachable|Connection refused",
+    r"Permission denied|Errno 13",
+))
+
+# Error lines of pip ("ERROR:"), uv ("error:") and git run by either ("fatal:")
+_ERROR_LINE_RE = re.compile(r"^\s*(?:error|fatal)\s*:", re.IGNORECASE)
+
+
+class InstallPreflight:
+    """Facts about the running interpreter that decide how Serena can be installed."""
+
+    __slots__ = ("in_venv", "externally_managed", "site_writable", "user_site_writable", "uv_available",
+                 "unreachable_hosts")
+
+    def __init__(self, in_venv: bool, externally_managed: bool, site_writable: bool, user_site_writable: bool,
+                 uv_available: bool, unreachable_hosts: List[str]):
+        self.in_venv = in_venv
+        # PEP 668 EXTERNALLY-MANAGED marker of a system interpreter
+        self.externally_managed = externally_managed
+        self.site_writable = site_writable
+        self.user_site_writable = user_site_writable
+        self.uv_available = uv_available
+        # host:port pairs that could not be connected to
+        self.unreachable_hosts = unreachable_hosts
+
+    def to_dict(self) -> Dict[str, object]:
+        """Get the checks as a dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class InstallPlan:
+    """The one install command chosen by the planner, or why there is none."""
+
+    __slots__ = ("strategy", "command", "reason")
+
+    def __init__(self, strategy: str, command: Optional[List[str]], reason: str):
+        # "uv", "pip", "pip-user", "pip-break-system" or "none"
+        self.strategy = strategy
+        self.command = command
+        self.reason = reason
+
+
+def _nearest_writable(path: Optional[str]) -> bool:
+    """Whether path, or the closest existing parent it would be created in, is writable."""
+    while path:
+        if os.path.exists(path):
+            return os.access(path, os.W_OK)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return False
+
+
+def _is_externally_managed() -> bool:
+    """Check for the PEP 668 marker, which does not apply inside virtual environments."""
+    if sys.prefix != sys.base_prefix:
+        return False
+    stdlib = sysconfig.get_path("stdlib")
+    return bool(stdlib) and os.path.isfile(os.path.join(stdlib, "EXTERNALLY-MANAGED"))
+
+
+def _host_port(url: str) -> Optional[Tuple[str, int]]:
+    """Get the host and port a URL connects to, through the HTTPS proxy if one is set."""
+    proxy = os.environ.get("HTTPS_PROXY") or os.environ.get("https_proxy")
+    parts = urlsplit(proxy or url)
+    if not parts.hostname:
+        return None
+    return parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+
+
+def _reachable(address: Tuple[str, int], timeout: float) -> bool:
+    """Whether a TCP connection to address can be opened."""
+    try:
+        with socket.create_connection(address, timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def run_preflight(source: str, toolchain: Toolchain, timeout: float = REACHABILITY_TIMEOUT) -> InstallPreflight:
+    """
+    Inspect the interpreter and network before installing.
+
+    Args:
+        source: Requirement Serena is installed from, e.g. a git+https URL
+        toolchain: Tools used to find uv
+        timeout: Seconds each reachability check may take
+
+    Returns:
+        The pre-flight checks
+    """
+    index_url = os.environ.get("UV_INDEX_URL") or os.environ.get("PIP_INDEX_URL") or DEFAULT_INDEX_URL
+    urls = [index_url]
+    if "://" in source:
+        urls.append(source.split("+", 1)[-1] if source.startswith("git+") else source)
+    addresses = list(dict.fromkeys(address for address in map(_host_port, urls) if address is not None))
+
+    with ThreadPoolExecutor(max_workers=len(addresses) + 1, thread_name_prefix="serena-cli-preflight") as pool:
+        uv_future = pool.submit(toolchain.get, "uv")
+        reachable = list(pool.map(lambda address: _reachable(address, timeout), addresses))
+        uv_available = uv_future.result().available
+
+    user_site = site.getusersitepackages() if site.ENABLE_USER_SITE else None
+    return InstallPreflight(
+        in_venv=sys.prefix != sys.base_prefix,
+        externally_managed=_is_externally_managed(),
+        site_writable=_nearest_writable(sysconfig.get_path("purelib")),
+        user_site_writable=bool(user_site) and _nearest_writable(user_site),
+        uv_available=uv_available,
+        unreachable_hosts=[f"{host}:{port}" for (host, port), ok in zip(addresses, reachable) if not ok],
+    )
+
+
+def plan_install(preflight: InstallPreflight, source: str, toolchain: Toolchain) -> InstallPlan:
+    """
+    Choose the single install command that fits the pre-flight checks.
+
+    Args:
+        preflight: Result of run_preflight()
+        source: Requirement Serena is installed from
+        toolchain: Tools used to find uv
+
+    Returns:
+        The plan; its command is None when no strategy can succeed
+    """
+    if preflight.unreachable_hosts:
+        return InstallPlan("none", None, f"Cannot reach {', '.join(preflight.unreachable_hosts)}; "
+                                         f"install offline with a wheelhouse instead")
+
+    pip = [sys.executable, "-m", "pip", "install"]
+    if preflight.site_writable and (preflight.in_venv or not preflight.externally_managed):
+        if preflight.uv_available:
+            return InstallPlan("uv", [toolchain.get("uv").path, "pip", "install", "--python", sys.executable, source],
+                               "site-packages is writable and uv is available")
+        return InstallPlan("pip", pip + [source], "site-packages is writable")
+
+    if preflight.in_venv:
+        return InstallPlan("none", None, "The active virtual environment is not writable")
+
+    if preflight.user_site_writable:
+        if preflight.externally_managed:
+            # PEP 668 refuses --user as well; the user site at least leaves distro packages alone
+            return InstallPlan("pip-user", pip + ["--user", "--break-system-packages", source],
+                               "The interpreter is externally managed; installing into the user site")
+        return InstallPlan("pip-user", pip + ["--user", source], "site-packages is not writable")
+
+    if preflight.site_writable:
+        return InstallPlan("pip-break-system", pip + ["--break-system-packages", source],
+                           "The interpreter is externally managed and no user site is available")
+
+    return InstallPlan("none", None, "Neither site-packages nor the user site is writable; "
+                                     "create and activate a virtual environment")
+
+
+def _kill(process: asyncio.subprocess.Process):
+    """Kill a process that may have exited already."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+def fatal_line(line: str) -> bool:
+    """Whether an output line shows the install cannot succeed."""
+    if any(pattern.search(line) for pattern in FATAL_OUTPUT_PATTERNS):
+        return True
+    return bool(_ERROR_LINE_RE.match(line)) and any(pattern.search(line) for pattern in ERROR_OUTPUT_PATTERNS)
+
+
+async def run_plan(
+    plan: InstallPlan,
+    on_line: Optional[Callable[[str], None]] = None,
+    timeout: float = INSTALL_TIMEOUT
+) -> Dict[str, object]:
+    """
+    Run a plan's command, streaming its output and stopping at the first fatal line.
+
+    Args:
+        plan: Plan with a command
+        on_line: Called with each output line as it arrives, logged by default
+        timeout: Seconds the command may take in total
+
+    Returns:
+        Dictionary with installation results
+    """
+    if on_line is None:
+        on_line = lambda line: logger.info(f"[{plan.strategy}] {line}")
+
+    process = await asyncio.create_subprocess_exec(
+        *plan.command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        # pip prints long single lines, e.g. resolver conflicts
+        limit=1 << 20
+    )
+    tail: List[str] = []
+
+    async def stream() -> Optional[str]:
+        """Forward output lines; return the first fatal one."""
+        while True:
+            raw = await process.stdout.readline()
+            if not raw:
+                return None
+            line = raw.decode(errors="replace").rstrip()
+            on_line(line)
+            tail.append(line)
+            del tail[:-20]
+            if fatal_line(line):
+                return line
+
+    try:
+        fatal = await asyncio.wait_for(stream(), timeout=timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        return {"success": False, "error": f"{plan.strategy} 安装超时 ({timeout}s)", "method": plan.strategy}
+    except BaseException:
+        _kill(process)
+        raise
+
+    if fatal is not None:
+        _kill(process)
+        await process.wait()
+        return {"success": False, "error": f"{plan.strategy} 安装失败: {fatal}", "method": plan.strategy}
+
+    await process.wait()
+    if process.returncode != 0:
+        return {
+            "success": False,
+            "error": f"{plan.strategy} 安装失败: {os.linesep.join(tail[-5:]) or '未知错误'}",
+            "method": plan.strategy,
+        }
+    return {"success": True, "message": f"Serena 通过 {plan.strategy} 安装成功",
+            "method": plan.strategy}
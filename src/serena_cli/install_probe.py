@@ -0,0 +1,170 @@
+"""
+Detection of the installed Serena package without importing it.
+
+Importing ``serena`` runs its whole import graph (agents, language servers),
+so presence, version and location are read from the import system's finder
+and the distribution metadata instead. Results are cached per process and
+on disk, keyed by the interpreter and the mtimes of the sys.path
+directories, which change whenever packages are installed or removed.
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .results import SerenaInstallation
+
+logger = logging.getLogger(__name__)
+
+
+# Top-level module of the Serena package
+SERENA_MODULE = "serena"
+
+# Distribution names Serena is published or installed under
+SERENA_DISTRIBUTIONS = ("serena-agent", "serena")
+
+# Cache file name inside the global ~/.serena-cli directory
+INSTALL_CACHE_FILE = "install-probe.json"
+
+# Bump whenever the cache layout changes; older caches are discarded
+INSTALL_CACHE_VERSION = 1
+
+# Environment key -> installation found in this process
+_process_cache: Dict[str, SerenaInstallation] = {}
+_process_lock = threading.Lock()
+
+
+def environment_key() -> str:
+    """
+    Build a key that changes whenever the set of importable packages may have.
+
+    Returns:
+        Digest of the interpreter, sys.path and the mtimes of its directories
+    """
+    h = hashlib.sha1(sys.executable.encode("utf-8", "surrogateescape"))
+    for entry in sys.path:
+        h.update(b"\0")
+        h.update(entry.encode("utf-8", "surrogateescape"))
+        # The working directory entry changes with every edit, and is
+        # covered by its path alone
+        if not entry:
+            continue
+        try:
+            h.update(b"%d" % os.stat(entry).st_mtime_ns)
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def _find_installation() -> SerenaInstallation:
+    """Locate Serena through the import system's finders and its metadata."""
+    importlib.invalidate_caches()
+    try:
+        spec = importlib.util.find_spec(SERENA_MODULE)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None:
+        return SerenaInstallation(False)
+
+    version = distribution = None
+    for name in SERENA_DISTRIBUTIONS:
+        try:
+            version = importlib_metadata.version(name)
+        except importlib_metadata.PackageNotFoundError:
+            continue
+        distribution = name
+        break
+
+    if spec.origin in (None, "namespace"):
+        # Any directory named serena on sys.path imports as a namespace package
+        if distribution is None:
+            return SerenaInstallation(False)
+        location = next(iter(spec.submodule_search_locations or ()), None)
+    else:
+        location = os.path.dirname(spec.origin) if spec.submodule_search_locations else spec.origin
+    return SerenaInstallation(True, version, location, distribution)
+
+
+def _read_cache(cache_path: Path, key: str) -> Optional[SerenaInstallation]:
+    """Read this interpreter's cached installation if its key still matches."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INSTALL_CACHE_VERSION:
+            return None
+        entry = data["interpreters"].get(sys.executable)
+        if not entry or entry.get("key") != key:
+            return None
+        return SerenaInstallation.from_dict(entry["installation"])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Discarding unreadable install cache {cache_path}: {e}")
+        return None
+
+
+def _write_cache(cache_path: Path, key: str, installation: SerenaInstallation):
+    """Store this interpreter's installation, keeping other interpreters' entries."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INSTALL_CACHE_VERSION:
+            raise ValueError("outdated")
+        interpreters = data["interpreters"]
+    except Exception:
+        interpreters = {}
+
+    interpreters[sys.executable] = {"key": key, "installation": installation.to_dict()}
+    tmp_path = f"{os.fspath(cache_path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INSTALL_CACHE_VERSION, "interpreters": interpreters}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Cannot write install cache {cache_path}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def probe_serena_installation(cache_path: Optional[Union[str, Path]] = None) -> SerenaInstallation:
+    """
+    Find out whether and where Serena is installed, without importing it.
+
+    Args:
+        cache_path: JSON file persisting the result across processes
+
+    Returns:
+        Installation state of the running interpreter
+    """
+    key = environment_key()
+    with _process_lock:
+        installation = _process_cache.get(key)
+    if installation is not None:
+        return installation
+
+    installation = _read_cache(Path(cache_path), key) if cache_path is not None else None
+    if installation is None:
+        installation = _find_installation()
+        if cache_path is not None:
+            _write_cache(Path(cache_path), key, installation)
+
+    with _process_lock:
+        _process_cache[key] = installation
+    return installation
+
+
+def invalidate_installation_cache():
+    """Forget the installations found by this process, e.g. after installing."""
+    with _process_lock:
+        _process_cache.clear()
+    importlib.invalidate_caches()
@@ -0,0 +1,149 @@
+"""
+Streaming content analysis: line counting, binary detection and shebangs.
+"""
+
+import logging
+import os
+import re
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Bytes inspected to tell binary from text, and to read a shebang line
+SNIFF_BYTES = 8192
+
+# Chunk size for counting newlines in larger files
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Files larger than this are counted by size only
+DEFAULT_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+# Interpreter names in "#!" lines mapped to languages
+SHEBANG_LANGUAGES = {
+    "python": "Python",
+    "pypy": "Python",
+    "node": "JavaScript",
+    "nodejs": "JavaScript",
+    "deno": "TypeScript",
+    "ts-node": "TypeScript",
+    "ruby": "Ruby",
+    "php": "PHP",
+    "lua": "Lua",
+    "luajit": "Lua",
+    "dart": "Dart",
+    "swift": "Swift",
+    "kotlin": "Kotlin",
+    "scala": "Scala",
+    "runghc": "Haskell",
+    "runhaskell": "Haskell",
+    "ocaml": "OCaml",
+}
+
+_INTERPRETER_NAME = re.compile(r"[a-z][a-z-]*[a-z]|[a-z]")
+
+
+class FileContent(NamedTuple):
+    """Result of analyzing one file."""
+
+    binary: bool
+    lines: Optional[int]
+    shebang_language: Optional[str]
+
+
+def shebang_language(first_block: bytes) -> Optional[str]:
+    """
+    Get the language named by a "#!" interpreter line.
+
+    Args:
+        first_block: Leading bytes of the file
+
+    Returns:
+        Language name, or None if there is no known interpreter
+    """
+    if not first_block.startswith(b"#!"):
+        return None
+
+    line = first_block[2:].split(b"\n", 1)[0].decode("utf-8", "replace").strip()
+    parts = line.split()
+    if not parts:
+        return None
+
+    interpreter = os.path.basename(parts[0])
+    if interpreter == "env":
+        # "#!/usr/bin/env -S python3 -u": skip env's own options
+        args = [part for part in parts[1:] if not part.startswith("-") and "=" not in part]
+        if not args:
+            return None
+        interpreter = os.path.basename(args[0])
+
+    match = _INTERPRETER_NAME.match(interpreter.lower())
+    return SHEBANG_LANGUAGES.get(match.group(0)) if match else None
+
+
+class LineCounter:
+    """
+    Counts lines without decoding, reusing one read buffer.
+
+    Files are read in large chunks into a preallocated buffer and newlines
+    are counted on the raw bytes. A file whose first block contains a NUL
+    byte is treated as binary and not counted further. Not thread-safe;
+    use one instance per thread or process.
+    """
+
+    def __init__(self, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES):
+        """
+        Initialize the counter.
+
+        Args:
+            max_file_bytes: Files larger than this are sniffed but not counted
+        """
+        self.max_file_bytes = max_file_bytes
+        self._buffer = bytearray(READ_CHUNK_BYTES)
+
+    def analyze(self, path: str, size: int, detect_shebang: bool = False) -> FileContent:
+        """
+        Analyze one file.
+
+        Args:
+            path: File path
+            size: File size in bytes, as already known from the walk
+            detect_shebang: Look for a "#!" interpreter line
+
+        Returns:
+            File content summary; lines is None for binary, oversized or
+            unreadable files
+        """
+        try:
+            with open(path, "rb", buffering=0) as f:
+                buffer = self._buffer
+                view = memoryview(buffer)
+                read = f.readinto(view[:SNIFF_BYTES])
+                if not read:
+                    return FileContent(False, 0, None)
+
+                first_block = bytes(view[:min(read, SNIFF_BYTES)])
+                if b"\0" in first_block:
+                    return FileContent(True, None, None)
+
+                language = shebang_language(first_block) if detect_shebang else None
+                if size > self.max_file_bytes:
+                    return FileContent(False, None, language)
+
+                lines = buffer.count(b"\n", 0, read)
+                last = buffer[read - 1]
+                while True:
+                    read = f.readinto(view)
+                    if not read:
+                        break
+                    lines += buffer.count(b"\n", 0, read)
+                    last = buffer[read - 1]
+
+                # A final line without a newline still counts
+                if last != 0x0A:
+                    lines += 1
+                return FileContent(False, lines, language)
+
+        except OSError as e:
+            logger.debug(f"Cannot analyze {path}: {e}")
+            return FileContent(False, None, None)
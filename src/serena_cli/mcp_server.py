@@ -6,7 +6,9 @@ A powerful MCP server for quickly enabling and configuring Serena coding agent t
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 # Try to import MCP library
 try:
@@ -21,23 +23,58 @@ except ImportError:
 from .serena_manager import SerenaManager
 from .project_detector import ProjectDetector
 from .config_manager import ConfigManager
+from .project_scanner import DEFAULT_TOP_K, ScanBudget
+from .project_watcher import LiveProjectModel, ProjectWatcher
+from .fingerprint import ProjectFingerprint, read_git_state
+from .results import ProjectInfo, SerenaStatus
 
 logger = logging.getLogger(__name__)
 
+# Tree scans for tool calls return partial results after this many seconds
+DEFAULT_SCAN_SECONDS = 10.0
+
+# Projects whose last complete info is kept, least recently used dropped first
+INFO_CACHE_SIZE = 32
+
+# Projects kept live in watch mode; the least recently used one's watcher is
+# stopped when another project is loaded past this limit
+LIVE_MODEL_LIMIT = 4
+
+# (fingerprint, git state, info or None after a partial scan)
+_InfoCacheEntry = Tuple[ProjectFingerprint, Optional[Tuple[object, ...]], Optional[ProjectInfo]]
+
 
 class SerenaCLIMCPServer:
     """Serena CLI MCP Server for managing Serena coding agent tools."""
     
-    def __init__(self):
-        """Initialize the MCP server."""
+    def __init__(self, watch: bool = False):
+        """
+        Initialize the MCP server.
+        
+        Args:
+            watch: Keep an in-memory model of the active project current
+                through filesystem events, so status and info queries are
+                answered without touching the disk
+        """
         self.mcp_available = MCP_AVAILABLE
         self.server = None
         
         # Initialize managers
         self.serena_manager = SerenaManager()
-        self.project_detector = ProjectDetector()
+        self.project_detector = ProjectDetector(registry=self.serena_manager.registry)
         self.config_manager = ConfigManager()
         
+        # Live project models and their watchers, keyed by resolved project
+        # path; bounded to LIVE_MODEL_LIMIT in least recently used order
+        self.watch = watch
+        self.live_models: "OrderedDict[str, LiveProjectModel]" = OrderedDict()
+        self.watchers: Dict[str, ProjectWatcher] = {}
+        
+        # Last fingerprint, git state and complete project info per resolved
+        # path, the info valid while both are unchanged; bounded to
+        # INFO_CACHE_SIZE entries in least recently used order
+        self.info_cache: "OrderedDict[str, _InfoCacheEntry]" = OrderedDict()
+        
         # Define available tools
         self.tools = [
             {
@@ -59,6 +96,10 @@ class SerenaCLIMCPServer:
                             "type": "boolean",
                             "description": "强制重新安装",
                             "default": False
+                        },
+                        "wheelhouse": {
+                            "type": "string",
+                            "description": "离线安装所用的 wheelhouse 目录（serena-cli wheelhouse build 生成）"
                         }
                     }
                 }
@@ -76,6 +117,51 @@ class SerenaCLIMCPServer:
                     }
                 }
             },
+            {
+                "name": "serena_info",
+                "description": "获取项目信息（类型、语言、规模）",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "project_path": {
+                            "type": "string",
+                            "description": "项目路径"
+                        },
+                        "max_seconds": {
+                            "type": "number",
+                            "description": "扫描时间上限（秒），超时返回部分结果",
+                            "default": DEFAULT_SCAN_SECONDS
+                        },
+                        "max_files": {
+                            "type": "integer",
+                            "description": "扫描文件数上限，超过后返回部分结果"
+                        }
+                    }
+                }
+            },
+            {
+                "name": "serena_breakdown",
+                "description": "分析项目空间占用：最大的目录和文件、文件大小分布",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "project_path": {
+                            "type": "string",
+                            "description": "项目路径"
+                        },
+                        "top_k": {
+                            "type": "integer",
+                            "description": "返回最大的目录和文件数量",
+                            "default": DEFAULT_TOP_K
+                        },
+                        "max_seconds": {
+                            "type": "number",
+                            "description": "扫描时间上限（秒），超时返回部分结果",
+                            "default": DEFAULT_SCAN_SECONDS
+                        }
+                    }
+                }
+            },
             {
                 "name": "edit_config",
                 "description": "编辑 Serena 配置",
@@ -161,6 +247,10 @@ class SerenaCLIMCPServer:
                 return await self._handle_serena_enable(arguments)
             elif tool_name == "serena_status":
                 return await self._handle_serena_status(arguments)
+            elif tool_name == "serena_info":
+                return await self._handle_serena_info(arguments)
+            elif tool_name == "serena_breakdown":
+                return await self._handle_serena_breakdown(arguments)
             elif tool_name == "edit_config":
                 return await self._handle_edit_config(arguments)
             else:
@@ -176,7 +266,7 @@ class SerenaCLIMCPServer:
         force = arguments.get("force", False)
         
         if not project_path:
-            project_path = self.project_detector.detect_current_project()
+            project_path = await self.project_detector.adetect_current_project()
         
         if not project_path:
             return {"error": "无法检测到项目路径"}
@@ -184,7 +274,8 @@ class SerenaCLIMCPServer:
         result = await self.serena_manager.enable_in_project(
             project_path=project_path,
             context=context,
-            force=force
+            force=force,
+            wheelhouse=arguments.get("wheelhouse")
         )
         
         return result
@@ -194,23 +285,183 @@ class SerenaCLIMCPServer:
         project_path = arguments.get("project_path")
         
         if not project_path:
-            project_path = self.project_detector.detect_current_project()
+            project_path = await self.project_detector.adetect_current_project()
         
         if not project_path:
             return {"error": "无法检测到项目路径"}
         
-        status = await self.serena_manager.get_status(project_path)
+        model = await self._get_live_model(project_path)
+        if model is not None:
+            return await self._status_from_model(model)
+        
+        try:
+            status = await self.serena_manager.get_status(project_path)
+        except OSError as e:
+            logger.error(f"Error getting Serena status: {e}")
+            return {"error": str(e)}
+        return status.to_dict()
+    
+    async def _handle_serena_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle project info tool."""
+        project_path = arguments.get("project_path")
+        
+        if not project_path:
+            project_path = await self.project_detector.adetect_current_project()
+        
+        if not project_path:
+            return {"error": "无法检测到项目路径"}
+        
+        model = await self._get_live_model(project_path)
+        if model is not None:
+            snapshot = model.snapshot()
+            return {
+                "name": snapshot["name"],
+                "path": snapshot["path"],
+                "type": snapshot["type"],
+                "types": snapshot["subprojects"].get("types", []),
+                "languages": snapshot["languages"],
+                "size": snapshot["size"],
+                "subprojects": snapshot["subprojects"],
+                "has_serena": snapshot["enabled"],
+                "enabled": snapshot["enabled"],
+                "config": snapshot["config_path"],
+                "indicators": snapshot["indicators"],
+                "watch_mode": snapshot["watch_mode"],
+            }
+        
+        key = str(Path(project_path).resolve())
+        # The fingerprint and a scan it does not save share one budget
+        budget = ScanBudget(arguments.get("max_seconds", DEFAULT_SCAN_SECONDS), arguments.get("max_files"))
+        cached = self.info_cache.get(key)
+        # Directory-level: one stat per unchanged directory instead of one per file
+        fingerprint = await self.project_detector.afingerprint(
+            key, cached[0] if cached else None, files=False, budget=budget
+        )
+        # Git checkouts are scanned from .git/index, which the fingerprint
+        # leaves out, so staging and commits must invalidate the info too
+        git_state = await self.project_detector.run_blocking(read_git_state, key)
+        if cached is not None and cached[2] is not None and fingerprint is not None \
+                and fingerprint.digest == cached[0].digest and git_state == cached[1]:
+            self.info_cache.move_to_end(key)
+            return cached[2].to_dict()
+        
+        info = await self.project_detector.aget_project_info(project_path, budget=budget)
+        if info is None:
+            self.info_cache.pop(key, None)
+            return {"error": f"不是有效的项目: {project_path}"}
+        if fingerprint is not None:
+            # Partial scans depend on the budget and are not reused; the
+            # fingerprint still saves listing unchanged directories next time
+            self.info_cache[key] = (fingerprint, git_state, info if info.coverage.complete else None)
+            self.info_cache.move_to_end(key)
+            while len(self.info_cache) > INFO_CACHE_SIZE:
+                self.info_cache.popitem(last=False)
+        return info.to_dict()
+    
+    async def _handle_serena_breakdown(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle project size breakdown tool."""
+        project_path = arguments.get("project_path")
+        
+        if not project_path:
+            project_path = await self.project_detector.adetect_current_project()
+        
+        if not project_path:
+            return {"error": "无法检测到项目路径"}
+        
+        # Live models keep totals only, so the breakdown always scans
+        info = await self.project_detector.aget_project_info(
+            project_path,
+            max_seconds=arguments.get("max_seconds", DEFAULT_SCAN_SECONDS),
+            top_k=max(1, int(arguments.get("top_k", DEFAULT_TOP_K))),
+        )
+        if info is None:
+            return {"error": f"不是有效的项目: {project_path}"}
+        return {
+            "path": info.path,
+            "size": info.size.to_dict(),
+            "breakdown": info.breakdown.to_dict(),
+            "coverage": info.coverage.to_dict(),
+        }
+    
+    async def _get_live_model(self, project_path: str) -> Optional[LiveProjectModel]:
+        """
+        Get the live model for a project, starting a watcher on first use.
+        
+        The first load scans the project, so it runs on the detector's pool.
+        At most LIVE_MODEL_LIMIT projects are watched; loading another one
+        stops the watcher of the least recently used.
+        
+        Args:
+            project_path: Project path
+            
+        Returns:
+            Live model, or None when watch mode is off
+        """
+        if not self.watch:
+            return None
+        
+        key = str(Path(project_path).resolve())
+        model = self.live_models.get(key)
+        if model is not None:
+            self.live_models.move_to_end(key)
+            return model
+        
+        model, watcher = await self.project_detector.run_blocking(self._load_live_model, key)
+        # Another request may have loaded the same project meanwhile
+        if key in self.live_models:
+            await self.project_detector.run_blocking(watcher.stop)
+            self.live_models.move_to_end(key)
+            return self.live_models[key]
+        self.live_models[key] = model
+        self.watchers[key] = watcher
+        logger.info(f"Watching {key} ({watcher.mode})")
+        while len(self.live_models) > LIVE_MODEL_LIMIT:
+            evicted, _ = self.live_models.popitem(last=False)
+            # Stopping joins the watcher thread, so it runs off the event loop
+            await self.project_detector.run_blocking(self.watchers.pop(evicted).stop)
+            logger.info(f"Stopped watching {evicted}")
+        return model
+    
+    def _load_live_model(self, key: str) -> Tuple[LiveProjectModel, ProjectWatcher]:
+        """Scan a project into a live model and start watching it."""
+        model = LiveProjectModel(key, self.project_detector)
+        watcher = ProjectWatcher(model)
+        watcher.start()
+        return model, watcher
+    
+    async def _status_from_model(self, model: LiveProjectModel) -> Dict[str, Any]:
+        """Build a serena_status result from a live model."""
+        installation = await self.serena_manager.run_blocking(self.serena_manager.get_serena_installation)
+        
+        snapshot = model.snapshot()
+        status = SerenaStatus(
+            snapshot["path"],
+            snapshot["enabled"],
+            snapshot["enabled"],
+            installation,
+            snapshot["config"],
+            self.serena_manager.python_version,
+            self.serena_manager.is_python_compatible,
+        ).to_dict()
+        status["watch_mode"] = snapshot["watch_mode"]
         return status
     
+    def stop_watchers(self):
+        """Stop all project watchers."""
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.watchers.clear()
+        self.live_models.clear()
+    
     async def _handle_edit_config(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle edit config tool."""
         project_path = arguments.get("project_path")
         config_type = arguments.get("config_type", "project")
         
         if config_type == "project" and not project_path:
-            project_path = self.project_detector.detect_current_project()
+            project_path = await self.project_detector.adetect_current_project()
         
-        result = self.config_manager.edit_config(config_type, project_path)
+        result = await self.serena_manager.run_blocking(self.config_manager.edit_config, config_type, project_path)
         return result
     
     async def run(self, stdio: bool = True):
@@ -219,6 +470,11 @@ class SerenaCLIMCPServer:
             logger.warning("MCP not available, server cannot run")
             return
         
+        if self.watch:
+            active_project = await self.project_detector.adetect_current_project()
+            if active_project:
+                await self._get_live_model(active_project)
+        
         try:
             if stdio:
                 # For stdio mode, use stdio_server as context manager
@@ -241,6 +497,8 @@ class SerenaCLIMCPServer:
             else:
                 logger.error(f"Server run error: {e}")
                 raise
+        finally:
+            self.stop_watchers()
 
 
 async def main():
@@ -2,19 +2,189 @@
 Project detection and validation utilities.
 """
 
+import asyncio
 import logging
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+import yaml
+
+from .archive_listing import ArchiveError, ArchiveListing, ArchiveTree, is_archive, open_listing
+from .fingerprint import ProjectFingerprint, compute_fingerprint
+from .fs_probe import DEFAULT_PROBE_TIMEOUT, DEFAULT_SLOW_MOUNT_SECONDS, FilesystemProbe, ProbePool, ProbeTimeout
+from .ignore_rules import DEFAULT_EXCLUDES
+from .line_counter import DEFAULT_MAX_FILE_BYTES
+from .project_registry import ProjectRegistry
+from .project_scanner import STOPPED_CANCELLED, STOPPED_SLOW_MOUNT, SYMLINKS_FILES, ProjectScanner, ScanBudget, ScanResult
+from .results import ProjectInfo, SizeInfo
+from .scan_index import RACY_WINDOW_NS, SCAN_INDEX_FILE, ScanIndex
 
 logger = logging.getLogger(__name__)
 
 
+class _ProjectRootCache:
+    """
+    Process-wide map from a directory to its project root.
+    
+    Each entry remembers the directories whose listings decided the answer
+    together with their mtimes. Adding or removing an indicator changes the
+    mtime of its directory, so an entry is valid while those mtimes match.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Entries kept before the oldest ones are evicted
+        """
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, Any], Tuple[Optional[str], Tuple[Tuple[str, int], ...]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, indicator_key: Any) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a cached resolution.
+        
+        Args:
+            path: Absolute directory the search starts from
+            indicator_key: Indicator sets the answer was computed with
+            
+        Returns:
+            Tuple of (hit, project root or None)
+        """
+        key = (path, indicator_key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        
+        root, checked = entry
+        for directory, mtime_ns in checked:
+            try:
+                if os.stat(directory).st_mtime_ns == mtime_ns:
+                    continue
+            except OSError:
+                pass
+            with self._lock:
+                self._entries.pop(key, None)
+            return False, None
+        
+        return True, root
+
+    def put_chain(self, checked: List[Tuple[str, int]], indicator_key: Any, root: Optional[str]):
+        """
+        Cache the result of an upward search for every directory it visited.
+        
+        Args:
+            checked: (directory, mtime_ns) pairs from the start path upwards
+            indicator_key: Indicator sets the answer was computed with
+            root: Project root found, or None
+        """
+        # A directory changed within the racy window may change again
+        # without its mtime moving, so it cannot vouch for an entry
+        racy_after_ns = time.time_ns() - RACY_WINDOW_NS
+        
+        with self._lock:
+            for i in range(len(checked) - 1, -1, -1):
+                if checked[i][1] >= racy_after_ns:
+                    break
+                self._entries[(checked[i][0], indicator_key)] = (root, tuple(checked[i:]))
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+_root_cache = _ProjectRootCache()
+
+# Marker files of each project type, in the order types are preferred
+_PROJECT_TYPE_MARKERS = (
+    (("package.json",), "nodejs"),
+    (("pyproject.toml", "requirements.txt"), "python"),
+    (("Cargo.toml",), "rust"),
+    (("go.mod",), "go"),
+    (("pom.xml",), "java-maven"),
+    (("build.gradle",), "java-gradle"),
+    (("composer.json",), "php"),
+    (("Gemfile",), "ruby"),
+    (("Makefile",), "c-cpp"),
+    (("CMakeLists.txt",), "cmake"),
+)
+
+# Directory names never searched for nested projects
+_DISCOVERY_SKIP_DIRS = frozenset(pattern.rstrip("/") for pattern in DEFAULT_EXCLUDES)
+
+# Times discovery replaces a pool whose workers are all stuck on hung listings;
+# each replacement may leave that many threads blocked until the listings return
+_DISCOVERY_POOL_RESTARTS = 2
+
+
 class ProjectDetector:
     """Detects and validates projects."""
 
-    def __init__(self):
-        """Initialize the project detector."""
+    def __init__(
+        self,
+        use_scan_index: bool = True,
+        use_git_index: bool = True,
+        include_untracked: bool = False,
+        count_lines: bool = False,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        jobs: int = 1,
+        follow_symlinks: str = SYMLINKS_FILES,
+        one_filesystem: bool = False,
+        probe_timeout: Optional[float] = DEFAULT_PROBE_TIMEOUT,
+        slow_mount_seconds: float = DEFAULT_SLOW_MOUNT_SECONDS,
+        async_workers: int = 4,
+        registry: Optional[ProjectRegistry] = None
+    ):
+        """
+        Initialize the project detector.
+        
+        Args:
+            use_scan_index: Persist scan results in .serena-cli/ and only
+                re-walk directories that changed since the last scan
+            use_git_index: Count files of git checkouts from .git/index
+            include_untracked: With the git index, also count untracked files
+                that are not ignored
+            count_lines: Count lines of code per language, skipping binary files
+            max_file_bytes: Files larger than this are not read for line counts
+            jobs: Worker processes used to scan a project; 0 uses one per CPU
+            follow_symlinks: Symlink policy for scans ("none", "files" or "all")
+            one_filesystem: Do not scan into directories on other filesystems
+            probe_timeout: Seconds a filesystem probe may block before it is
+                abandoned; scans on network mounts are abandoned after this
+                long without progress. None runs probes inline without a limit
+            slow_mount_seconds: Probe latency above which a network mount
+                gets an indicator-only scan
+            async_workers: Threads running the blocking work of the async API
+            registry: Project registry that receives the scan summary of
+                every registered project this detector inspects
+        """
+        self.scanner = ProjectScanner(
+            use_git_index=use_git_index,
+            include_untracked=include_untracked,
+            count_lines=count_lines,
+            max_file_bytes=max_file_bytes,
+            jobs=jobs,
+            follow_symlinks=follow_symlinks,
+            one_filesystem=one_filesystem
+        )
+        self.use_scan_index = use_scan_index
+        self.fs_probe = FilesystemProbe(probe_timeout, slow_mount_seconds) if probe_timeout is not None else None
+        # Bounded pool behind the async API, so blocking calls stay off the event loop
+        self.async_pool = ProbePool(async_workers, thread_name_prefix="serena-cli-async")
+        self.registry = registry
+        
         # Common project indicators
         self.project_indicators = [
             # Version control
@@ -47,7 +217,6 @@ class ProjectDetector:
             ".cursor",
             
             # Build tools
-            "Makefile",
             "Dockerfile",
             "docker-compose.yml",
             ".github",
@@ -66,6 +235,24 @@ class ProjectDetector:
             "main/",
             "source/",
         ]
+        
+        # Entries ending in "/" must be directories; the rest may be either
+        self._indicator_names, self._indicator_dirs = self._build_indicator_sets(self.project_indicators)
+
+    @staticmethod
+    def _build_indicator_sets(indicators: List[str]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """
+        Split indicators into name lookups for a single directory listing.
+        
+        Args:
+            indicators: Indicator entries, directories marked with a trailing "/"
+            
+        Returns:
+            Tuple of (names matching any entry type, names matching directories only)
+        """
+        names = frozenset(i for i in indicators if not i.endswith("/"))
+        dirs = frozenset(i.rstrip("/") for i in indicators if i.endswith("/"))
+        return names, dirs
 
     def detect_current_project(self) -> Optional[str]:
         """
@@ -112,7 +299,7 @@ class ProjectDetector:
             project_path = Path(project_path).resolve()
             
             # Check if path exists and is a directory
-            if not project_path.exists() or not project_path.is_dir():
+            if not self._probe(project_path, project_path.is_dir):
                 return False
             
             # Check if it's a project by looking for indicators
@@ -122,84 +309,507 @@ class ProjectDetector:
             logger.error(f"Error validating project {project_path}: {e}")
             return False
 
-    def get_project_info(self, project_path: str) -> Optional[dict]:
-        """Get comprehensive project information."""
+    def detect_project_type(self, project_path: str) -> str:
+        """
+        Detect the type of a project from its build manifests.
+        
+        Args:
+            project_path: Project root
+            
+        Returns:
+            Project type string, "generic" if no manifest was found
+        """
+        project_path = Path(project_path).resolve()
+        try:
+            return self._probe(project_path, self._detect_project_type, project_path)
+        except ProbeTimeout:
+            return "unknown"
+
+    def get_project_info(
+        self,
+        project_path: str,
+        max_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+        top_k: int = 0,
+        budget: Optional[ScanBudget] = None
+    ) -> Optional[ProjectInfo]:
+        """
+        Get comprehensive project information.
+        
+        Args:
+            project_path: Project path
+            max_seconds: Stop scanning the tree after this many seconds
+            max_files: Stop scanning the tree after this many files
+            progress: Called as progress(files, size_bytes, elapsed_seconds)
+                while the tree is scanned
+            top_k: Also report the top_k largest directories and files and a
+                file-size histogram as ``breakdown``
+            budget: Budget shared with earlier work such as fingerprint();
+                replaces max_seconds, max_files and progress
+            
+        Returns:
+            Project information, or None if the path is not a project; when a
+            budget ran out, size and languages cover only part of the tree and
+            ``coverage.complete`` is False. On a slow network mount only the
+            indicators are checked and ``coverage.degraded`` is True.
+            ``types`` lists every project type marked by a build manifest at
+            the root, ``subprojects`` the tree of nested manifest directories.
+            Archives (zip, wheel, tar, sdist) are read without extracting
+            them, see get_archive_info
+        """
+        if budget is None and (max_seconds is not None or max_files is not None or progress is not None):
+            budget = ScanBudget(max_seconds, max_files, progress)
+        return self._get_project_info(project_path, budget, top_k)
+
+    def _get_project_info(self, project_path: str, budget: Optional[ScanBudget], top_k: int) -> Optional[ProjectInfo]:
+        """Collect project information, scanning the tree within a budget."""
         try:
             project_path = Path(project_path).resolve()
             
+            if is_archive(project_path) and project_path.is_file():
+                return self._get_archive_info(open_listing(project_path), budget, top_k)
+            
             if not self.validate_project(project_path):
                 return None
             
-            # Get project name
-            project_name = project_path.name
-            
             # Detect project type
-            project_type = self._detect_project_type(project_path)
+            project_type = self._probe(project_path, self._detect_project_type, project_path)
             
-            # Get programming languages
-            languages = self._detect_languages(project_path)
+            # Walk the tree once for both languages and size, unless the
+            # mount is too slow for anything but the indicator checks
+            if self.fs_probe is not None and self.fs_probe.is_slow(str(project_path)):
+                scan = self._degraded_scan(top_k)
+            else:
+                scan = self._probe_scan(project_path, budget, top_k)
             
-            # Calculate project size
-            size_info = self._get_project_size(project_path)
+            # Map nested packages from the manifests the scan passed
+            subprojects = scan.subprojects()
             
             # Check Serena configuration
-            has_serena = self._has_serena_config(project_path)
-            
-            # Check if project is enabled
-            enabled = has_serena
-            
-            # Get config path if exists
-            config_path = None
-            if has_serena:
-                config_path = str(project_path / ".serena-cli" / "project.yml")
-            
-            return {
-                "name": project_name,
-                "path": str(project_path),
-                "type": project_type,
-                "languages": languages,
-                "size": size_info,
-                "has_serena": has_serena,
-                "enabled": enabled,
-                "config": config_path
-            }
+            has_serena = self._probe(project_path, self._has_serena_config, project_path)
+            
+            info = ProjectInfo(
+                str(project_path),
+                project_type,
+                subprojects.types,
+                scan.language_stats(),
+                self._get_project_size(project_path, scan),
+                has_serena,
+                scan.coverage(),
+                subprojects,
+                scan.breakdown,
+            )
+            
+            # Keep the registry's summary of enabled projects current; partial
+            # scans would understate the project, so only full ones are kept.
+            # Projects that are not registered are not added
+            if self.registry is not None and info.coverage.complete:
+                self.registry.record_scan(info)
+            
+            return info
             
         except Exception as e:
             logger.error(f"Error getting project info for {project_path}: {e}")
             return None
 
-    def list_projects_in_directory(self, directory: str) -> List[str]:
+    def get_archive_info(
+        self,
+        listing: ArchiveListing,
+        max_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+        top_k: int = 0
+    ) -> Optional[ProjectInfo]:
+        """
+        Get project information from an archive listing, without extracting it.
+        
+        Indicators, type, size and languages come from member names and
+        sizes alone; line counts are not available. A single top-level
+        directory, as in release tarballs and sdists, is taken as the
+        project root. get_project_info calls this for archive paths.
+        
+        Args:
+            listing: Archive listing, e.g. from open_listing() or a
+                MemoryListing
+            max_seconds: Stop reading the listing after this many seconds
+            max_files: Stop reading the listing after this many files
+            progress: Called as progress(files, size_bytes, elapsed_seconds)
+            top_k: Also report the top_k largest directories and files
+            
+        Returns:
+            Project information, or None if the archive cannot be read or
+            does not hold a project
+        """
+        budget = None
+        if max_seconds is not None or max_files is not None or progress is not None:
+            budget = ScanBudget(max_seconds, max_files, progress)
+        return self._get_archive_info(listing, budget, top_k)
+
+    def _get_archive_info(self, listing: ArchiveListing, budget: Optional[ScanBudget],
+                          top_k: int) -> Optional[ProjectInfo]:
+        """Collect project information from archive members."""
+        started = time.monotonic()
+        try:
+            tree = ArchiveTree.from_members(listing.members(), budget)
+        except ArchiveError as e:
+            logger.error(f"Error reading archive {listing.name}: {e}")
+            return None
+        
+        indicators = len(tree.root_names & self._indicator_names) + len(tree.root_dirs & self._indicator_dirs)
+        if indicators < 2:
+            return None
+        
+        # A listing cut short by the budget is counted as far as it was read
+        if tree.stopped_by is not None:
+            scan = self.scanner.scan_listing(tree.files, top_k=top_k)
+            scan.mark_partial(tree.stopped_by)
+        else:
+            scan = self.scanner.scan_listing(tree.files, budget=budget, top_k=top_k)
+        scan.elapsed_seconds = time.monotonic() - started
+        subprojects = scan.subprojects()
+        
+        return ProjectInfo(
+            listing.name,
+            self._project_type_from(tree.root_names.__contains__),
+            subprojects.types,
+            scan.language_stats(),
+            scan.size_info(),
+            any(path == ".serena/project.yml" for path, _ in tree.files),
+            scan.coverage(),
+            subprojects,
+            scan.breakdown,
+        )
+
+    def fingerprint(
+        self,
+        project_path: str,
+        previous: Optional[ProjectFingerprint] = None,
+        files: bool = True,
+        use_git: bool = False,
+        budget: Optional[ScanBudget] = None
+    ) -> Optional[ProjectFingerprint]:
+        """
+        Fingerprint a project tree without scanning it.
+        
+        Compare ``digest`` with an earlier fingerprint to learn whether the
+        project changed, and ``changed_dirs`` to learn where. What a scan
+        would skip (default excludes, configured ``excluded_paths`` and
+        ignore files) and the directories skipped by project discovery are
+        left out.
+        
+        Args:
+            project_path: Project path
+            previous: Earlier fingerprint of the project; unchanged
+                directories are reused from it instead of being listed again
+            files: Include file sizes and mtimes, so that in-place edits are
+                seen; otherwise only directories are stat'ed
+            use_git: On a git checkout, reuse previous while HEAD and the
+                index are unchanged (unstaged edits are then not seen)
+            budget: Scan budget the walk counts against; pass the same budget
+                to get_project_info to bound both together
+            
+        Returns:
+            Fingerprint, or None if the project is not a readable directory
+            (e.g. an archive), lives on a slow network mount or the budget
+            ran out
+        """
+        try:
+            project_path = Path(project_path).resolve()
+            if not project_path.is_dir():
+                return None
+            if self.fs_probe is not None and self.fs_probe.is_slow(str(project_path)):
+                return None
+            rules = self.scanner.build_rules(project_path, self._get_scan_excludes(project_path))
+            return compute_fingerprint(str(project_path), previous, files, use_git, _DISCOVERY_SKIP_DIRS,
+                                       rules, self.scanner.respect_ignore_files, budget)
+        except OSError as e:
+            logger.error(f"Error fingerprinting {project_path}: {e}")
+            return None
+
+    def list_projects_in_directory(
+        self,
+        directory: str,
+        max_depth: int = 3,
+        include_nested: bool = False,
+        max_workers: Optional[int] = None
+    ) -> List[str]:
         """
         List all projects in a directory.
         
         Args:
             directory: Directory to search
+            max_depth: How many levels below the directory to search
+            include_nested: Keep searching inside directories that are projects
+            max_workers: Number of concurrent directory probes
             
         Returns:
-            List of project paths
+            Sorted list of project paths
+        """
+        return sorted(self.iter_projects_in_directory(directory, max_depth, include_nested, max_workers))
+
+    def iter_projects_in_directory(
+        self,
+        directory: str,
+        max_depth: int = 3,
+        include_nested: bool = False,
+        max_workers: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Discover projects below a directory, yielding them as they are found.
+        
+        Directories are probed on a bounded thread pool, one listing per
+        directory. The search does not descend into a project unless
+        include_nested is set, and skips hidden and default-excluded
+        directories such as node_modules. Symlinked directories are
+        followed; a directory reached again through another link is
+        reported and searched once.
+        
+        Args:
+            directory: Directory to search
+            max_depth: How many levels below the directory to search
+            include_nested: Keep searching inside directories that are projects
+            max_workers: Number of concurrent directory probes
+            
+        Returns:
+            Iterator over project paths, in discovery order
         """
         try:
             directory = Path(directory).resolve()
-            projects = []
+            if not directory.is_dir():
+                return
+        except Exception as e:
+            logger.error(f"Error listing projects in {directory}: {e}")
+            return
+        
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+        
+        # Daemon workers, so a directory stuck on a hung mount cannot block exit
+        timeout = self.fs_probe.timeout if self.fs_probe is not None else None
+        executor = ProbePool(max_workers, thread_name_prefix="serena-cli-discover")
+        pending: Dict[Future, Tuple[Path, int]] = {}
+        # Monotonic time each probe started running; time spent queued does not count
+        started: Dict[Path, float] = {}
+        # Probes given up on that may still occupy a worker
+        hung: List[Future] = []
+        restarts = 0
+        # (st_dev, st_ino) of the directories probed, so symlink loops end
+        visited: Set[Tuple[int, int]] = set()
+        try:
+            _, children, key = self._probe(directory, self._probe_directory, directory)
+            if key is not None:
+                visited.add(key)
+            if max_depth >= 1:
+                for child in children:
+                    pending[executor.submit(self._timed_probe, started, child)] = (child, 1)
             
-            if not directory.exists() or not directory.is_dir():
-                return projects
+            while pending:
+                done, _ = wait(pending, timeout=self._next_probe_deadline(pending, started, timeout),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    self._drop_hung_probes(pending, started, hung, timeout)
+                    if sum(not future.done() for future in hung) < max_workers:
+                        continue
+                    # Every worker is stuck on a hung listing: queued directories
+                    # move to fresh workers, a bounded number of times
+                    executor.shutdown()
+                    hung.clear()
+                    restart = restarts < _DISCOVERY_POOL_RESTARTS
+                    restarts += 1
+                    if restart:
+                        executor = ProbePool(max_workers, thread_name_prefix="serena-cli-discover")
+                    for future, (path, depth) in list(pending.items()):
+                        if not future.cancel():
+                            continue
+                        del pending[future]
+                        if restart:
+                            pending[executor.submit(self._timed_probe, started, path)] = (path, depth)
+                        else:
+                            logger.warning(f"Skipping {path}: every discovery worker is stuck on a hung listing")
+                    continue
+                for future in done:
+                    path, depth = pending.pop(future)
+                    started.pop(path, None)
+                    is_project, children, key = future.result()
+                    if key is None or key in visited:
+                        # Unreadable, or already reached through another link
+                        continue
+                    visited.add(key)
+                    if is_project:
+                        yield str(path)
+                        if not include_nested:
+                            continue
+                    if depth < max_depth:
+                        for child in children:
+                            pending[executor.submit(self._timed_probe, started, child)] = (child, depth + 1)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking call on the detector's async pool.
+        
+        Cancelling the awaiting task cancels the call if it has not started;
+        a call that is already running finishes in the background.
+        
+        Args:
+            fn: Blocking callable
             
-            # Look for immediate subdirectories that are projects
-            for item in directory.iterdir():
-                if item.is_dir() and self.validate_project(item):
-                    projects.append(str(item))
+        Returns:
+            The call's result
+        """
+        return await asyncio.wrap_future(self.async_pool.submit(fn, *args))
+
+    async def adetect_current_project(self) -> Optional[str]:
+        """Async version of detect_current_project."""
+        return await self.run_blocking(self.detect_current_project)
+
+    async def adetect_project(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Detect the project containing a path without blocking the event loop.
+        
+        Args:
+            path: Path to check, None for the current working directory
             
-            return projects
+        Returns:
+            Project path if detected, None otherwise
+        """
+        if path is None:
+            return await self.adetect_current_project()
+        return await self.run_blocking(self.detect_project_from_path, path)
+
+    async def avalidate_project(self, project_path: str) -> bool:
+        """Async version of validate_project."""
+        return await self.run_blocking(self.validate_project, project_path)
+
+    async def aget_project_info(
+        self,
+        project_path: str,
+        max_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+        top_k: int = 0,
+        budget: Optional[ScanBudget] = None
+    ) -> Optional[ProjectInfo]:
+        """
+        Async version of get_project_info.
+        
+        When the awaiting task is cancelled, a scan that is already running
+        stops at its next budget check instead of running to completion.
+        The progress callback is called from a worker thread.
+        
+        Returns:
+            Project information, or None if the path is not a project
+        """
+        if budget is None:
+            budget = ScanBudget(max_seconds, max_files, progress)
+        try:
+            return await self.run_blocking(self._get_project_info, project_path, budget, top_k)
+        except asyncio.CancelledError:
+            budget.stop(STOPPED_CANCELLED)
+            raise
+
+    async def afingerprint(
+        self,
+        project_path: str,
+        previous: Optional[ProjectFingerprint] = None,
+        files: bool = True,
+        use_git: bool = False,
+        budget: Optional[ScanBudget] = None
+    ) -> Optional[ProjectFingerprint]:
+        """Async version of fingerprint."""
+        return await self.run_blocking(self.fingerprint, project_path, previous, files, use_git, budget)
+
+    async def alist_projects_in_directory(
+        self,
+        directory: str,
+        max_depth: int = 3,
+        include_nested: bool = False,
+        max_workers: Optional[int] = None
+    ) -> List[str]:
+        """Async version of list_projects_in_directory."""
+        return await self.run_blocking(
+            self.list_projects_in_directory, directory, max_depth, include_nested, max_workers
+        )
+
+    def _timed_probe(self, started: Dict[Path, float],
+                     path: Path) -> Tuple[bool, List[Path], Optional[Tuple[int, int]]]:
+        """Record when a discovery probe starts running, then probe the directory."""
+        started[path] = time.monotonic()
+        return self._probe_directory(path)
+
+    @staticmethod
+    def _next_probe_deadline(pending: Dict[Future, Tuple[Path, int]], started: Dict[Path, float],
+                             timeout: Optional[float]) -> Optional[float]:
+        """Get the seconds until the earliest running probe times out, or timeout if none is running."""
+        if timeout is None:
+            return None
+        deadlines = [started[path] + timeout for path, _ in pending.values() if path in started]
+        if not deadlines:
+            return timeout
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    @staticmethod
+    def _drop_hung_probes(pending: Dict[Future, Tuple[Path, int]], started: Dict[Path, float],
+                          hung: List[Future], timeout: Optional[float]):
+        """Skip the directories whose own probe ran for longer than timeout; queued siblings keep waiting."""
+        now = time.monotonic()
+        for future, (path, _) in list(pending.items()):
+            if not future.done() and path in started and now - started[path] >= timeout:
+                del pending[future]
+                hung.append(future)
+                logger.warning(f"Skipping {path}: listing did not finish within {timeout}s")
+
+    def _probe_directory(self, path: Path) -> Tuple[bool, List[Path], Optional[Tuple[int, int]]]:
+        """
+        List a directory once to check for indicators and collect subdirectories.
+        
+        Args:
+            path: Directory to probe
             
-        except Exception as e:
-            logger.error(f"Error listing projects in {directory}: {e}")
-            return []
+        Returns:
+            Tuple of (is project, subdirectories worth searching, (st_dev,
+            st_ino) of the directory or None if it cannot be read)
+        """
+        indicator_count = 0
+        children = []
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.debug(f"Cannot probe {path}: {e}")
+            return False, children, None
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                        if name in self._indicator_dirs:
+                            indicator_count += is_dir
+                        elif name in self._indicator_names:
+                            indicator_count += 1
+                        
+                        if is_dir and not name.startswith(".") and name not in _DISCOVERY_SKIP_DIRS:
+                            children.append(Path(entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Cannot probe {path}: {e}")
+        
+        return indicator_count >= 2, children, (st.st_dev, st.st_ino)
 
     def _find_project_root(self, start_path: Path) -> Optional[str]:
         """
         Find the project root starting from a given path.
         
+        Results, including negative ones, are kept in a process-wide cache
+        that is validated against the mtimes of the directories that were
+        checked, so repeated lookups from the same directory skip the
+        listings entirely.
+        
         Args:
             start_path: Starting path for search
             
@@ -207,24 +817,66 @@ class ProjectDetector:
             Project root path if found, None otherwise
         """
         try:
-            current = start_path
-            
-            # Search upwards through parent directories
-            while current != current.parent:
-                if self._has_project_indicators(current):
-                    return str(current)
-                current = current.parent
-            
-            # Check the starting path itself
-            if self._has_project_indicators(start_path):
-                return str(start_path)
-            
-            return None
-            
+            return self._probe(start_path, self._search_project_root, start_path)
         except Exception as e:
             logger.error(f"Error finding project root from {start_path}: {e}")
             return None
 
+    def _search_project_root(self, start_path: Path) -> Optional[str]:
+        """Search upwards for the project root, without a timeout."""
+        indicator_key = (self._indicator_names, self._indicator_dirs)
+        found, root = _root_cache.get(str(start_path), indicator_key)
+        if found:
+            return root
+        
+        current = start_path
+        checked: List[Tuple[str, int]] = []
+        root = None
+        
+        # Search upwards through parent directories; the mtime is taken
+        # before listing so a concurrent change invalidates the entry
+        while current != current.parent:
+            checked.append((str(current), os.stat(current).st_mtime_ns))
+            if self._has_project_indicators(current):
+                root = str(current)
+                break
+            current = current.parent
+        else:
+            # Check the starting path itself
+            if not checked:
+                checked.append((str(start_path), os.stat(start_path).st_mtime_ns))
+            if self._has_project_indicators(start_path):
+                root = str(start_path)
+        
+        _root_cache.put_chain(checked, indicator_key, root)
+        return root
+
+    @staticmethod
+    def clear_root_cache():
+        """Drop all cached project root resolutions for this process."""
+        _root_cache.clear()
+
+    def _iter_project_indicators(self, path: Path) -> Iterator[str]:
+        """
+        Yield the indicators present in a path using one directory listing.
+        
+        Args:
+            path: Path to check
+            
+        Returns:
+            Iterator over found indicators, in listing order
+        """
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name in self._indicator_dirs:
+                    if entry.is_dir():
+                        yield name + "/"
+                elif name in self._indicator_names:
+                    # A dangling symlink is listed but does not exist
+                    if not entry.is_symlink() or os.path.exists(entry.path):
+                        yield name
+
     def _has_project_indicators(self, path: Path) -> bool:
         """
         Check if a path has project indicators.
@@ -236,23 +888,25 @@ class ProjectDetector:
             True if has indicators, False otherwise
         """
         try:
-            # Count how many indicators are present
-            indicator_count = 0
-            
-            for indicator in self.project_indicators:
-                indicator_path = path / indicator
-                if indicator_path.exists():
-                    indicator_count += 1
-                    # If we find enough indicators, consider it a project
-                    if indicator_count >= 2:
-                        return True
-            
-            return False
+            return self._probe(path, self._count_project_indicators, path) >= 2
             
         except Exception as e:
             logger.error(f"Error checking project indicators for {path}: {e}")
             return False
 
+    def _count_project_indicators(self, path: Path, limit: int = 2) -> int:
+        """Count the indicators in a path, stopping once limit are found."""
+        # Count how many indicators are present
+        indicator_count = 0
+        
+        for _ in self._iter_project_indicators(path):
+            indicator_count += 1
+            # If we find enough indicators, consider it a project
+            if indicator_count >= limit:
+                break
+        
+        return indicator_count
+
     def _get_project_indicators(self, path: Path) -> List[str]:
         """
         Get list of project indicators present in a path.
@@ -264,19 +918,86 @@ class ProjectDetector:
             List of found indicators
         """
         try:
-            found_indicators = []
-            
-            for indicator in self.project_indicators:
-                indicator_path = path / indicator
-                if indicator_path.exists():
-                    found_indicators.append(indicator)
-            
-            return found_indicators
+            found = set(self._probe(path, lambda: list(self._iter_project_indicators(path))))
+            return [indicator for indicator in self.project_indicators if indicator in found]
             
         except Exception as e:
             logger.error(f"Error getting project indicators for {path}: {e}")
             return []
 
+    def _probe(self, path: Path, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a filesystem call with the probe timeout.
+        
+        Args:
+            path: Path the call touches
+            fn: Filesystem call
+            
+        Returns:
+            The call's result
+            
+        Raises:
+            ProbeTimeout: If the call blocked for longer than probe_timeout
+        """
+        if self.fs_probe is None:
+            return fn(*args)
+        return self.fs_probe.call(str(path), fn, *args)
+
+    def _probe_scan(self, path: Path, budget: Optional[ScanBudget] = None, top_k: int = 0) -> ScanResult:
+        """
+        Scan a project, abandoning the scan if its network mount stops responding.
+        
+        On network mounts the scan runs on a probe worker and reports
+        progress as a heartbeat. When no heartbeat arrives for probe_timeout
+        seconds, the mount is marked slow, the scan is told to stop at its
+        next check and a degraded result is returned.
+        
+        Args:
+            path: Project path
+            budget: Limits after which a partial result is returned
+            top_k: Number of largest files and directories to report
+            
+        Returns:
+            Scan result
+        """
+        probe = self.fs_probe
+        if probe is None or not probe.on_network_mount(str(path)):
+            return self._scan_project(path, budget=budget, top_k=top_k)
+        
+        last_beat = [time.monotonic()]
+        user_progress = budget.progress if budget is not None else None
+        
+        def heartbeat(files: int, size_bytes: int, elapsed: float):
+            last_beat[0] = time.monotonic()
+            if user_progress is not None:
+                user_progress(files, size_bytes, elapsed)
+        
+        if budget is None:
+            budget = ScanBudget()
+        budget.progress = heartbeat
+        future = probe.pool.submit(self._scan_project, path, None, budget, top_k)
+        while True:
+            remaining = last_beat[0] + probe.timeout - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return future.result(remaining)
+            except FutureTimeoutError:
+                continue
+        
+        budget.stop(STOPPED_SLOW_MOUNT)
+        mount = probe.mount_for(str(path))
+        if mount is not None:
+            probe.mark_slow(mount)
+        logger.warning(f"Scan of {path} stalled for {probe.timeout}s, returning indicator-only results")
+        return self._degraded_scan(top_k)
+
+    def _degraded_scan(self, top_k: int = 0) -> ScanResult:
+        """Get the empty, partial result reported instead of scanning a slow mount."""
+        scan = ScanResult(lines_counted=self.scanner.count_lines, top_k=top_k)
+        scan.mark_partial(STOPPED_SLOW_MOUNT)
+        return scan
+
     def _detect_project_type(self, path: Path) -> str:
         """
         Detect the type of project.
@@ -288,109 +1009,141 @@ class ProjectDetector:
             Project type string
         """
         try:
-            # Check for specific project types
-            if (path / "package.json").exists():
-                return "nodejs"
-            elif (path / "pyproject.toml").exists() or (path / "requirements.txt").exists():
-                return "python"
-            elif (path / "Cargo.toml").exists():
-                return "rust"
-            elif (path / "go.mod").exists():
-                return "go"
-            elif (path / "pom.xml").exists():
-                return "java-maven"
-            elif (path / "build.gradle").exists():
-                return "java-gradle"
-            elif (path / "composer.json").exists():
-                return "php"
-            elif (path / "Gemfile").exists():
-                return "ruby"
-            elif (path / "Makefile").exists():
-                return "c-cpp"
-            elif (path / "CMakeLists.txt").exists():
-                return "cmake"
-            else:
-                return "generic"
+            return self._project_type_from(lambda name: (path / name).exists())
                 
         except Exception as e:
             logger.error(f"Error detecting project type for {path}: {e}")
             return "unknown"
 
-    def _get_project_size(self, path: Path) -> Dict[str, Any]:
+    @staticmethod
+    def _project_type_from(exists: Callable[[str], bool]) -> str:
         """
-        Get project size information.
+        Pick the project type from the marker files present at a project root.
+        
+        Args:
+            exists: Tells whether a file name exists at the root
+            
+        Returns:
+            Type of the first marker found, "generic" if there is none
+        """
+        for names, project_type in _PROJECT_TYPE_MARKERS:
+            if any(exists(name) for name in names):
+                return project_type
+        return "generic"
+
+    def _scan_project(self, path: Path, changed_dirs: Optional[Iterable[str]] = None,
+                      budget: Optional[ScanBudget] = None, top_k: int = 0,
+                      use_git_index: bool = True) -> ScanResult:
+        """
+        Walk the project tree once and collect all counters.
         
         Args:
             path: Project path
+            changed_dirs: Directories, relative to the project, known to have
+                changed without their mtime moving (e.g. in-place edits)
+            budget: Limits after which a partial result is returned
+            top_k: Number of largest files and directories to report
+            use_git_index: Allow reading git checkouts from .git/index; False
+                walks the worktree, so unstaged edits are counted
             
         Returns:
-            Dictionary with size information
+            Scan result shared by the size and language views
+        """
+        excludes = self._get_scan_excludes(path)
+        # A breakdown needs every file's size, which index records do not keep
+        if (not self.use_scan_index or top_k > 0
+                or (use_git_index and self.scanner.git_index_path(path) is not None)):
+            return self.scanner.scan(path, excludes=excludes, budget=budget, top_k=top_k,
+                                     use_git_index=use_git_index)
+        
+        index_path = path / ".serena-cli" / SCAN_INDEX_FILE
+        index = ScanIndex.load(index_path)
+        for rel_dir in changed_dirs or ():
+            index.invalidate(rel_dir)
+        result = self.scanner.scan(path, excludes=excludes, index=index, budget=budget, use_git_index=False)
+        if index.dirty:
+            self._save_scan_index(index, index_path)
+        return result
+
+    def _save_scan_index(self, index: ScanIndex, index_path: Path):
+        """
+        Persist a scan index, creating .serena-cli/ if needed.
+        
+        Args:
+            index: Index updated by the last scan
+            index_path: Index file path inside .serena-cli/
         """
         try:
-            total_files = 0
-            total_size = 0
+            index_dir = index_path.parent
+            if not index_dir.exists():
+                index_dir.mkdir()
+                # Keep the cache out of version control
+                (index_dir / ".gitignore").write_text(f"{SCAN_INDEX_FILE}\n", encoding="utf-8")
+            index.save(index_path)
+        except OSError as e:
+            logger.debug(f"Cannot persist scan index for {index_path.parent.parent}: {e}")
+
+    def _get_scan_excludes(self, path: Path) -> List[str]:
+        """
+        Get the exclude patterns configured for a project.
+        
+        Args:
+            path: Project path
             
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    total_files += 1
-                    try:
-                        total_size += file_path.stat().st_size
-                    except OSError:
-                        pass
+        Returns:
+            Gitignore-style patterns from ``excluded_paths`` in
+            .serena-cli/project.yml, empty if none are configured
+        """
+        config_file = path / ".serena-cli" / "project.yml"
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.warning(f"Cannot read scan excludes from {config_file}: {e}")
+            return []
+        
+        excludes = config.get("excluded_paths") if isinstance(config, dict) else None
+        if not isinstance(excludes, list):
+            return []
+        return [str(pattern) for pattern in excludes]
+
+    def _get_project_size(self, path: Path, scan: Optional[ScanResult] = None) -> SizeInfo:
+        """
+        Get project size information.
+        
+        Args:
+            path: Project path
+            scan: Existing scan result to reuse instead of walking again
             
-            return {
-                "total_files": total_files,
-                "total_size_bytes": total_size,
-                "total_size_mb": round(total_size / (1024 * 1024), 2)
-            }
+        Returns:
+            File count and byte total
+        """
+        try:
+            if scan is None:
+                scan = self._scan_project(path)
+            return scan.size_info()
             
         except Exception as e:
             logger.error(f"Error getting project size for {path}: {e}")
-            return {"total_files": 0, "total_size_bytes": 0, "total_size_mb": 0}
+            return SizeInfo()
 
-    def _detect_languages(self, path: Path) -> List[str]:
+    def _detect_languages(self, path: Path, scan: Optional[ScanResult] = None) -> List[str]:
         """
         Detect programming languages used in the project.
         
         Args:
             path: Project path
+            scan: Existing scan result to reuse instead of walking again
             
         Returns:
             List of detected languages
         """
         try:
-            language_extensions = {
-                ".py": "Python",
-                ".js": "JavaScript",
-                ".ts": "TypeScript",
-                ".java": "Java",
-                ".cpp": "C++",
-                ".c": "C",
-                ".rs": "Rust",
-                ".go": "Go",
-                ".php": "PHP",
-                ".rb": "Ruby",
-                ".cs": "C#",
-                ".swift": "Swift",
-                ".kt": "Kotlin",
-                ".scala": "Scala",
-                ".clj": "Clojure",
-                ".hs": "Haskell",
-                ".ml": "OCaml",
-                ".fs": "F#",
-                ".dart": "Dart",
-                ".lua": "Lua"
-            }
-            
-            detected_languages = set()
-            
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    suffix = file_path.suffix.lower()
-                    if suffix in language_extensions:
-                        detected_languages.add(language_extensions[suffix])
-            
-            return sorted(list(detected_languages))
+            if scan is None:
+                scan = self._scan_project(path)
+            return scan.languages()
             
         except Exception as e:
             logger.error(f"Error detecting languages for {path}: {e}")
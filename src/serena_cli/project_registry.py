@@ -0,0 +1,208 @@
+"""
+Global registry of the projects Serena was enabled in.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from .results import ProjectInfo, RegisteredProject
+
+logger = logging.getLogger(__name__)
+
+
+# Registry file name inside the global ~/.serena-cli directory
+REGISTRY_FILE = "projects.db"
+
+# Bump whenever the table layout changes; PRAGMA user_version holds it
+REGISTRY_SCHEMA_VERSION = 1
+
+# Seconds a writer waits for another process holding the database lock
+REGISTRY_BUSY_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT,
+    context TEXT,
+    config_mtime_ns INTEGER,
+    registered_at REAL NOT NULL,
+    scanned_at REAL,
+    total_files INTEGER,
+    total_size_bytes INTEGER,
+    languages TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_context ON projects (context);
+CREATE INDEX IF NOT EXISTS projects_type ON projects (type);
+"""
+
+_COLUMNS = ("path, name, type, context, config_mtime_ns, registered_at, scanned_at, "
+            "total_files, total_size_bytes, languages")
+
+
+def _config_mtime_ns(project_path: str) -> Optional[int]:
+    """Get the modification time of a project's serena-cli configuration."""
+    try:
+        return os.stat(os.path.join(project_path, ".serena-cli", "project.yml")).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ProjectRegistry:
+    """
+    SQLite database of enabled projects, shared by CLI and MCP processes.
+
+    The database runs in WAL mode, so readers never wait for a writer and
+    concurrent processes can register projects while others query them.
+    Registry failures are logged and never fail the operation that
+    triggered them.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialize the registry; the database is created on first use.
+
+        Args:
+            path: Database file, ~/.serena-cli/projects.db by default
+        """
+        self.path = Path(path) if path is not None else Path.home() / ".serena-cli" / REGISTRY_FILE
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the schema on first use."""
+        conn = sqlite3.connect(str(self.path), timeout=REGISTRY_BUSY_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                if conn.execute("PRAGMA user_version").fetchone()[0] != REGISTRY_SCHEMA_VERSION:
+                    conn.executescript(_SCHEMA)
+                    conn.execute(f"PRAGMA user_version={REGISTRY_SCHEMA_VERSION}")
+                self._ready = True
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[List[tuple]]:
+        """
+        Run one statement.
+
+        Returns:
+            Result rows, or None if the database could not be used
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Project registry {self.path} unavailable: {e}")
+            return None
+
+    def register(self, project_path: Union[str, Path], context: Optional[str] = None,
+                 project_type: Optional[str] = None) -> bool:
+        """
+        Record a project Serena was enabled in.
+
+        Args:
+            project_path: Project root
+            context: Serena context; None keeps the recorded one
+            project_type: Project type; None keeps the recorded one
+
+        Returns:
+            True if the project was recorded, False otherwise
+        """
+        path = os.path.abspath(project_path)
+        rows = self._execute(
+            f"INSERT INTO projects ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL) "
+            "ON CONFLICT (path) DO UPDATE SET "
+            "type = COALESCE(excluded.type, type), "
+            "context = COALESCE(excluded.context, context), "
+            "config_mtime_ns = excluded.config_mtime_ns",
+            (path, os.path.basename(path) or path, project_type, context, _config_mtime_ns(path), time.time()),
+        )
+        return rows is not None
+
+    def record_scan(self, info: ProjectInfo) -> bool:
+        """
+        Store the summary of a scan of a registered project.
+
+        Projects that are not registered are left alone.
+
+        Args:
+            info: Result of ProjectDetector.get_project_info
+
+        Returns:
+            True if the registry could be updated, False otherwise
+        """
+        rows = self._execute(
+            "UPDATE projects SET type = ?, config_mtime_ns = ?, scanned_at = ?, total_files = ?, "
+            "total_size_bytes = ?, languages = ? WHERE path = ?",
+            (info.type, _config_mtime_ns(info.path), time.time(), info.size.total_files,
+             info.size.total_size_bytes, json.dumps(info.languages), info.path),
+        )
+        return rows is not None
+
+    def unregister(self, project_path: Union[str, Path]) -> bool:
+        """
+        Forget a project.
+
+        Returns:
+            True if the registry could be updated, False otherwise
+        """
+        return self._execute("DELETE FROM projects WHERE path = ?", (os.path.abspath(project_path),)) is not None
+
+    def get(self, project_path: Union[str, Path]) -> Optional[RegisteredProject]:
+        """
+        Look up one project.
+
+        Returns:
+            The recorded project, or None if it is not registered
+        """
+        rows = self._execute(f"SELECT {_COLUMNS} FROM projects WHERE path = ?", (os.path.abspath(project_path),))
+        return RegisteredProject.from_row(rows[0]) if rows else None
+
+    def list_projects(self, context: Optional[str] = None, project_type: Optional[str] = None) -> List[RegisteredProject]:
+        """
+        List registered projects, using the indexes for the filters.
+
+        Args:
+            context: Only projects with this Serena context
+            project_type: Only projects of this type
+
+        Returns:
+            Projects ordered by path
+        """
+        where = []
+        params: List[Any] = []
+        if context is not None:
+            where.append("context = ?")
+            params.append(context)
+        if project_type is not None:
+            where.append("type = ?")
+            params.append(project_type)
+        sql = f"SELECT {_COLUMNS} FROM projects"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._execute(sql + " ORDER BY path", tuple(params))
+        return [RegisteredProject.from_row(row) for row in rows or ()]
+
+    def prune(self) -> List[str]:
+        """
+        Drop projects whose serena-cli configuration no longer exists.
+
+        Returns:
+            Paths of the dropped projects
+        """
+        stale = [project.path for project in self.list_projects() if _config_mtime_ns(project.path) is None]
+        for path in stale:
+            self._execute("DELETE FROM projects WHERE path = ?", (path,))
+        return stale
@@ -0,0 +1,1373 @@
+"""
+Single-pass project tree scanning.
+"""
+
+import heapq
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .git_index import GitIndexError, find_git_index, iter_git_index
+from .ignore_rules import DEFAULT_EXCLUDES, IGNORE_FILE_NAMES, IgnoreRules, read_ignore_file
+from .line_counter import DEFAULT_MAX_FILE_BYTES, FileContent, LineCounter
+from .results import LanguageStats, ScanCoverage, SizeInfo, SubProject
+from .scan_index import RACY_WINDOW_NS, DirRecord, ScanIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 0.1
+
+# Git index entries processed between budget checks
+BUDGET_CHECK_FILES = 256
+
+# Symlink policies: ignore symlinks, count symlinked files, or also
+# descend into symlinked directories
+SYMLINKS_NONE = "none"
+SYMLINKS_FILES = "files"
+SYMLINKS_ALL = "all"
+SYMLINK_POLICIES = (SYMLINKS_NONE, SYMLINKS_FILES, SYMLINKS_ALL)
+
+# Largest files and directories kept by a size breakdown by default
+DEFAULT_TOP_K = 10
+
+# Buckets of the file-size histogram; bucket b holds sizes of bit length b,
+# i.e. [2**(b-1), 2**b), with the last one open-ended
+SIZE_HISTOGRAM_BUCKETS = 48
+
+# Reason recorded when a scan is cut short because its filesystem is too slow
+STOPPED_SLOW_MOUNT = "slow_mount"
+
+# Reason recorded when the caller cancelled the scan
+STOPPED_CANCELLED = "cancelled"
+
+# File extension to language mapping used for language detection
+LANGUAGE_EXTENSIONS = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".ts": "TypeScript",
+    ".java": "Java",
+    ".cpp": "C++",
+    ".c": "C",
+    ".rs": "Rust",
+    ".go": "Go",
+    ".php": "PHP",
+    ".rb": "Ruby",
+    ".cs": "C#",
+    ".swift": "Swift",
+    ".kt": "Kotlin",
+    ".scala": "Scala",
+    ".clj": "Clojure",
+    ".hs": "Haskell",
+    ".ml": "OCaml",
+    ".fs": "F#",
+    ".dart": "Dart",
+    ".lua": "Lua",
+}
+
+# Build manifest file name to the project type it marks, in the order
+# ProjectDetector prefers types when a directory has several
+MANIFEST_TYPES = {
+    "package.json": "nodejs",
+    "pyproject.toml": "python",
+    "setup.py": "python",
+    "requirements.txt": "python",
+    "Cargo.toml": "rust",
+    "go.mod": "go",
+    "pom.xml": "java-maven",
+    "build.gradle": "java-gradle",
+    "build.gradle.kts": "java-gradle",
+    "composer.json": "php",
+    "Gemfile": "ruby",
+    "CMakeLists.txt": "cmake",
+}
+
+_TYPE_ORDER = {project_type: i for i, project_type in enumerate(dict.fromkeys(MANIFEST_TYPES.values()))}
+
+
+def language_for_name(name: str) -> Optional[str]:
+    """
+    Map a file name to a language using its extension.
+
+    Args:
+        name: File name (not a full path)
+
+    Returns:
+        Language name if the extension is known, None otherwise
+    """
+    dot = name.rfind(".")
+    # A leading dot marks a hidden file, not an extension (matches Path.suffix)
+    if dot <= 0:
+        return None
+    return LANGUAGE_EXTENSIONS.get(name[dot:].lower())
+
+
+class SizeBreakdown:
+    """
+    Where the bytes of a scan are, in memory independent of the tree size.
+    
+    Keeps min-heaps of the K largest files and directories and a histogram
+    of file sizes in power-of-two buckets. Directory sizes cover the files
+    directly inside each directory, not its whole subtree.
+    """
+
+    __slots__ = ("k", "largest_files", "largest_dirs", "histogram", "_open_dirs")
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        """
+        Initialize an empty breakdown.
+        
+        Args:
+            k: Number of largest files and directories to keep
+        """
+        self.k = k
+        self.largest_files: List[Tuple[int, str]] = []
+        self.largest_dirs: List[Tuple[int, str]] = []
+        self.histogram = [0] * SIZE_HISTOGRAM_BUCKETS
+        # [rel_dir, bytes] of the directories containing the last sorted path
+        self._open_dirs: List[List[Any]] = []
+
+    def _push(self, heap: List[Tuple[int, str]], size: int, path: str):
+        """Offer an item to a bounded min-heap."""
+        if len(heap) < self.k:
+            heapq.heappush(heap, (size, path))
+        elif (size, path) > heap[0]:
+            heapq.heapreplace(heap, (size, path))
+
+    def add_file(self, rel_path: str, size: int):
+        """
+        Account for one file.
+        
+        Args:
+            rel_path: Path relative to the project root
+            size: File size in bytes
+        """
+        self.histogram[min(size.bit_length(), SIZE_HISTOGRAM_BUCKETS - 1)] += 1
+        self._push(self.largest_files, size, rel_path)
+
+    def add_dir(self, rel_dir: str, size: int):
+        """
+        Account for the files directly inside one directory.
+        
+        Args:
+            rel_dir: Directory relative to the project root, "" for the root
+            size: Bytes of the files directly inside it
+        """
+        if size:
+            self._push(self.largest_dirs, size, rel_dir or ".")
+
+    def add_sorted_file(self, rel_path: str, size: int):
+        """
+        Account for a file of a listing sorted by path, such as a git index.
+        
+        The files of a directory are contiguous in such a listing, so only
+        the directories containing the current path are kept open.
+        """
+        self.add_file(rel_path, size)
+        slash = rel_path.rfind("/")
+        rel_dir = rel_path[:slash] if slash >= 0 else ""
+        open_dirs = self._open_dirs
+        while open_dirs and not (rel_dir == open_dirs[-1][0] or rel_dir.startswith(open_dirs[-1][0] + "/")
+                                 or open_dirs[-1][0] == ""):
+            self.add_dir(*open_dirs.pop())
+        if not open_dirs or open_dirs[-1][0] != rel_dir:
+            open_dirs.append([rel_dir, 0])
+        open_dirs[-1][1] += size
+
+    def finish_sorted(self):
+        """Account for the directories still open after a sorted listing."""
+        while self._open_dirs:
+            self.add_dir(*self._open_dirs.pop())
+
+    def merge(self, other: "SizeBreakdown"):
+        """Add the files, directories and histogram of another breakdown."""
+        for size, path in other.largest_files:
+            self._push(self.largest_files, size, path)
+        for size, path in other.largest_dirs:
+            self._push(self.largest_dirs, size, path)
+        for bucket, count in enumerate(other.histogram):
+            self.histogram[bucket] += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the breakdown in the format used by ProjectDetector.
+        
+        Returns:
+            Largest directories and files, biggest first, and the non-empty
+            histogram buckets as [min_bytes, max_bytes] ranges; the last
+            bucket has no upper bound
+        """
+        histogram = []
+        for bucket, count in enumerate(self.histogram):
+            if count:
+                histogram.append({
+                    "min_bytes": 1 << (bucket - 1) if bucket else 0,
+                    "max_bytes": (1 << bucket) - 1 if bucket < SIZE_HISTOGRAM_BUCKETS - 1 else None,
+                    "files": count,
+                })
+        return {
+            "largest_dirs": [
+                {"path": path, "size_bytes": size} for size, path in sorted(self.largest_dirs, reverse=True)
+            ],
+            "largest_files": [
+                {"path": path, "size_bytes": size} for size, path in sorted(self.largest_files, reverse=True)
+            ],
+            "size_histogram": histogram,
+        }
+
+
+class ScanResult:
+    """Aggregated counters collected by a project scan."""
+
+    def __init__(self, lines_counted: bool = False, top_k: int = 0):
+        """
+        Initialize empty counters.
+        
+        Args:
+            lines_counted: Whether file contents were analyzed for line counts
+            top_k: Keep a SizeBreakdown of the top_k largest files and
+                directories; 0 for none
+        """
+        self.total_files = 0
+        self.total_size_bytes = 0
+        self.binary_files = 0
+        self.lines_counted = lines_counted
+        # Language -> [files, bytes, lines]
+        self.language_counts: Dict[str, List[int]] = {}
+        # Coverage of a budgeted scan
+        self.complete = True
+        self.stopped_by: Optional[str] = None
+        self.dirs_scanned = 0
+        self.dirs_pending = 0
+        self.elapsed_seconds = 0.0
+        # (st_dev, st_ino) -> (path, name, size) of files that may be reached
+        # through more than one path; counted once when the scan ends
+        self.linked_files: Dict[Tuple[int, int], Tuple[str, str, int]] = {}
+        self.breakdown = SizeBreakdown(top_k) if top_k > 0 else None
+        # Relative paths of the build manifests found
+        self.manifests: List[str] = []
+
+    @property
+    def language_files(self) -> Dict[str, int]:
+        """Get the number of files per language."""
+        return {language: counts[0] for language, counts in self.language_counts.items()}
+
+    def add_file(self, name: str, size: int, content: Optional[FileContent] = None):
+        """
+        Account for one file.
+        
+        Args:
+            name: File name used for language detection
+            size: File size in bytes
+            content: Content analysis of the file, if it was read
+        """
+        self.total_files += 1
+        self.total_size_bytes += size
+
+        language = language_for_name(name)
+        lines = 0
+        if content is not None:
+            if content.binary:
+                self.binary_files += 1
+                return
+            if language is None:
+                language = content.shebang_language
+            lines = content.lines or 0
+
+        if language is not None:
+            counts = self.language_counts.get(language)
+            if counts is None:
+                counts = self.language_counts[language] = [0, 0, 0]
+            counts[0] += 1
+            counts[1] += size
+            counts[2] += lines
+
+    def add_counts(self, files: int, size_bytes: int, languages: Dict[str, List[int]], binary_files: int = 0):
+        """
+        Add pre-aggregated counters.
+        
+        Args:
+            files: Number of files
+            size_bytes: Total size of those files
+            languages: [files, bytes, lines] per language
+            binary_files: Number of files detected as binary
+        """
+        self.total_files += files
+        self.total_size_bytes += size_bytes
+        self.binary_files += binary_files
+        for language, (count, size, lines) in languages.items():
+            counts = self.language_counts.get(language)
+            if counts is None:
+                self.language_counts[language] = [count, size, lines]
+            else:
+                counts[0] += count
+                counts[1] += size
+                counts[2] += lines
+
+    def merge(self, other: "ScanResult"):
+        """Add the counters and coverage of another result to this one."""
+        self.add_counts(other.total_files, other.total_size_bytes, other.language_counts, other.binary_files)
+        self.dirs_scanned += other.dirs_scanned
+        for key, file in other.linked_files.items():
+            self.linked_files.setdefault(key, file)
+        self.manifests.extend(other.manifests)
+        if self.breakdown is not None and other.breakdown is not None:
+            self.breakdown.merge(other.breakdown)
+        if not other.complete:
+            self.mark_partial(other.stopped_by, other.dirs_pending)
+
+    def add_linked_file(self, key: Tuple[int, int], path: str, name: str, size: int):
+        """
+        Defer a hardlinked or symlinked file until all its paths are known.
+        
+        Args:
+            key: (st_dev, st_ino) of the file
+            path: Path the file was found at
+            name: File name used for language detection
+            size: File size in bytes
+        """
+        self.linked_files.setdefault(key, (path, name, size))
+
+    def mark_partial(self, stopped_by: Optional[str], dirs_pending: int = 0):
+        """
+        Flag the result as covering only part of the tree.
+        
+        Args:
+            stopped_by: What ended the scan ("time", "files", STOPPED_SLOW_MOUNT
+                or STOPPED_CANCELLED)
+            dirs_pending: Directories that were not visited
+        """
+        self.complete = False
+        self.stopped_by = self.stopped_by or stopped_by
+        self.dirs_pending += dirs_pending
+
+    def coverage(self) -> ScanCoverage:
+        """Get how much of the tree the scan covered."""
+        return ScanCoverage(
+            self.complete,
+            self.stopped_by,
+            self.total_files,
+            self.dirs_scanned,
+            self.dirs_pending,
+            self.elapsed_seconds,
+            self.stopped_by == STOPPED_SLOW_MOUNT,
+        )
+
+    def size_info(self) -> SizeInfo:
+        """Get the size summary used by ProjectDetector."""
+        return SizeInfo(self.total_files, self.total_size_bytes)
+
+    def languages(self) -> List[str]:
+        """Get the sorted list of detected languages."""
+        return sorted(self.language_counts)
+
+    def subprojects(self) -> SubProject:
+        """
+        Get the sub-project tree implied by the build manifests found.
+        
+        Every directory holding a manifest becomes a node under its nearest
+        ancestor node; the root is always a node.
+        
+        Returns:
+            Root node, with "." as its path; types are in ProjectDetector's
+            order of preference
+        """
+        by_dir: Dict[str, List[str]] = {"": []}
+        for path in self.manifests:
+            slash = path.rfind("/")
+            by_dir.setdefault(path[:slash] if slash >= 0 else "", []).append(path[slash + 1:])
+        
+        nodes: Dict[str, SubProject] = {}
+        for rel_dir in sorted(by_dir):
+            names = tuple(sorted(by_dir[rel_dir]))
+            node = SubProject(
+                rel_dir or ".",
+                tuple(sorted({MANIFEST_TYPES[name] for name in names}, key=_TYPE_ORDER.__getitem__)),
+                names,
+            )
+            nodes[rel_dir] = node
+            if rel_dir:
+                parent = rel_dir
+                while parent:
+                    slash = parent.rfind("/")
+                    parent = parent[:slash] if slash >= 0 else ""
+                    if parent in nodes:
+                        nodes[parent].children.append(node)
+                        break
+        return nodes[""]
+
+    def language_stats(self) -> LanguageStats:
+        """
+        Get per-language file counts, bytes and lines of code.
+        
+        Returns:
+            Stats with the largest languages first; lines are None unless
+            contents were analyzed
+        """
+        return LanguageStats.from_counts(self.language_counts, self.lines_counted)
+
+
+class ScanBudget:
+    """
+    Wall-clock and file-count limits for a scan, with progress reporting.
+    
+    A scan checks the budget between directories (and every few hundred
+    files on the git index path) and stops with a partial result once it
+    is exhausted.
+    """
+
+    def __init__(
+        self,
+        max_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+        progress_interval: float = PROGRESS_INTERVAL
+    ):
+        """
+        Initialize the budget; the clock starts now.
+        
+        Args:
+            max_seconds: Wall-clock limit, None for no limit
+            max_files: Number of files after which to stop, None for no limit
+            progress: Called as progress(files, size_bytes, elapsed_seconds)
+                at most every progress_interval seconds and once at the end
+            progress_interval: Minimum seconds between progress calls
+        """
+        self.max_seconds = max_seconds
+        self.max_files = max_files
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.started = time.monotonic()
+        self.deadline = self.started + max_seconds if max_seconds is not None else None
+        self.stopped_by: Optional[str] = None
+        self._next_report = self.started
+
+    def worker_copy(self, progress: Optional[Callable[[int, int, float], None]] = None) -> "ScanBudget":
+        """
+        Get a copy with the same deadline, for worker processes.
+        
+        Args:
+            progress: Picklable callback of the copy, e.g. one reporting to
+                the parent process; the original callback is not copied
+        """
+        budget = ScanBudget(max_files=self.max_files, progress=progress, progress_interval=self.progress_interval)
+        # CLOCK_MONOTONIC is shared by all processes on the host
+        budget.started = self.started
+        budget.deadline = self.deadline
+        return budget
+
+    def exhausted(self, files: int, size_bytes: int = 0, report: bool = True) -> bool:
+        """
+        Check the limits and report progress.
+        
+        Args:
+            files: Files counted so far
+            size_bytes: Bytes counted so far
+            report: Call the progress callback if it is due
+            
+        Returns:
+            True if the scan should stop
+        """
+        now = time.monotonic()
+        if self.stopped_by is None:
+            if self.max_files is not None and files >= self.max_files:
+                self.stopped_by = "files"
+            elif self.deadline is not None and now >= self.deadline:
+                self.stopped_by = "time"
+
+        if report and self.progress is not None and now >= self._next_report:
+            self._next_report = now + self.progress_interval
+            self.report(files, size_bytes)
+        return self.stopped_by is not None
+
+    def stop(self, reason: str):
+        """
+        End the scan at its next budget check.
+        
+        Args:
+            reason: Recorded as stopped_by unless the budget already ran out
+        """
+        if self.stopped_by is None:
+            self.stopped_by = reason
+
+    def report(self, files: int, size_bytes: int):
+        """Call the progress callback unconditionally."""
+        if self.progress is None:
+            return
+        try:
+            self.progress(files, size_bytes, time.monotonic() - self.started)
+        except Exception as e:
+            logger.debug(f"Progress callback failed: {e}")
+
+
+class ProjectScanner:
+    """Walks a project tree once and collects size and language counters."""
+
+    def __init__(
+        self,
+        use_default_excludes: bool = True,
+        respect_ignore_files: bool = True,
+        use_git_index: bool = True,
+        include_untracked: bool = False,
+        count_lines: bool = False,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        jobs: int = 1,
+        follow_symlinks: str = SYMLINKS_FILES,
+        one_filesystem: bool = False
+    ):
+        """
+        Initialize the scanner.
+        
+        Args:
+            use_default_excludes: Prune DEFAULT_EXCLUDES (VCS metadata,
+                dependency folders, virtualenvs, build output)
+            respect_ignore_files: Apply .gitignore/.ignore files found in the tree
+            use_git_index: Enumerate git checkouts from .git/index instead of
+                walking the working tree
+            include_untracked: With the git index, also walk the tree for
+                untracked files that are not ignored
+            count_lines: Read source files to count lines, skip binary files
+                and detect the language of extensionless scripts
+            max_file_bytes: Files larger than this are not read for line counts
+            jobs: Worker processes for large scans; the walk is sharded by
+                top-level directory. 0 uses one per CPU, 1 scans in-process
+            follow_symlinks: SYMLINKS_NONE, SYMLINKS_FILES or SYMLINKS_ALL;
+                links pointing back into the tree are never followed, since
+                their targets are counted at their real path
+            one_filesystem: Do not cross into directories on another device
+        
+        Raises:
+            ValueError: If follow_symlinks is not a known policy
+        """
+        if follow_symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {follow_symlinks}")
+
+        self.use_default_excludes = use_default_excludes
+        self.respect_ignore_files = respect_ignore_files
+        self.use_git_index = use_git_index
+        self.include_untracked = include_untracked
+        self.count_lines = count_lines
+        self.max_file_bytes = max_file_bytes
+        self.line_counter = LineCounter(max_file_bytes) if count_lines else None
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.follow_symlinks = follow_symlinks
+        self.one_filesystem = one_filesystem
+
+    def git_index_path(self, root: Union[str, Path]) -> Optional[Path]:
+        """
+        Get the git index a scan of root would read.
+        
+        Args:
+            root: Project root directory
+            
+        Returns:
+            Index file path, or None if scans of root walk the tree
+        """
+        if not self.use_git_index:
+            return None
+        return find_git_index(root)
+
+    def build_rules(self, root: Union[str, Path], excludes: Optional[Iterable[str]] = None) -> IgnoreRules:
+        """
+        Build the root-level exclude rules for a scan.
+        
+        Args:
+            root: Project root directory
+            excludes: Extra gitignore-style patterns relative to the root
+            
+        Returns:
+            Rule set applied from the root downwards
+        """
+        rules = IgnoreRules()
+        if self.use_default_excludes:
+            rules = rules.extend(DEFAULT_EXCLUDES)
+        if self.respect_ignore_files:
+            rules = rules.extend(read_ignore_file(os.path.join(os.fspath(root), ".git", "info", "exclude")))
+        if excludes:
+            rules = rules.extend(excludes)
+        return rules
+
+    def scan(self, root: Union[str, Path], excludes: Optional[Iterable[str]] = None,
+             index: Optional[ScanIndex] = None, budget: Optional[ScanBudget] = None,
+             top_k: int = 0, use_git_index: bool = True) -> ScanResult:
+        """
+        Scan a project tree.
+        
+        The walk uses ``os.scandir`` so that the file type and size come from
+        the cached ``DirEntry`` data instead of separate ``is_file()`` and
+        ``stat()`` calls per path. Excluded directories are pruned as a whole
+        rather than filtered file by file.
+        
+        With an index, a directory whose mtime and ignore files are unchanged
+        since the previous scan is not listed again; its cached counters are
+        reused and only its subdirectories are visited. Editing a file in place
+        does not change its directory's mtime, so size changes from such edits
+        are picked up once the directory itself changes.
+        
+        Files with several hard links and symlinked files are counted once
+        per (st_dev, st_ino), so the totals reflect disk usage rather than
+        the number of paths.
+        
+        Git checkouts are enumerated from .git/index instead when
+        use_git_index is set, falling back to the walk if the index cannot
+        be read.
+        
+        With top_k, the result also carries a SizeBreakdown. Index records
+        hold no per-file sizes, so such scans list every directory.
+        
+        Args:
+            root: Project root directory
+            excludes: Extra gitignore-style patterns relative to the root
+            index: Scan index to read previous records from and update
+            budget: Limits after which a partial result is returned
+            top_k: Number of largest files and directories to report
+            use_git_index: Read .git/index when the scanner is configured to;
+                False always walks the tree
+            
+        Returns:
+            Scan result with file count, byte total and language histogram;
+            ``complete`` is False if the budget ran out
+        """
+        started = time.monotonic()
+        rules = self.build_rules(root, excludes)
+        if top_k > 0:
+            index = None
+        
+        result = None
+        git_index = self.git_index_path(root) if use_git_index else None
+        if git_index is not None:
+            result = self._scan_git_index(root, git_index, rules, budget, top_k)
+        
+        if result is None:
+            result = ScanResult(lines_counted=self.count_lines, top_k=top_k)
+            self._walk(root, rules, result, index, budget=budget)
+        self._count_linked_files(result, os.fspath(root))
+        
+        result.elapsed_seconds = time.monotonic() - started
+        if budget is not None:
+            budget.report(result.total_files, result.total_size_bytes)
+        return result
+
+    def scan_listing(self, files: Iterable[Tuple[str, int]], excludes: Optional[Iterable[str]] = None,
+                     budget: Optional[ScanBudget] = None, top_k: int = 0) -> ScanResult:
+        """
+        Collect counters from a listing of files, such as an archive's members.
+        
+        Only names and sizes are used, so line counts are not available.
+        Default and extra exclude rules apply; ignore files inside the
+        listing are not read.
+        
+        Args:
+            files: (path, size) of each file, relative to the project root and
+                sorted by path
+            excludes: Extra gitignore-style patterns relative to the root
+            budget: Limits after which a partial result is returned
+            top_k: Number of largest files and directories to report
+            
+        Returns:
+            Scan result with file count, byte total and language histogram
+        """
+        started = time.monotonic()
+        rules = IgnoreRules()
+        if self.use_default_excludes:
+            rules = rules.extend(DEFAULT_EXCLUDES)
+        if excludes:
+            rules = rules.extend(excludes)
+        
+        result = ScanResult(top_k=top_k)
+        breakdown = result.breakdown
+        ignored_dirs: Dict[str, bool] = {"": False}
+        
+        def dir_ignored(rel_dir: str) -> bool:
+            ignored = ignored_dirs.get(rel_dir)
+            if ignored is None:
+                slash = rel_dir.rfind("/")
+                parent = rel_dir[:slash] if slash >= 0 else ""
+                ignored = dir_ignored(parent) or rules.is_ignored(rel_dir, rel_dir[slash + 1:], True)
+                ignored_dirs[rel_dir] = ignored
+            return ignored
+        
+        for path, size in files:
+            slash = path.rfind("/")
+            name = path[slash + 1:]
+            if dir_ignored(path[:slash] if slash >= 0 else "") or rules.is_ignored(path, name, False):
+                continue
+            collected = result.total_files
+            if (budget is not None and (not collected % BUDGET_CHECK_FILES or collected == budget.max_files)
+                    and budget.exhausted(collected, result.total_size_bytes)):
+                result.mark_partial(budget.stopped_by)
+                break
+            if breakdown is not None:
+                breakdown.add_sorted_file(path, size)
+            if name in MANIFEST_TYPES:
+                result.manifests.append(path)
+            result.add_file(name, size)
+        if breakdown is not None:
+            breakdown.finish_sorted()
+        
+        result.dirs_scanned = sum(not ignored for ignored in ignored_dirs.values())
+        result.elapsed_seconds = time.monotonic() - started
+        if budget is not None:
+            budget.report(result.total_files, result.total_size_bytes)
+        return result
+
+    def _scan_git_index(self, root: Union[str, Path], git_index: Path, rules: IgnoreRules,
+                        budget: Optional[ScanBudget] = None, top_k: int = 0) -> Optional[ScanResult]:
+        """
+        Collect counters from the tracked files listed in a git index.
+        
+        Root-level exclude rules apply to tracked paths; nested ignore files
+        do not, as git itself keeps tracked files regardless of them.
+        
+        Args:
+            root: Project root directory
+            git_index: Index file path
+            rules: Root-level exclude rules
+            budget: Limits after which a partial result is returned
+            top_k: Number of largest files and directories to report
+            
+        Returns:
+            Scan result, or None if the index cannot be used
+        """
+        result = ScanResult(lines_counted=self.count_lines, top_k=top_k)
+        breakdown = result.breakdown
+        root_path = os.fspath(root)
+        tracked = set() if self.include_untracked else None
+        ignored_dirs: Dict[str, bool] = {"": False}
+        
+        def dir_ignored(rel_dir: str) -> bool:
+            ignored = ignored_dirs.get(rel_dir)
+            if ignored is None:
+                slash = rel_dir.rfind("/")
+                parent = rel_dir[:slash] if slash >= 0 else ""
+                ignored = dir_ignored(parent) or rules.is_ignored(rel_dir, rel_dir[slash + 1:], True)
+                ignored_dirs[rel_dir] = ignored
+            return ignored
+        
+        # Content analysis of tracked files is sharded by top-level directory
+        shards: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        if self.jobs > 1 and self.line_counter is not None:
+            shards = {}
+        collected = collected_bytes = 0
+        
+        try:
+            for entry in iter_git_index(git_index):
+                path = entry.path
+                slash = path.rfind("/")
+                name = path[slash + 1:]
+                if dir_ignored(path[:slash] if slash >= 0 else "") or rules.is_ignored(path, name, False):
+                    continue
+                if (budget is not None and (not collected % BUDGET_CHECK_FILES or collected == budget.max_files)
+                        and budget.exhausted(collected, collected_bytes)):
+                    result.mark_partial(budget.stopped_by)
+                    break
+                collected += 1
+                collected_bytes += entry.size
+                if breakdown is not None:
+                    breakdown.add_sorted_file(path, entry.size)
+                if name in MANIFEST_TYPES:
+                    result.manifests.append(path)
+                if shards is not None:
+                    shards.setdefault(path.split("/", 1)[0], []).append((path, entry.size))
+                else:
+                    content = self._analyze(os.path.join(root_path, path), name, entry.size)
+                    result.add_file(name, entry.size, content)
+                if tracked is not None:
+                    tracked.add(path)
+        except GitIndexError as e:
+            logger.debug(f"Falling back to a tree walk for {root}: {e}")
+            return None
+        if breakdown is not None:
+            breakdown.finish_sorted()
+        
+        if shards:
+            self._analyze_sharded(root_path, list(shards.values()), result, budget)
+        
+        if tracked is not None and result.complete:
+            self._walk(root, rules, result, None, skip_paths=tracked, budget=budget)
+        
+        return result
+
+    def _walk(self, root: Union[str, Path], rules: IgnoreRules, result: ScanResult,
+              index: Optional[ScanIndex], skip_paths: Optional[Set[str]] = None,
+              budget: Optional[ScanBudget] = None):
+        """
+        Walk the tree below root, adding every included file to result.
+        
+        Args:
+            root: Project root directory
+            rules: Root-level exclude rules
+            result: Result to add counters to
+            index: Scan index to read previous records from and update
+            skip_paths: Relative file paths that are already accounted for
+            budget: Limits after which the walk stops
+        """
+        root = os.fspath(root)
+        state = self._walk_state(root, index, skip_paths, budget)
+        if index is not None:
+            index.begin(self._index_signature(rules))
+
+        # Loop detection for followed directory links needs a single visited set
+        if self.jobs > 1 and state.visited is None:
+            self._walk_sharded(root, rules, result, state)
+        else:
+            self._walk_tree([(root, "", rules, False)], result, state)
+
+        # Directories left unvisited simply have no record on the next scan
+        if index is not None:
+            index.finish()
+
+    def _walk_state(self, root: str, index: Optional[ScanIndex], skip_paths: Optional[Set[str]],
+                    budget: Optional[ScanBudget]) -> "_WalkState":
+        """Create the state shared by the directories of one walk."""
+        root_dev = None
+        if self.one_filesystem:
+            try:
+                root_dev = os.stat(root).st_dev
+            except OSError:
+                pass
+        return _WalkState(
+            index,
+            skip_paths,
+            time.time_ns() - RACY_WINDOW_NS,
+            budget,
+            os.path.realpath(root),
+            root_dev,
+            set() if self.follow_symlinks == SYMLINKS_ALL else None,
+        )
+
+    def _index_signature(self, rules: IgnoreRules) -> str:
+        """Get the scan index signature for the given root rules and options."""
+        return (f"{rules.signature()}:{self.respect_ignore_files:d}:{self.count_lines:d}:"
+                f"{self.follow_symlinks}:{self.one_filesystem:d}")
+
+    def _count_linked_files(self, result: ScanResult, root: str):
+        """Count each deferred hardlinked or symlinked file once."""
+        for path, name, size in result.linked_files.values():
+            result.add_file(name, size, self._analyze(path, name, size))
+            if result.breakdown is not None:
+                result.breakdown.add_file(os.path.relpath(path, root).replace(os.sep, "/"), size)
+        result.linked_files = {}
+
+    def _walk_tree(self, pending: List[Tuple[str, str, IgnoreRules, bool]], result: ScanResult,
+                   state: "_WalkState"):
+        """Walk the directories in pending and everything below them."""
+        budget = state.budget
+        while pending:
+            if budget is not None and budget.exhausted(result.total_files, result.total_size_bytes):
+                result.mark_partial(budget.stopped_by, len(pending))
+                return
+            pending.extend(self._visit_directory(*pending.pop(), result, state))
+
+    def _walk_sharded(self, root: str, rules: IgnoreRules, result: ScanResult, state: "_WalkState"):
+        """
+        Walk the tree with each top-level directory scanned in a worker process.
+        
+        The root directory itself is listed here; workers return compact
+        counters and, with an index, the directory records of their subtree.
+        Once the budget runs out, shards that have not started are cancelled.
+        """
+        shards = self._visit_directory(root, "", rules, False, result, state)
+        if not shards:
+            return
+
+        index, skip_paths, budget = state.index, state.skip_paths, state.budget
+        previous = _group_by_top_level(index.previous if index is not None else {})
+        skipped = _group_by_top_level(dict.fromkeys(skip_paths) if skip_paths is not None else {})
+        options = self._shard_options()
+
+        def worker_state(rel_dir: str, channels: _ShardChannels) -> _WalkState:
+            return _WalkState(
+                None,
+                set(skipped.get(rel_dir, ())) if skip_paths is not None else None,
+                state.racy_after_ns,
+                channels.budget(budget, rel_dir),
+                state.root_real,
+                state.root_dev,
+                None,
+            )
+
+        def merge(future: Future, rel_dir: str):
+            self._merge_shard(future.result(), result, index)
+            done.add(rel_dir)
+
+        done: Set[str] = set()
+        channels = None
+        try:
+            channels = _ShardChannels(budget, result.total_files)
+            with channels.executor(min(self.jobs, len(shards))) as executor:
+                top_k = result.breakdown.k if result.breakdown is not None else 0
+                futures = {
+                    executor.submit(
+                        _scan_shard, options, shard, worker_state(shard[1], channels),
+                        previous.get(shard[1], {}) if index is not None else None,
+                        index.signature if index is not None else None,
+                        top_k,
+                    ): shard[1]
+                    for shard in shards
+                }
+                running = _wait_for_shards(futures, merge, result, budget, channels)
+
+                cancelled = [future for future in running if future.cancel()]
+                for future in running.difference(cancelled):
+                    merge(future, futures[future])
+                if cancelled:
+                    result.mark_partial(budget.stopped_by, len(cancelled))
+                    done.update(futures[future] for future in cancelled)
+                elif budget is not None and budget.stopped_by is not None:
+                    # Every shard had finished, but past the budget a serial scan would have stopped
+                    result.mark_partial(budget.stopped_by)
+        except (OSError, BrokenProcessPool) as e:
+            # Without worker processes the remaining shards are walked in-process
+            logger.debug(f"Process pool unavailable, scanning serially: {e}")
+            remaining = [shard for shard in shards if shard[1] not in done]
+            self._walk_tree(remaining, result, state)
+        finally:
+            if channels is not None:
+                channels.close()
+
+    @staticmethod
+    def _merge_shard(shard: Tuple["ScanResult", Optional[Dict[str, DirRecord]], bool], result: ScanResult,
+                     index: Optional[ScanIndex]):
+        """Add a worker's (result, records, dirty) to the overall scan."""
+        shard_result, records, dirty = shard
+        result.merge(shard_result)
+        if index is not None:
+            index.merge(records, dirty)
+
+    def _analyze_sharded(self, root: str, shards: List[List[Tuple[str, int]]], result: ScanResult,
+                         budget: Optional[ScanBudget] = None):
+        """Analyze lists of (rel_path, size) files in worker processes."""
+        def merge(future: Future, i: int):
+            result.merge(future.result())
+            done.add(i)
+
+        done: Set[int] = set()
+        channels = None
+        try:
+            channels = _ShardChannels(budget, result.total_files)
+            with channels.executor(min(self.jobs, len(shards))) as executor:
+                futures = {
+                    executor.submit(_analyze_shard, self.max_file_bytes, root, files, channels.budget(budget, i)): i
+                    for i, files in enumerate(shards)
+                }
+                # Shards started after the budget ran out stop at their first check
+                for future in _wait_for_shards(futures, merge, result, budget, channels):
+                    merge(future, futures[future])
+                if budget is not None and budget.stopped_by is not None:
+                    result.mark_partial(budget.stopped_by)
+        except (OSError, BrokenProcessPool) as e:
+            logger.debug(f"Process pool unavailable, analyzing serially: {e}")
+            for i, files in enumerate(shards):
+                if i not in done:
+                    result.merge(_analyze_files(self, root, files, budget))
+        finally:
+            if channels is not None:
+                channels.close()
+
+    def _shard_options(self) -> Dict[str, Any]:
+        """Get the constructor arguments a worker needs to scan like this scanner."""
+        return {
+            "use_default_excludes": self.use_default_excludes,
+            "respect_ignore_files": self.respect_ignore_files,
+            "use_git_index": False,
+            "count_lines": self.count_lines,
+            "max_file_bytes": self.max_file_bytes,
+            "follow_symlinks": self.follow_symlinks,
+            "one_filesystem": self.one_filesystem,
+        }
+
+    def _visit_directory(self, directory: str, rel_dir: str, rules: IgnoreRules, force: bool,
+                         result: ScanResult, state: "_WalkState") -> List[Tuple[str, str, IgnoreRules, bool]]:
+        """
+        Account for the files directly inside one directory.
+        
+        Returns:
+            Subdirectories still to visit, as (path, rel_dir, rules, force)
+        """
+        index = state.index
+        mtime_ns = 0
+        if index is not None or state.root_dev is not None or state.visited is not None:
+            try:
+                st = os.stat(directory)
+            except OSError as e:
+                logger.debug(f"Skipping unreadable directory {directory}: {e}")
+                return []
+            if state.root_dev is not None and st.st_dev != state.root_dev:
+                logger.debug(f"Not crossing into {directory} on another filesystem")
+                return []
+            if state.visited is not None:
+                key = (st.st_dev, st.st_ino)
+                if key in state.visited:
+                    logger.debug(f"Skipping {directory}, already visited through another link")
+                    return []
+                state.visited.add(key)
+            mtime_ns = st.st_mtime_ns
+
+        if index is not None:
+            record = None if force else index.get(rel_dir)
+            if record is not None and record.mtime_ns == mtime_ns:
+                ignore_files = self._stat_ignore_files(directory, record.ignore_files)
+                if ignore_files == record.ignore_files:
+                    rules = rules.with_ignore_files(directory, rel_dir, ignore_files)
+                    result.add_counts(record.files, record.size_bytes, record.languages, record.binary_files)
+                    result.manifests.extend(f"{rel_dir}/{name}" if rel_dir else name for name in record.manifests)
+                    result.dirs_scanned += 1
+                    index.put(rel_dir, record, reused=True)
+                    return [
+                        (os.path.join(directory, name), f"{rel_dir}/{name}" if rel_dir else name, rules, False)
+                        for name in record.subdirs
+                    ]
+
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable directory {directory}: {e}")
+            return []
+
+        ignore_files: Dict[str, List[int]] = {}
+        if self.respect_ignore_files:
+            names = [entry.name for entry in entries if entry.name in IGNORE_FILE_NAMES]
+            if names:
+                rules = rules.with_ignore_files(directory, rel_dir, names)
+                if index is not None:
+                    ignore_files = self._stat_ignore_files(directory, names)
+
+        # Files reached through a followed link out of the tree may also be
+        # reached through another link, so all of them are de-duplicated
+        linked = state.visited is not None and not state.contains(directory)
+        own = ScanResult(lines_counted=self.count_lines)
+        subdirs: List[str] = []
+        for entry in entries:
+            self._visit_entry(entry, rel_dir, rules, own, subdirs, state, linked, result.breakdown)
+        result.merge(own)
+        result.dirs_scanned += 1
+        # Directories of a git checkout are already sized from the index
+        if result.breakdown is not None and state.skip_paths is None:
+            result.breakdown.add_dir(rel_dir, own.total_size_bytes)
+
+        if index is not None:
+            # Changed ignore files alter the rules for the whole subtree
+            previous = index.get(rel_dir)
+            force = force or previous is None or previous.ignore_files != ignore_files
+            # Linked files are only counted once all their paths are known, so
+            # a directory holding any must be listed again on every scan
+            index.put(rel_dir, DirRecord(
+                mtime_ns if mtime_ns < state.racy_after_ns and not own.linked_files else -1,
+                own.total_files,
+                own.total_size_bytes,
+                own.language_counts,
+                own.binary_files,
+                subdirs,
+                ignore_files,
+                [path[path.rfind("/") + 1:] for path in own.manifests],
+            ))
+
+        return [
+            (os.path.join(directory, name), f"{rel_dir}/{name}" if rel_dir else name, rules, force)
+            for name in subdirs
+        ]
+
+    def _analyze(self, path: str, name: str, size: int) -> Optional[FileContent]:
+        """
+        Read a file's content if line counting is enabled and it is relevant.
+        
+        Source files are counted; extensionless files are sniffed for a
+        shebang. Other files are accounted for by size only.
+        """
+        if self.line_counter is None:
+            return None
+        if language_for_name(name) is not None:
+            return self.line_counter.analyze(path, size)
+        if "." not in name:
+            return self.line_counter.analyze(path, size, detect_shebang=True)
+        return None
+
+    def _stat_ignore_files(self, directory: str, names: Iterable[str]) -> Dict[str, List[int]]:
+        """Get the (mtime_ns, size) of ignore files so edits can be detected."""
+        stats = {}
+        for name in names:
+            try:
+                st = os.stat(os.path.join(directory, name))
+                stats[name] = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                pass
+        return stats
+
+    def _visit_entry(self, entry: os.DirEntry, rel_dir: str, rules: IgnoreRules,
+                     result: ScanResult, subdirs: List[str], state: "_WalkState", linked: bool = False,
+                     breakdown: Optional[SizeBreakdown] = None):
+        """Account for a single directory entry; linked files are deferred for de-duplication."""
+        try:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            symlink = entry.is_symlink()
+            if symlink and self.follow_symlinks == SYMLINKS_NONE:
+                return
+            if entry.is_dir(follow_symlinks=self.follow_symlinks == SYMLINKS_ALL):
+                if rules.is_ignored(rel_path, entry.name, True):
+                    return
+                if symlink and state.contains(entry.path):
+                    return
+                subdirs.append(entry.name)
+            elif entry.is_file():
+                if rules.is_ignored(rel_path, entry.name, False):
+                    return
+                if state.skip_paths is not None and rel_path in state.skip_paths:
+                    return
+                if symlink and state.contains(entry.path):
+                    return
+                if entry.name in MANIFEST_TYPES:
+                    result.manifests.append(rel_path)
+                try:
+                    st = entry.stat()
+                except OSError:
+                    result.add_file(entry.name, 0, None)
+                    return
+                if linked or symlink or st.st_nlink > 1:
+                    if state.root_dev is None or st.st_dev == state.root_dev:
+                        result.add_linked_file((st.st_dev, st.st_ino), entry.path, entry.name, st.st_size)
+                    return
+                size = st.st_size
+                result.add_file(entry.name, size, self._analyze(entry.path, entry.name, size))
+                if breakdown is not None:
+                    breakdown.add_file(rel_path, size)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable entry {entry.path}: {e}")
+
+
+class _WalkState:
+    """State shared by the directories of one walk."""
+
+    __slots__ = ("index", "skip_paths", "racy_after_ns", "budget", "root_real", "root_dev", "visited")
+
+    def __init__(self, index: Optional[ScanIndex], skip_paths: Optional[Set[str]], racy_after_ns: int,
+                 budget: Optional[ScanBudget], root_real: str, root_dev: Optional[int],
+                 visited: Optional[Set[Tuple[int, int]]]):
+        self.index = index
+        self.skip_paths = skip_paths
+        self.racy_after_ns = racy_after_ns
+        self.budget = budget
+        # Resolved root, to tell links within the tree from links out of it
+        self.root_real = root_real
+        # Device of the root in one-filesystem mode
+        self.root_dev = root_dev
+        # (st_dev, st_ino) of entered directories when directory links are followed
+        self.visited = visited
+
+    def contains(self, path: str) -> bool:
+        """Check whether a link resolves to somewhere inside the scanned tree."""
+        target = os.path.realpath(path)
+        return target == self.root_real or target.startswith(self.root_real.rstrip(os.sep) + os.sep)
+
+
+def _group_by_top_level(items: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Split a mapping keyed by relative path by its first path component."""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for rel, value in items.items():
+        groups.setdefault(rel.split("/", 1)[0], {})[rel] = value
+    return groups
+
+
+# Progress queue and file counter shared with the parent, set by _init_shard_worker
+_shard_progress_queue: Optional[Any] = None
+_shard_file_counter: Optional[Any] = None
+
+
+def _init_shard_worker(progress_queue: Optional[Any], file_counter: Optional[Any]):
+    """Remember the parent's progress queue and file counter in a worker process."""
+    global _shard_progress_queue, _shard_file_counter
+    _shard_progress_queue = progress_queue
+    _shard_file_counter = file_counter
+
+
+def _report_shard_progress(shard: Any, files: int, size_bytes: int, elapsed: float):
+    """Progress callback of worker budgets, forwarding (shard, files, size_bytes) to the parent."""
+    if _shard_progress_queue is not None:
+        _shard_progress_queue.put((shard, files, size_bytes))
+
+
+class _SharedFileBudget(ScanBudget):
+    """
+    Worker budget whose max_files applies to the files of all shards together.
+    
+    Each check adds the shard's new files to the counter shared by the
+    worker pool, so that N workers stop near max_files instead of each
+    collecting up to max_files.
+    """
+
+    def __init__(self, parent: ScanBudget, progress: Optional[Callable[[int, int, float], None]]):
+        super().__init__(max_files=parent.max_files, progress=progress, progress_interval=parent.progress_interval)
+        self.started = parent.started
+        self.deadline = parent.deadline
+        # Files of this shard already added to the shared counter
+        self.shared_files = 0
+
+    def exhausted(self, files: int, size_bytes: int = 0, report: bool = True) -> bool:
+        """Check the limits against the shared file count and report progress."""
+        counter = _shard_file_counter
+        if counter is not None:
+            with counter.get_lock():
+                counter.value += files - self.shared_files
+                total = counter.value
+            self.shared_files = files
+            if self.stopped_by is None and total >= self.max_files:
+                self.stopped_by = "files"
+        return super().exhausted(files, size_bytes, report)
+
+
+class _ShardChannels:
+    """The progress queue and file counter a sharded scan shares with its worker processes."""
+
+    __slots__ = ("progress_queue", "file_counter")
+
+    def __init__(self, budget: Optional[ScanBudget], files_counted: int):
+        """
+        Create what the budget needs; nothing when there is no budget.
+        
+        Args:
+            budget: Overall budget
+            files_counted: Files the parent counted before starting the workers
+        """
+        # (shard, files, size_bytes) reports, only when someone listens to progress
+        self.progress_queue = (multiprocessing.Queue()
+                               if budget is not None and budget.progress is not None else None)
+        # Files counted by the parent and all workers, only with a file limit
+        self.file_counter = (multiprocessing.Value("q", files_counted)
+                             if budget is not None and budget.max_files is not None else None)
+
+    def executor(self, max_workers: int) -> ProcessPoolExecutor:
+        """Create the worker pool, handing the queue and counter to each worker."""
+        if self.progress_queue is None and self.file_counter is None:
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shard_worker,
+                                   initargs=(self.progress_queue, self.file_counter))
+
+    def budget(self, budget: Optional[ScanBudget], shard: Any) -> Optional[ScanBudget]:
+        """Get the budget of one shard."""
+        if budget is None:
+            return None
+        progress = partial(_report_shard_progress, shard) if self.progress_queue is not None else None
+        if self.file_counter is not None:
+            return _SharedFileBudget(budget, progress)
+        return budget.worker_copy(progress)
+
+    def files(self) -> int:
+        """Get the files counted so far by the parent and the workers' budget checks."""
+        return self.file_counter.value if self.file_counter is not None else 0
+
+    def close(self):
+        """Release the queue."""
+        if self.progress_queue is not None:
+            self.progress_queue.close()
+
+
+def _wait_for_shards(futures: Dict[Future, Any], merge: Callable[[Future, Any], None], result: "ScanResult",
+                     budget: Optional[ScanBudget], channels: _ShardChannels) -> Set[Future]:
+    """
+    Merge shards as they complete until the budget runs out.
+    
+    The budget is checked every progress interval against the merged
+    totals plus what running workers reported, so the parent stops
+    queued shards without waiting for a running one to finish. Its
+    progress callback is only called when the totals actually grew.
+    
+    Args:
+        futures: Shard future -> shard key
+        merge: Called as merge(future, key) for each completed shard
+        result: Overall result the shards are merged into
+        budget: Overall budget
+        channels: Queue and counter the workers report to
+        
+    Returns:
+        Futures not merged yet because the budget ran out
+    """
+    progress_queue = channels.progress_queue
+    running = set(futures)
+    # Latest counts of shards that are still running
+    in_flight: Dict[Any, Tuple[int, int]] = {}
+    # Keys of merged shards, whose late reports are dropped
+    merged: Set[Any] = set()
+    interval = budget.progress_interval if budget is not None else None
+    shared_files = channels.files()
+    while running:
+        finished, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+        progressed = bool(finished)
+        while progress_queue is not None:
+            try:
+                key, files, size_bytes = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            except (OSError, EOFError, ValueError):
+                # A worker died while reporting; its future fails on its own
+                break
+            if key not in merged:
+                progressed = True
+                in_flight[key] = (files, size_bytes)
+        for future in finished:
+            running.discard(future)
+            merge(future, futures[future])
+            merged.add(futures[future])
+            in_flight.pop(futures[future], None)
+        if budget is None:
+            continue
+        if budget.stopped_by is not None:
+            break
+        if channels.files() > shared_files:
+            shared_files = channels.files()
+            progressed = True
+        files = max(result.total_files + sum(files for files, _ in in_flight.values()), shared_files)
+        if budget.exhausted(files, result.total_size_bytes + sum(size for _, size in in_flight.values()),
+                            report=progressed):
+            break
+    return running
+
+
+def _scan_shard(options: Dict[str, Any], shard: Tuple[str, str, IgnoreRules, bool], state: _WalkState,
+                records: Optional[Dict[str, DirRecord]], signature: Optional[str], top_k: int = 0):
+    """
+    Walk one top-level directory in a worker process.
+    
+    Returns:
+        (result, records, dirty) where records are the directory records of
+        the subtree, or None without an index
+    """
+    scanner = ProjectScanner(**options)
+    result = ScanResult(lines_counted=scanner.count_lines, top_k=top_k)
+    if records is not None:
+        state.index = ScanIndex(signature, records)
+        state.index.begin(signature)
+    scanner._walk_tree([shard], result, state)
+    if state.index is None:
+        return result, None, False
+    return result, state.index.dirs, state.index.dirty
+
+
+def _analyze_files(scanner: ProjectScanner, root: str, files: List[Tuple[str, int]],
+                   budget: Optional[ScanBudget] = None) -> ScanResult:
+    """Add (rel_path, size) files below root to a new result, within the budget."""
+    result = ScanResult(lines_counted=scanner.count_lines)
+    for path, size in files:
+        count = result.total_files
+        if (budget is not None and (not count % BUDGET_CHECK_FILES or count == budget.max_files)
+                and budget.exhausted(count, result.total_size_bytes)):
+            result.mark_partial(budget.stopped_by)
+            break
+        name = path[path.rfind("/") + 1:]
+        result.add_file(name, size, scanner._analyze(os.path.join(root, path), name, size))
+    return result
+
+
+def _analyze_shard(max_file_bytes: int, root: str, files: List[Tuple[str, int]],
+                   budget: Optional[ScanBudget] = None) -> ScanResult:
+    """Analyze the content of (rel_path, size) files in a worker process."""
+    scanner = ProjectScanner(count_lines=True, max_file_bytes=max_file_bytes)
+    return _analyze_files(scanner, root, files, budget)
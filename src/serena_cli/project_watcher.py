@@ -0,0 +1,426 @@
+"""
+Live, in-memory project model kept current by filesystem events.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from .ignore_rules import DEFAULT_EXCLUDES
+from .fingerprint import ProjectFingerprint
+from .project_detector import ProjectDetector
+from .results import SizeInfo, SubProject
+
+logger = logging.getLogger(__name__)
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Kinds of change the model distinguishes
+CHANGE_CONFIG = "config"
+CHANGE_INDICATORS = "indicators"
+CHANGE_TREE = "tree"
+ALL_CHANGES = frozenset((CHANGE_CONFIG, CHANGE_INDICATORS, CHANGE_TREE))
+
+# Directories whose contents never affect the model
+_UNWATCHED_DIRS = frozenset(pattern.rstrip("/") for pattern in DEFAULT_EXCLUDES) - {".serena-cli"}
+
+
+class WatchLimitError(OSError):
+    """Raised when the inotify watch or instance limit is exhausted."""
+
+
+class LiveProjectModel:
+    """
+    In-memory view of one project: enabled state, parsed configuration,
+    file/size/language aggregates and the indicator set.
+    """
+
+    def __init__(self, project_path: str, detector: Optional[ProjectDetector] = None):
+        """
+        Initialize the model and load it once from disk.
+
+        Args:
+            project_path: Project root
+            detector: Detector used to compute aggregates
+        """
+        self.project_path = Path(project_path).resolve()
+        self.detector = detector or ProjectDetector()
+        self.config_file = self.project_path / ".serena-cli" / "project.yml"
+
+        self.enabled = False
+        self.config: Optional[Dict[str, Any]] = None
+        self.project_type = "unknown"
+        self.size = SizeInfo()
+        self.languages: List[str] = []
+        self.subprojects: Optional[SubProject] = None
+        self.indicators: List[str] = []
+        self.updated_at = 0.0
+        self.watch_mode = "none"
+
+        self._lock = threading.Lock()
+        self.refresh(ALL_CHANGES)
+
+    def refresh(self, changes: Set[str], changed_dirs: Optional[Set[str]] = None):
+        """
+        Recompute the parts of the model affected by a change.
+
+        Args:
+            changes: Change kinds (CHANGE_CONFIG, CHANGE_INDICATORS, CHANGE_TREE)
+            changed_dirs: Directories, relative to the project root, whose
+                files were modified in place and must be listed again
+        """
+        path = self.project_path
+        updates: Dict[str, Any] = {}
+
+        if CHANGE_CONFIG in changes:
+            updates["enabled"] = self.config_file.exists()
+            updates["config"] = self._read_config()
+
+        if CHANGE_INDICATORS in changes:
+            updates["indicators"] = self.detector._get_project_indicators(path)
+            updates["project_type"] = self.detector._detect_project_type(path)
+
+        if CHANGE_TREE in changes:
+            # The watcher sees worktree events only, and .git/index lags
+            # behind them until files are staged, so the model always walks
+            scan = self.detector._scan_project(path, changed_dirs=changed_dirs, use_git_index=False)
+            updates["size"] = self.detector._get_project_size(path, scan)
+            updates["languages"] = self.detector._detect_languages(path, scan)
+            updates["subprojects"] = scan.subprojects()
+
+        with self._lock:
+            for name, value in updates.items():
+                setattr(self, name, value)
+            self.updated_at = time.time()
+
+    def _read_config(self) -> Optional[Dict[str, Any]]:
+        """Read the project configuration, None if missing or invalid."""
+        try:
+            with open(self.config_file, "r", encoding="utf-8") as f:
+                return yaml.safe_load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Cannot read {self.config_file}: {e}")
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a consistent copy of the model."""
+        with self._lock:
+            return {
+                "name": self.project_path.name,
+                "path": str(self.project_path),
+                "type": self.project_type,
+                "languages": list(self.languages),
+                "size": self.size.to_dict(),
+                "subprojects": self.subprojects.to_dict() if self.subprojects is not None else {},
+                "indicators": list(self.indicators),
+                "enabled": self.enabled,
+                "config": self.config,
+                "config_path": str(self.config_file) if self.enabled else None,
+                "updated_at": self.updated_at,
+                "watch_mode": self.watch_mode,
+            }
+
+
+class _Inotify:
+    """Minimal ctypes binding for the Linux inotify API."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            if err == errno.EMFILE:
+                raise WatchLimitError(err, "inotify instance limit reached")
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Add a watch and return its descriptor."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise WatchLimitError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self):
+        """Read and decode all pending events as (wd, mask, name) tuples."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            if not data:
+                return events
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        """Close the inotify instance; all watches are dropped."""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class ProjectWatcher:
+    """
+    Keeps a LiveProjectModel current.
+
+    On Linux, inotify watches every directory of the project except excluded
+    ones. When inotify is unavailable or its watch limits are exhausted, the
+    project is polled instead: each poll fingerprints the tree, file sizes
+    and mtimes included, and the model is refreshed only when something
+    changed, listing again just the directories that did.
+    """
+
+    def __init__(
+        self,
+        model: LiveProjectModel,
+        poll_interval: float = 5.0,
+        debounce: float = 0.2,
+        use_inotify: bool = True,
+        on_change: Optional[Callable[[LiveProjectModel], None]] = None
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            model: Model to keep current
+            poll_interval: Seconds between refreshes in polling mode
+            debounce: Seconds to wait for a burst of events to settle
+            use_inotify: Try inotify before falling back to polling
+            on_change: Called after each refresh of the model
+        """
+        self.model = model
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.on_change = on_change
+
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Polling mode: tree fingerprint and config (mtime_ns, size) last seen
+        self._fingerprint: Optional[ProjectFingerprint] = None
+        self._config_state: Optional[Tuple[int, int]] = None
+
+    @property
+    def mode(self) -> str:
+        """Get the active watch mode: "inotify", "polling" or "stopped"."""
+        if self._thread is None:
+            return "stopped"
+        return "inotify" if self._inotify is not None else "polling"
+
+    def start(self):
+        """Start watching in a background thread."""
+        if self._thread is not None:
+            return
+
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                self._watch_tree(str(self.model.project_path))
+            except (OSError, AttributeError) as e:
+                # AttributeError: libc without inotify symbols
+                logger.warning(f"inotify unavailable for {self.model.project_path}, polling instead: {e}")
+                self._close_inotify()
+
+        if self._inotify is None:
+            # Taken before returning, so changes made right after start are seen
+            self._fingerprint = self.model.detector.fingerprint(str(self.model.project_path))
+            self._config_state = self._config_stat()
+        target = self._run_inotify if self._inotify is not None else self._run_polling
+        self._thread = threading.Thread(target=target, name="serena-cli-watcher", daemon=True)
+        self._thread.start()
+        self.model.watch_mode = self.mode
+
+    def stop(self):
+        """Stop watching and release the inotify instance."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._close_inotify()
+        self._thread = None
+        self.model.watch_mode = "stopped"
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._watches.clear()
+
+    def _watch_tree(self, root: str):
+        """Add watches for root and every included directory below it."""
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                wd = self._inotify.add_watch(directory, _WATCH_MASK)
+            except WatchLimitError:
+                raise
+            except OSError as e:
+                logger.debug(f"Cannot watch {directory}: {e}")
+                continue
+            self._watches[wd] = directory
+
+            # Only the config inside .serena-cli matters, not its subtree
+            if os.path.basename(directory) == ".serena-cli":
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and entry.name not in _UNWATCHED_DIRS:
+                            pending.append(entry.path)
+            except OSError as e:
+                logger.debug(f"Cannot list {directory}: {e}")
+
+    def _classify(self, directory: str, mask: int, name: str, changes: Set[str], changed_dirs: Set[str]):
+        """Translate one event into change kinds."""
+        root = str(self.model.project_path)
+        if os.path.basename(directory) == ".serena-cli" and directory == os.path.join(root, ".serena-cli"):
+            if name == "project.yml" or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changes.add(CHANGE_CONFIG)
+            return
+
+        if directory == root:
+            changes.add(CHANGE_INDICATORS)
+            if name == ".serena-cli":
+                changes.add(CHANGE_CONFIG)
+
+        if mask & IN_ISDIR and name in _UNWATCHED_DIRS:
+            return
+        changes.add(CHANGE_TREE)
+        if mask & (IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB) and not mask & IN_ISDIR:
+            # In-place edits do not move the directory mtime
+            rel_dir = os.path.relpath(directory, root).replace(os.sep, "/")
+            changed_dirs.add("" if rel_dir == "." else rel_dir)
+
+    def _run_inotify(self):
+        """Event loop for inotify mode."""
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._inotify.fd], [], [], 0.5)
+            except (OSError, ValueError):
+                break
+            if not readable:
+                continue
+
+            # Let bursts (checkouts, builds) settle into one refresh
+            time.sleep(self.debounce)
+            changes: Set[str] = set()
+            changed_dirs: Set[str] = set()
+            try:
+                for wd, mask, name in self._inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        changes |= ALL_CHANGES
+                        continue
+                    directory = self._watches.get(wd)
+                    if directory is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+                    if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and name not in _UNWATCHED_DIRS:
+                        self._watch_tree(os.path.join(directory, name))
+                    self._classify(directory, mask, name, changes, changed_dirs)
+            except WatchLimitError as e:
+                logger.warning(f"{e}; switching {self.model.project_path} to polling")
+                self._close_inotify()
+                self.model.watch_mode = "polling"
+                self._refresh(ALL_CHANGES)
+                self._run_polling()
+                return
+
+            if changes:
+                self._refresh(changes, changed_dirs)
+
+    def _run_polling(self):
+        """Refresh loop for polling mode."""
+        root = str(self.model.project_path)
+        while not self._stop.wait(self.poll_interval):
+            changes: Set[str] = set()
+            config_state = self._config_stat()
+            if config_state != self._config_state:
+                self._config_state = config_state
+                changes.add(CHANGE_CONFIG)
+
+            previous = self._fingerprint
+            current = self.model.detector.fingerprint(root, previous)
+            if current is None or previous is None:
+                # Unreadable, or on a slow mount: rescan what the index allows
+                changed_dirs = None
+                changes.update(ALL_CHANGES)
+            elif current.digest != previous.digest:
+                # File entries are part of the digest, so in-place edits
+                # name their directory even though its mtime did not move
+                changed_dirs = set(current.changed_dirs(previous))
+                changes.update((CHANGE_INDICATORS, CHANGE_TREE))
+            else:
+                changed_dirs = None
+            self._fingerprint = current
+
+            if changes:
+                self._refresh(changes, changed_dirs)
+
+    def _config_stat(self) -> Optional[Tuple[int, int]]:
+        """Get the (mtime_ns, size) of the project configuration, None if missing."""
+        try:
+            st = os.stat(self.model.config_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self, changes: Set[str], changed_dirs: Optional[Set[str]] = None):
+        try:
+            self.model.refresh(changes, changed_dirs)
+        except Exception as e:
+            logger.error(f"Error refreshing project model for {self.model.project_path}: {e}")
+            return
+        if self.on_change is not None:
+            self.on_change(self.model)
@@ -0,0 +1,377 @@
+"""
+Compact result types returned by the detector and the Serena manager.
+
+Results stay as slotted objects while they are passed around and are only
+turned into plain dicts with ``to_dict()`` where they are serialized (MCP
+responses, JSON output).
+"""
+
+import json
+import os
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+_MB = 1024 * 1024
+
+
+class SizeInfo:
+    """File count and byte total of a project."""
+
+    __slots__ = ("total_files", "total_size_bytes")
+
+    def __init__(self, total_files: int = 0, total_size_bytes: int = 0):
+        self.total_files = total_files
+        self.total_size_bytes = total_size_bytes
+
+    @property
+    def total_size_mb(self) -> float:
+        """Total size in MiB, rounded to two decimals."""
+        return round(self.total_size_bytes / _MB, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the size summary as a dict."""
+        return {
+            "total_files": self.total_files,
+            "total_size_bytes": self.total_size_bytes,
+            "total_size_mb": self.total_size_mb,
+        }
+
+
+class LanguageStats:
+    """
+    Files, bytes and lines per language, largest languages first.
+
+    Counters live in one flat ``array('q')`` of (files, bytes, lines)
+    triples aligned with ``names``, instead of a dict per language.
+    """
+
+    __slots__ = ("names", "counts", "lines_counted")
+
+    def __init__(self, names: Tuple[str, ...] = (), counts: Optional[array] = None, lines_counted: bool = False):
+        self.names = names
+        self.counts = counts if counts is not None else array("q")
+        self.lines_counted = lines_counted
+
+    @classmethod
+    def from_counts(cls, language_counts: Dict[str, List[int]], lines_counted: bool = False) -> "LanguageStats":
+        """
+        Build the stats from a scan's counters.
+
+        Args:
+            language_counts: Language -> [files, bytes, lines]
+            lines_counted: Whether the line counts are meaningful
+        """
+        ordered = sorted(language_counts.items(), key=lambda item: (-item[1][1], item[0]))
+        counts = array("q")
+        for _, (files, size, lines) in ordered:
+            counts.extend((files, size, lines))
+        return cls(tuple(language for language, _ in ordered), counts, lines_counted)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, language: object) -> bool:
+        return language in self.names
+
+    def get(self, language: str) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        Get the counters of one language.
+
+        Returns:
+            (files, bytes, lines), lines None unless contents were analyzed;
+            None if the language was not seen
+        """
+        try:
+            i = self.names.index(language) * 3
+        except ValueError:
+            return None
+        counts = self.counts
+        return counts[i], counts[i + 1], counts[i + 2] if self.lines_counted else None
+
+    def items(self) -> Iterator[Tuple[str, int, int, Optional[int]]]:
+        """Iterate over (language, files, bytes, lines), largest first."""
+        counts = self.counts
+        for n, language in enumerate(self.names):
+            i = n * 3
+            yield language, counts[i], counts[i + 1], counts[i + 2] if self.lines_counted else None
+
+    def languages(self) -> List[str]:
+        """Get the sorted list of languages."""
+        return sorted(self.names)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Get the stats as a dict of language to files, bytes and lines."""
+        return {
+            language: {"files": files, "bytes": size, "lines": lines}
+            for language, files, size, lines in self.items()
+        }
+
+
+class ScanCoverage:
+    """How much of the tree a scan covered."""
+
+    __slots__ = ("complete", "stopped_by", "files_scanned", "dirs_scanned", "dirs_pending", "elapsed_seconds",
+                 "degraded")
+
+    def __init__(self, complete: bool = True, stopped_by: Optional[str] = None, files_scanned: int = 0,
+                 dirs_scanned: int = 0, dirs_pending: int = 0, elapsed_seconds: float = 0.0,
+                 degraded: bool = False):
+        self.complete = complete
+        # Budget or condition that ended the scan early
+        self.stopped_by = stopped_by
+        self.files_scanned = files_scanned
+        self.dirs_scanned = dirs_scanned
+        self.dirs_pending = dirs_pending
+        self.elapsed_seconds = elapsed_seconds
+        # Only indicators were checked, because the filesystem was too slow
+        self.degraded = degraded
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the coverage as a dict."""
+        return {
+            "complete": self.complete,
+            "stopped_by": self.stopped_by,
+            "degraded": self.degraded,
+            "files_scanned": self.files_scanned,
+            "dirs_scanned": self.dirs_scanned,
+            "dirs_pending": self.dirs_pending,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class SubProject:
+    """A directory holding build manifests, with the sub-projects below it."""
+
+    __slots__ = ("path", "types", "manifests", "children")
+
+    def __init__(self, path: str, types: Tuple[str, ...], manifests: Tuple[str, ...],
+                 children: Optional[List["SubProject"]] = None):
+        # Path relative to the project root, "." for the root itself
+        self.path = path
+        self.types = types
+        self.manifests = manifests
+        self.children = children if children is not None else []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the sub-project tree as nested dicts."""
+        return {
+            "path": self.path,
+            "types": list(self.types),
+            "manifests": list(self.manifests),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class ProjectInfo:
+    """Everything ProjectDetector reports about a project."""
+
+    __slots__ = ("path", "type", "types", "language_stats", "size", "has_serena", "coverage", "subprojects",
+                 "breakdown")
+
+    def __init__(self, path: str, type: str, types: Tuple[str, ...], language_stats: LanguageStats,
+                 size: SizeInfo, has_serena: bool, coverage: ScanCoverage, subprojects: SubProject,
+                 breakdown: Optional[Any] = None):
+        self.path = path
+        self.type = type
+        # Types marked by build manifests at the root, in order of preference
+        self.types = types
+        self.language_stats = language_stats
+        self.size = size
+        self.has_serena = has_serena
+        self.coverage = coverage
+        self.subprojects = subprojects
+        # SizeBreakdown, when requested
+        self.breakdown = breakdown
+
+    @property
+    def name(self) -> str:
+        """Project directory name."""
+        return os.path.basename(self.path) or self.path
+
+    @property
+    def languages(self) -> List[str]:
+        """Sorted list of detected languages."""
+        return self.language_stats.languages()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether Serena is enabled in the project."""
+        return self.has_serena
+
+    @property
+    def config(self) -> Optional[str]:
+        """Path of the serena-cli project configuration, if Serena is enabled."""
+        return os.path.join(self.path, ".serena-cli", "project.yml") if self.has_serena else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the project information as a JSON-compatible dict."""
+        info = {
+            "name": self.name,
+            "path": self.path,
+            "type": self.type,
+            "types": list(self.types),
+            "languages": self.languages,
+            "language_stats": self.language_stats.to_dict(),
+            "size": self.size.to_dict(),
+            "subprojects": self.subprojects.to_dict(),
+            "has_serena": self.has_serena,
+            "enabled": self.enabled,
+            "config": self.config,
+            "coverage": self.coverage.to_dict(),
+        }
+        if self.breakdown is not None:
+            info["breakdown"] = self.breakdown.to_dict()
+        return info
+
+
+class ToolInfo:
+    """Path and version of an external command-line tool."""
+
+    __slots__ = ("name", "path", "version", "available")
+
+    def __init__(self, name: str, path: Optional[str] = None, version: Optional[str] = None,
+                 available: bool = False):
+        self.name = name
+        # Resolved executable, None if it is not on PATH
+        self.path = path
+        # Version reported by the tool, None if it could not be parsed
+        self.version = version
+        # Whether the executable exists and its version probe succeeded
+        self.available = available
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the tool as a dict."""
+        return {"name": self.name, "path": self.path, "version": self.version, "available": self.available}
+
+
+class SerenaInstallation:
+    """Whether, where and in which version the Serena package is installed."""
+
+    __slots__ = ("installed", "version", "location", "distribution")
+
+    def __init__(self, installed: bool, version: Optional[str] = None, location: Optional[str] = None,
+                 distribution: Optional[str] = None):
+        self.installed = installed
+        # None when the package carries no distribution metadata
+        self.version = version
+        # Package directory or module file
+        self.location = location
+        self.distribution = distribution
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SerenaInstallation":
+        """Build an installation from the output of to_dict()."""
+        return cls(bool(data["installed"]), data.get("version"), data.get("location"), data.get("distribution"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the installation as a dict."""
+        return {
+            "installed": self.installed,
+            "version": self.version,
+            "location": self.location,
+            "distribution": self.distribution,
+        }
+
+
+class SerenaStatus:
+    """Serena state of one project and of the local installation."""
+
+    __slots__ = ("project_path", "serena_enabled", "config_exists", "installation", "project_config",
+                 "python_version", "python_compatible")
+
+    def __init__(self, project_path: str, serena_enabled: bool, config_exists: bool,
+                 installation: SerenaInstallation, project_config: Optional[Dict[str, Any]],
+                 python_version: str, python_compatible: bool):
+        self.project_path = project_path
+        self.serena_enabled = serena_enabled
+        self.config_exists = config_exists
+        self.installation = installation
+        self.project_config = project_config
+        self.python_version = python_version
+        self.python_compatible = python_compatible
+
+    @property
+    def serena_installed(self) -> bool:
+        """Whether the Serena package is installed."""
+        return self.installation.installed
+
+    @property
+    def installation_method(self) -> str:
+        """How Serena was installed, according to the project configuration."""
+        if not (self.serena_enabled and self.project_config):
+            return "Not installed"
+        return self.project_config.get("installation_method", "Unknown")
+
+    @property
+    def serena_context(self) -> str:
+        """Serena context configured for the project."""
+        if not (self.serena_enabled and self.project_config):
+            return "Not configured"
+        return self.project_config.get("serena_context", "Not specified")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the status as a JSON-compatible dict."""
+        return {
+            "project_path": self.project_path,
+            "serena_enabled": self.serena_enabled,
+            "config_exists": self.config_exists,
+            "serena_installed": self.serena_installed,
+            "serena_installation": self.installation.to_dict(),
+            "project_config": self.project_config,
+            "installation_method": self.installation_method,
+            "serena_context": self.serena_context,
+            "python_compatibility": {
+                "version": self.python_version,
+                "compatible": self.python_compatible,
+                "recommended": "3.10+"
+            },
+        }
+
+
+class RegisteredProject:
+    """A project recorded in the global project registry."""
+
+    __slots__ = ("path", "name", "type", "context", "config_mtime_ns", "registered_at", "scanned_at",
+                 "total_files", "total_size_bytes", "languages")
+
+    def __init__(self, path: str, name: str, type: Optional[str], context: Optional[str],
+                 config_mtime_ns: Optional[int], registered_at: float, scanned_at: Optional[float] = None,
+                 total_files: Optional[int] = None, total_size_bytes: Optional[int] = None,
+                 languages: Tuple[str, ...] = ()):
+        self.path = path
+        self.name = name
+        self.type = type
+        self.context = context
+        # Modification time of .serena-cli/project.yml when last recorded
+        self.config_mtime_ns = config_mtime_ns
+        self.registered_at = registered_at
+        # Summary of the last scan, None until the project was scanned
+        self.scanned_at = scanned_at
+        self.total_files = total_files
+        self.total_size_bytes = total_size_bytes
+        self.languages = languages
+
+    @classmethod
+    def from_row(cls, row: Tuple[Any, ...]) -> "RegisteredProject":
+        """Build a project from a registry row; languages are stored as JSON."""
+        *fields, languages = row
+        return cls(*fields, languages=tuple(json.loads(languages)) if languages else ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the registry entry as a dict."""
+        return {
+            "path": self.path,
+            "name": self.name,
+            "type": self.type,
+            "context": self.context,
+            "config_mtime_ns": self.config_mtime_ns,
+            "registered_at": self.registered_at,
+            "scanned_at": self.scanned_at,
+            "total_files": self.total_files,
+            "total_size_bytes": self.total_size_bytes,
+            "languages": list(self.languages),
+        }
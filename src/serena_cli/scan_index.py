@@ -0,0 +1,202 @@
+"""
+Persistent per-directory scan index for incremental project scans.
+"""
+
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Index file name inside the project's .serena-cli directory
+SCAN_INDEX_FILE = "scan-index.json.gz"
+
+# Bump whenever the record layout changes; older indexes are discarded
+SCAN_INDEX_VERSION = 3
+
+# Directories modified this close to the scan are not trusted on the next
+# run, since a later change within the same timestamp tick would be missed
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+
+class DirRecord:
+    """Cached counters for the files directly inside one directory."""
+
+    __slots__ = ("mtime_ns", "files", "size_bytes", "languages", "binary_files", "subdirs", "ignore_files",
+                 "manifests")
+
+    def __init__(self, mtime_ns: int, files: int, size_bytes: int, languages: Dict[str, List[int]],
+                 binary_files: int, subdirs: List[str], ignore_files: Dict[str, List[int]],
+                 manifests: List[str]):
+        self.mtime_ns = mtime_ns
+        self.files = files
+        self.size_bytes = size_bytes
+        # Language -> [files, bytes, lines]
+        self.languages = languages
+        self.binary_files = binary_files
+        self.subdirs = subdirs
+        self.ignore_files = ignore_files
+        # Names of the build manifests in the directory
+        self.manifests = manifests
+
+    def to_list(self) -> List[Any]:
+        """Encode the record as a compact JSON list."""
+        return [self.mtime_ns, self.files, self.size_bytes, self.languages,
+                self.binary_files, self.subdirs, self.ignore_files, self.manifests]
+
+    @classmethod
+    def from_list(cls, data: List[Any]) -> "DirRecord":
+        """Decode a record written by to_list."""
+        return cls(*data)
+
+
+class ScanIndex:
+    """
+    Per-directory scan results keyed by path relative to the project root.
+
+    A scan reads records from the previous run and writes fresh records for
+    every directory it visits, so directories that disappeared are dropped
+    automatically.
+    """
+
+    def __init__(self, signature: str = "", dirs: Optional[Dict[str, DirRecord]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            signature: Digest of the root exclude rules the records were built with
+            dirs: Records from a previous scan
+        """
+        self.signature = signature
+        self.previous: Dict[str, DirRecord] = dirs or {}
+        self.dirs: Dict[str, DirRecord] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ScanIndex":
+        """
+        Load an index file.
+
+        Args:
+            path: Index file path
+
+        Returns:
+            Loaded index, or an empty one if the file is missing or unreadable
+        """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.debug(f"Discarding unreadable scan index {path}: {e}")
+            return cls()
+
+        if not isinstance(data, dict) or data.get("version") != SCAN_INDEX_VERSION:
+            return cls()
+
+        try:
+            dirs = {rel: DirRecord.from_list(record) for rel, record in data["dirs"].items()}
+        except Exception as e:
+            logger.debug(f"Discarding malformed scan index {path}: {e}")
+            return cls()
+
+        return cls(data.get("signature", ""), dirs)
+
+    def save(self, path: Union[str, Path]) -> bool:
+        """
+        Write the records from the last scan if anything changed.
+
+        Args:
+            path: Index file path
+
+        Returns:
+            True if the index was written, False otherwise
+        """
+        if not self.dirty:
+            return False
+
+        data = {
+            "version": SCAN_INDEX_VERSION,
+            "signature": self.signature,
+            "dirs": {rel: record.to_list() for rel, record in self.dirs.items()},
+        }
+        tmp_path = f"{os.fspath(path)}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+            self.dirty = False
+            return True
+        except OSError as e:
+            logger.debug(f"Cannot write scan index {path}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return False
+
+    def begin(self, signature: str):
+        """
+        Start a new scan.
+
+        Args:
+            signature: Digest of the root exclude rules for this scan; a
+                different signature invalidates all previous records
+        """
+        if signature != self.signature:
+            self.previous = {}
+            self.signature = signature
+            self.dirty = True
+        elif self.dirs:
+            self.previous = self.dirs
+        self.dirs = {}
+
+    def get(self, rel_dir: str) -> Optional[DirRecord]:
+        """Get the previous record for a directory."""
+        return self.previous.get(rel_dir)
+
+    def put(self, rel_dir: str, record: DirRecord, reused: bool = False):
+        """
+        Store the record for a directory visited by the current scan.
+
+        Args:
+            rel_dir: Directory path relative to the project root
+            record: Directory record
+            reused: Whether the record was taken unchanged from the previous scan
+        """
+        self.dirs[rel_dir] = record
+        if not reused:
+            self.dirty = True
+
+    def merge(self, records: Dict[str, DirRecord], dirty: bool):
+        """
+        Add the records a worker produced while scanning part of the tree.
+
+        Args:
+            records: Directory records of the scanned subtree
+            dirty: Whether any of them differ from the previous scan
+        """
+        self.dirs.update(records)
+        if dirty:
+            self.dirty = True
+
+    def invalidate(self, rel_dir: str):
+        """
+        Forget the previous record of a directory so the next scan lists it.
+
+        Args:
+            rel_dir: Directory path relative to the project root
+        """
+        self.previous.pop(rel_dir, None)
+        self.dirs.pop(rel_dir, None)
+
+    def finish(self):
+        """End the current scan; removed directories mark the index dirty."""
+        if len(self.dirs) != len(self.previous):
+            self.dirty = True
+        self.previous = {}
@@ -0,0 +1,438 @@
+"""
+Pinned, persistent environments Serena is launched from.
+
+``uvx --from git+<repo>`` may resolve the git ref again on every launch,
+which makes each server cold start pay for a network round trip and
+possibly a rebuild. Instead the ref is resolved to a commit once, Serena
+is installed into ``~/.serena-cli/envs/<commit>``, and launch commands
+run that environment's ``serena`` entry point directly. The
+``envs/current`` link always points at the pinned environment, so
+clients configured with it follow `serena-cli upgrade` without being
+reconfigured.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import venv
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .toolchain import Toolchain
+
+logger = logging.getLogger(__name__)
+
+
+# Repository Serena is installed from
+SERENA_REPO_URL = "https://github.com/oraios/serena"
+
+# Ref pinned when none is given; HEAD is the repository's default branch
+DEFAULT_SERENA_REF = "HEAD"
+
+# Directory name inside the global ~/.serena-cli directory holding the environments
+ENVS_DIR = "envs"
+
+# Name of the link to the pinned environment inside ENVS_DIR
+CURRENT_ENV_LINK = "current"
+
+# Pin file inside ENVS_DIR, recording the ref and commit of the pinned environment
+PIN_FILE = "pin.json"
+
+# Written into an environment once Serena is fully installed in it
+ENV_COMPLETE_MARKER = ".serena-cli-complete"
+
+# Failure record inside ENVS_DIR of the last ensure() that could not pin
+FAILURE_FILE = "failure.json"
+
+# Seconds after a failed ensure() during which launches do not try again
+FAILURE_RETRY_SECONDS = 24 * 3600
+
+# Python version Serena supports (requires-python of the Serena project);
+# environments are created with this interpreter
+SERENA_PYTHON = "3.11"
+
+# Suffix of the lock file next to an environment, held while it is created or pruned
+ENV_LOCK_SUFFIX = ".lock"
+
+# Seconds `git ls-remote` may take
+LS_REMOTE_TIMEOUT = 30
+
+# Seconds creating an environment and installing Serena into it may take
+ENV_INSTALL_TIMEOUT = 1800
+
+_COMMIT_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+class SerenaEnvError(Exception):
+    """Raised when a ref cannot be resolved or an environment cannot be created."""
+
+
+def _bin_dir(env_dir: Path) -> Path:
+    """Get the scripts directory of a virtual environment."""
+    return env_dir / ("Scripts" if sys.platform == "win32" else "bin")
+
+
+def _executable(name: str) -> str:
+    """Get the file name of an entry point on this platform."""
+    return f"{name}.exe" if sys.platform == "win32" else name
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold an exclusive lock on a lock file, shared between processes.
+
+    Args:
+        path: Lock file, created if needed; it is never removed so that
+            every process locks the same file
+        blocking: Wait for the lock instead of giving up at once
+
+    Yields:
+        Whether the lock is held
+    """
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.1)
+        except OSError:
+            if blocking:
+                raise
+            yield False
+            return
+        yield True
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+class SerenaEnvironment:
+    """An environment Serena is installed in, at one commit."""
+
+    __slots__ = ("commit", "ref", "env_dir", "pinned_at")
+
+    def __init__(self, commit: str, ref: str, env_dir: Union[str, Path], pinned_at: float):
+        self.commit = commit
+        # Ref the commit was resolved from, e.g. "HEAD" or a tag
+        self.ref = ref
+        self.env_dir = Path(env_dir)
+        self.pinned_at = pinned_at
+
+    @property
+    def serena(self) -> str:
+        """Path of the environment's serena entry point."""
+        return str(_bin_dir(self.env_dir) / _executable("serena"))
+
+    @property
+    def complete(self) -> bool:
+        """Whether Serena was fully installed into the environment."""
+        return (self.env_dir / ENV_COMPLETE_MARKER).is_file()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the environment as a dict."""
+        return {"commit": self.commit, "ref": self.ref, "env_dir": str(self.env_dir), "pinned_at": self.pinned_at}
+
+
+def resolve_ref(ref: str = DEFAULT_SERENA_REF, repo: str = SERENA_REPO_URL) -> str:
+    """
+    Resolve a git ref of the Serena repository to a commit.
+
+    Args:
+        ref: Branch, tag, HEAD or full commit hash
+        repo: Repository URL or path
+
+    Returns:
+        The 40-character commit hash
+
+    Raises:
+        SerenaEnvError: If git fails or the ref does not exist
+    """
+    if _COMMIT_RE.match(ref):
+        return ref
+    git = shutil.which("git")
+    if git is None:
+        raise SerenaEnvError("git is required to resolve Serena refs")
+    try:
+        result = subprocess.run([git, "ls-remote", repo, ref, f"{ref}^{{}}"], capture_output=True, text=True,
+                                timeout=LS_REMOTE_TIMEOUT)
+    except subprocess.TimeoutExpired as e:
+        raise SerenaEnvError(f"git ls-remote {repo} timed out after {LS_REMOTE_TIMEOUT}s") from e
+    if result.returncode != 0:
+        raise SerenaEnvError(f"git ls-remote {repo} {ref} failed: {result.stderr.strip()}")
+
+    refs = {}
+    for line in result.stdout.splitlines():
+        commit, _, name = line.partition("\t")
+        refs[name] = commit
+    # Prefer the exact name, then the branch, then the peeled commit of an annotated tag
+    for name in (ref, f"refs/heads/{ref}", f"refs/tags/{ref}^{{}}", f"refs/tags/{ref}"):
+        if name in refs:
+            return refs[name]
+    if len(refs) == 1:
+        return next(iter(refs.values()))
+    raise SerenaEnvError(f"Ref {ref} not found in {repo}")
+
+
+class SerenaEnvironments:
+    """The environments under ~/.serena-cli/envs and the pin selecting one of them."""
+
+    def __init__(self, root: Optional[Union[str, Path]] = None, repo: str = SERENA_REPO_URL,
+                 toolchain: Optional[Toolchain] = None):
+        """
+        Initialize the environments; nothing is created until one is needed.
+
+        Args:
+            root: Directory holding the environments, ~/.serena-cli/envs by default
+            repo: Repository Serena is installed from
+            toolchain: Tools used to find uv
+        """
+        self.root = Path(root) if root is not None else Path.home() / ".serena-cli" / ENVS_DIR
+        self.repo = repo
+        self.toolchain = toolchain or Toolchain()
+
+    def pinned(self) -> Optional[SerenaEnvironment]:
+        """
+        Get the pinned environment.
+
+        Returns:
+            The environment, or None if nothing is pinned or its install did not finish
+        """
+        try:
+            with open(self.root / PIN_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            env = SerenaEnvironment(data["commit"], data["ref"], self.root / data["commit"], data["pinned_at"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable pin {self.root / PIN_FILE}: {e}")
+            return None
+        return env if env.complete else None
+
+    def ensure(self, ref: str = DEFAULT_SERENA_REF) -> SerenaEnvironment:
+        """
+        Get the pinned environment, pinning ref first if nothing is pinned yet.
+
+        A failed pin is recorded, and for FAILURE_RETRY_SECONDS later calls
+        fail at once instead of resolving and installing again; pin()
+        always tries.
+
+        Args:
+            ref: Ref to pin when there is no pin
+
+        Returns:
+            The pinned environment
+
+        Raises:
+            SerenaEnvError: If the ref cannot be resolved or installed, now or recently
+        """
+        env = self.pinned()
+        if env is not None:
+            return env
+        failure = self._recent_failure(ref)
+        if failure is not None:
+            raise SerenaEnvError(f"Pinning Serena {ref} failed recently, not retrying before "
+                                 f"`serena-cli upgrade`: {failure}")
+        try:
+            return self.pin(ref)
+        except (SerenaEnvError, OSError) as e:
+            self._record_failure(ref, str(e))
+            raise
+
+    def pin(self, ref: str = DEFAULT_SERENA_REF) -> SerenaEnvironment:
+        """
+        Resolve ref, install that commit if needed and make it the pinned environment.
+
+        Args:
+            ref: Branch, tag, HEAD or commit hash
+
+        Returns:
+            The newly pinned environment
+
+        Raises:
+            SerenaEnvError: If the ref cannot be resolved or installed
+        """
+        commit = resolve_ref(ref, self.repo)
+        env = SerenaEnvironment(commit, ref, self.root / commit, time.time())
+        if not env.complete:
+            self._create(env)
+
+        tmp_path = self.root / f"{PIN_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(env.to_dict(), f, indent=2)
+        os.replace(tmp_path, self.root / PIN_FILE)
+        self._link_current(commit)
+        try:
+            os.unlink(self.root / FAILURE_FILE)
+        except OSError:
+            pass
+        return env
+
+    def launch_command(self, *args: str) -> List[str]:
+        """
+        Get the command running serena from the pinned environment.
+
+        The path goes through the current link where the platform supports
+        it, so the command stays valid across upgrades.
+
+        Args:
+            args: Arguments of the serena command
+
+        Returns:
+            Command line for subprocess or an MCP client configuration
+
+        Raises:
+            SerenaEnvError: If no environment can be pinned
+        """
+        env = self.ensure()
+        current = _bin_dir(self.root / CURRENT_ENV_LINK) / _executable("serena")
+        serena = str(current) if current.exists() else env.serena
+        return [serena] + list(args)
+
+    def prune(self) -> List[str]:
+        """
+        Remove every environment except the pinned one.
+
+        Returns:
+            Commits whose environments were removed
+        """
+        env = self.pinned()
+        removed = []
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return removed
+        for entry in entries:
+            if (_COMMIT_RE.match(entry.name) and entry.is_dir(follow_symlinks=False)
+                    and (env is None or entry.name != env.commit)):
+                # Environments another process is creating are left alone
+                with _file_lock(self._lock_path(entry.name), blocking=False) as locked:
+                    if locked:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        removed.append(entry.name)
+        return sorted(removed)
+
+    def _recent_failure(self, ref: str) -> Optional[str]:
+        """Get the error of a failed pin of ref within FAILURE_RETRY_SECONDS, if any."""
+        try:
+            with open(self.root / FAILURE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["ref"] == ref and time.time() - data["failed_at"] < FAILURE_RETRY_SECONDS:
+                return str(data["error"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring unreadable failure record {self.root / FAILURE_FILE}: {e}")
+        return None
+
+    def _record_failure(self, ref: str, error: str):
+        """Record a failed pin; failures to record only cost a retry."""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / FAILURE_FILE, "w", encoding="utf-8") as f:
+                json.dump({"ref": ref, "error": error, "failed_at": time.time()}, f)
+        except OSError as e:
+            logger.debug(f"Cannot record failure in {self.root / FAILURE_FILE}: {e}")
+
+    def _link_current(self, commit: str):
+        """Point the current link at an environment, atomically where possible."""
+        link = self.root / CURRENT_ENV_LINK
+        tmp_link = self.root / f"{CURRENT_ENV_LINK}.{os.getpid()}.tmp"
+        try:
+            os.symlink(commit, tmp_link, target_is_directory=True)
+            os.replace(tmp_link, link)
+        except OSError as e:
+            # Without symlinks, launch commands use the commit path directly
+            logger.debug(f"Cannot link {link} to {commit}: {e}")
+            try:
+                os.unlink(tmp_link)
+            except OSError:
+                pass
+
+    def _lock_path(self, commit: str) -> Path:
+        """Get the lock file of an environment."""
+        return self.root / f"{commit}{ENV_LOCK_SUFFIX}"
+
+    def _create(self, env: SerenaEnvironment):
+        """
+        Create the environment and install Serena at its commit.
+
+        Concurrent launches serialize on the environment's lock file; the
+        ones that waited reuse the environment the first one installed.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self._lock_path(env.commit)):
+            if env.complete:
+                return
+            if env.env_dir.exists():
+                # Left over from an interrupted install
+                shutil.rmtree(env.env_dir)
+            try:
+                self._install(env)
+            except BaseException:
+                shutil.rmtree(env.env_dir, ignore_errors=True)
+                raise
+            (env.env_dir / ENV_COMPLETE_MARKER).write_text(f"{env.commit}\n", encoding="utf-8")
+
+    def _install(self, env: SerenaEnvironment):
+        """
+        Create a virtual environment on SERENA_PYTHON and install Serena into it.
+
+        uv finds or downloads that Python itself. Without uv, the running
+        interpreter is used if it is that version, otherwise
+        ``python<SERENA_PYTHON>`` from PATH; pip then installs into the new
+        environment.
+
+        Raises:
+            SerenaEnvError: If no suitable interpreter is found or a command fails
+        """
+        requirement = f"git+{self.repo}@{env.commit}"
+        python = str(_bin_dir(env.env_dir) / _executable("python"))
+        uv = self.toolchain.get("uv")
+        if uv.available:
+            commands = [
+                [uv.path, "venv", "--quiet", "--python", SERENA_PYTHON, str(env.env_dir)],
+                [uv.path, "pip", "install", "--quiet", "--python", python, requirement],
+            ]
+        elif f"{sys.version_info.major}.{sys.version_info.minor}" == SERENA_PYTHON:
+            venv.EnvBuilder(with_pip=True).create(str(env.env_dir))
+            commands = [[python, "-m", "pip", "install", "--quiet", requirement]]
+        else:
+            base = shutil.which(_executable(f"python{SERENA_PYTHON}"))
+            if base is None:
+                raise SerenaEnvError(f"Serena needs Python {SERENA_PYTHON}; install uv or python{SERENA_PYTHON}")
+            commands = [
+                [base, "-m", "venv", str(env.env_dir)],
+                [python, "-m", "pip", "install", "--quiet", requirement],
+            ]
+
+        for cmd in commands:
+            logger.info(f"Running {' '.join(cmd)}")
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=ENV_INSTALL_TIMEOUT)
+            except subprocess.TimeoutExpired as e:
+                raise SerenaEnvError(f"Installing Serena {env.commit[:12]} timed out") from e
+            except OSError as e:
+                raise SerenaEnvError(f"Cannot run {cmd[0]}: {e}") from e
+            if result.returncode != 0:
+                raise SerenaEnvError(f"Installing Serena {env.commit[:12]} failed: {result.stderr.strip()}")
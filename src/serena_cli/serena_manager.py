@@ -9,7 +9,16 @@ import platform
 import subprocess
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, Optional
+
+from .fs_probe import ProbePool
+from .project_detector import ProjectDetector
+from .project_registry import REGISTRY_FILE, ProjectRegistry
+from .install_planner import plan_install, run_plan, run_preflight
+from .install_probe import INSTALL_CACHE_FILE, invalidate_installation_cache, probe_serena_installation
+from .results import SerenaInstallation, SerenaStatus
+from .toolchain import TOOLCHAIN_CACHE_FILE, Toolchain
+from .wheelhouse import SERENA_SOURCE, WHEELHOUSE_TIMEOUT, WheelhouseError, load_wheelhouse
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +31,16 @@ class SerenaManager:
         self.config_dir = Path.home() / ".serena-cli"
         self.config_dir.mkdir(exist_ok=True)
         
+        # Filesystem checks and probes of the async API run here, off the event loop
+        self.async_pool = ProbePool(2, thread_name_prefix="serena-cli-manager")
+        
+        # Record of every project Serena is enabled in
+        self.registry = ProjectRegistry(self.config_dir / REGISTRY_FILE)
+        self.project_detector = ProjectDetector(use_scan_index=False)
+        
+        # Paths and versions of uv, pip and friends, probed once
+        self.toolchain = Toolchain(self.config_dir / TOOLCHAIN_CACHE_FILE)
+        
         # Check Python version compatibility
         self.python_version = self._get_python_version()
         self.is_python_compatible = self._check_python_compatibility()
@@ -40,11 +59,16 @@ class SerenaManager:
         major, minor = sys.version_info.major, sys.version_info.minor
         return major == 3 and minor >= 10
 
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the manager's pool and await its result."""
+        return await asyncio.wrap_future(self.async_pool.submit(fn, *args))
+
     async def enable_in_project(
         self, 
         project_path: str, 
         context: str = "ide-assistant",
-        force: bool = False
+        force: bool = False,
+        wheelhouse: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Enable Serena in the specified project.
@@ -53,6 +77,7 @@ class SerenaManager:
             project_path: Path to the project
             context: Serena context (e.g., 'ide-assistant')
             force: Force reinstallation
+            wheelhouse: Install offline from this wheelhouse directory only
             
         Returns:
             Dictionary with operation results
@@ -61,7 +86,8 @@ class SerenaManager:
             project_path = Path(project_path).resolve()
             
             # Check if Serena is already enabled
-            if not force and self._is_serena_enabled(project_path):
+            if not force and await self.run_blocking(self._is_serena_enabled, project_path):
+                await self.run_blocking(self._register_project, project_path)
                 return {
                     "status": "already_enabled",
                     "message": "Serena 已经在此项目中启用"
@@ -72,14 +98,15 @@ class SerenaManager:
                 logger.warning("Python 版本可能不兼容 Serena，但将继续尝试安装")
             
             # Install Serena if needed
-            install_result = await self._install_serena(force)
+            install_result = await self._install_serena(force, wheelhouse)
             if not install_result["success"]:
                 return install_result
             
             # Generate project configuration
-            config_result = self._generate_project_config(project_path, context)
+            config_result = await self.run_blocking(self._generate_project_config, project_path, context)
             if not config_result["success"]:
                 return config_result
+            await self.run_blocking(self._register_project, project_path, context)
             
             return {
                 "success": True,
@@ -97,13 +124,14 @@ class SerenaManager:
             logger.error(f"Error enabling Serena in project: {e}")
             return {"success": False, "error": str(e)}
 
-    def enable_serena(self, project_path: str, force: bool = False) -> dict:
+    def enable_serena(self, project_path: str, force: bool = False, wheelhouse: Optional[str] = None) -> dict:
         """
         Enable Serena in the specified project (synchronous version).
         
         Args:
             project_path: Path to the project
             force: Force enable even if Python version may not be compatible
+            wheelhouse: Install Serena offline from this wheelhouse directory first
             
         Returns:
             Dictionary with operation results
@@ -136,6 +164,7 @@ class SerenaManager:
             
             # Check if Serena is already enabled
             if self._is_serena_enabled(project_path):
+                self._register_project(project_path)
                 return {
                     "success": True,
                     "message": "Serena is already enabled in this project",
@@ -143,10 +172,17 @@ class SerenaManager:
                     "context": "ide-assistant"
                 }
             
+            # Install from the wheelhouse, which needs no network
+            if wheelhouse is not None and not self._is_serena_installed():
+                install_result = self.install_from_wheelhouse(wheelhouse)
+                if not install_result["success"]:
+                    return install_result
+            
             # Create project configuration
             config = self._generate_project_config(project_path, "ide-assistant")
             
-            if config:
+            if config.get("success"):
+                self._register_project(project_path, "ide-assistant")
                 return {
                     "success": True,
                     "message": "Serena enabled successfully",
@@ -164,7 +200,7 @@ class SerenaManager:
             logger.error(f"Error enabling Serena: {e}")
             return {"success": False, "error": str(e)}
 
-    def get_status_sync(self, project_path: str) -> dict:
+    def get_status_sync(self, project_path: str) -> SerenaStatus:
         """
         Get Serena status for the specified project (synchronous version).
         
@@ -172,44 +208,24 @@ class SerenaManager:
             project_path: Path to the project
             
         Returns:
-            Dictionary with status information
-        """
-        try:
-            project_path = Path(project_path).resolve()
-            
-            # Check if Serena is enabled
-            serena_enabled = self._is_serena_enabled(project_path)
-            
-            # Get project configuration
-            project_config = self._get_project_config(project_path)
+            Status of the project and the local installation
             
-            # Check if Serena is installed
-            serena_installed = self._is_serena_installed()
-            
-            # Get Python version
-            python_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
-            
-            status = {
-                "project_path": str(project_path),
-                "serena_enabled": serena_enabled,
-                "config_exists": bool(project_config),
-                "serena_installed": serena_installed,
-                "python_version": python_version,
-                "installation_method": "Not installed",
-                "serena_context": "Not configured"
-            }
-            
-            if serena_enabled and project_config:
-                status["installation_method"] = project_config.get("installation_method", "Unknown")
-                status["serena_context"] = project_config.get("serena_context", "Not specified")
-            
-            return status
-            
-        except Exception as e:
-            logger.error(f"Error getting Serena status: {e}")
-            return {"error": str(e)}
+        Raises:
+            OSError: If the project path cannot be resolved
+        """
+        project_path = Path(project_path).resolve()
+        
+        return SerenaStatus(
+            str(project_path),
+            self._is_serena_enabled(project_path),
+            self._has_project_config(project_path),
+            self.get_serena_installation(),
+            self._get_project_config(project_path),
+            self.python_version,
+            self.is_python_compatible,
+        )
 
-    async def get_status(self, project_path: str) -> Dict[str, Any]:
+    async def get_status(self, project_path: str) -> SerenaStatus:
         """
         Get Serena status for the specified project.
         
@@ -217,52 +233,51 @@ class SerenaManager:
             project_path: Path to the project
             
         Returns:
-            Dictionary with status information
-        """
-        try:
-            project_path = Path(project_path).resolve()
+            Status of the project and the local installation
             
-            status = {
-                "project_path": str(project_path),
-                "serena_enabled": self._is_serena_enabled(project_path),
-                "config_exists": self._has_project_config(project_path),
-                "serena_installed": self._is_serena_installed(),
-                "project_config": self._get_project_config(project_path),
-                "python_compatibility": {
-                    "version": self.python_version,
-                    "compatible": self.is_python_compatible,
-                    "recommended": "3.10+"
-                }
-            }
-            
-            return status
-            
-        except Exception as e:
-            logger.error(f"Error getting Serena status: {e}")
-            return {"error": str(e)}
+        Raises:
+            OSError: If the project path cannot be resolved
+        """
+        return await self.run_blocking(self.get_status_sync, project_path)
 
-    async def _install_serena(self, force: bool = False) -> Dict[str, Any]:
+    async def _install_serena(self, force: bool = False, wheelhouse: Optional[str] = None) -> Dict[str, Any]:
         """
         Install or update Serena.
         
         Args:
             force: Force reinstallation
+            wheelhouse: Install offline from this wheelhouse directory only
             
         Returns:
             Dictionary with installation results
         """
         try:
-            if not force and self._is_serena_installed():
+            if not force and await self.run_blocking(self._is_serena_installed):
                 return {"success": True, "message": "Serena 已安装"}
             
-            # Try to install using uv first
-            if self._is_uv_available():
-                result = await self._install_with_uv()
-                if result["success"]:
-                    return result
+            # Offline installs must not fall back to the network
+            if wheelhouse is not None:
+                return await self.run_blocking(self.install_from_wheelhouse, wheelhouse)
             
-            # Fallback to pip
-            result = await self._install_with_pip()
+            # Pick the one strategy that can work instead of trying them in turn
+            preflight = await self.run_blocking(run_preflight, SERENA_SOURCE, self.toolchain)
+            plan = plan_install(preflight, SERENA_SOURCE, self.toolchain)
+            logger.info(f"Install plan: {plan.strategy} ({plan.reason})")
+            if plan.command is None:
+                return {
+                    "success": False,
+                    "error": plan.reason,
+                    "preflight": preflight.to_dict(),
+                    "suggestions": [
+                        "检查网络连接，或使用 serena-cli wheelhouse build 构建离线安装包",
+                        "创建并激活虚拟环境: python -m venv .venv",
+                        "尝试手动安装: pip install git+https://github.com/oraios/serena",
+                    ]
+                }
+            
+            result = await run_plan(plan)
+            if result["success"]:
+                invalidate_installation_cache()
             return result
             
         except Exception as e:
@@ -279,122 +294,56 @@ class SerenaManager:
         serena_config = project_path / ".serena-cli" / "project.yml"
         return serena_config.exists()
 
+    def get_serena_installation(self) -> SerenaInstallation:
+        """
+        Get the installed Serena version and location without importing it.
+        
+        Returns:
+            Installation state, cached until packages are installed or removed
+        """
+        return probe_serena_installation(self.config_dir / INSTALL_CACHE_FILE)
+
     def _is_serena_installed(self) -> bool:
         """Check if Serena is installed."""
-        try:
-            # Try to import serena
-            import serena
-            return True
-        except ImportError:
-            return False
-
-    def _is_uv_available(self) -> bool:
-        """Check if uv is available."""
-        try:
-            result = subprocess.run(
-                ["uv", "--version"], 
-                capture_output=True, 
-                text=True,
-                timeout=10
-            )
-            return result.returncode == 0
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            return False
+        return self.get_serena_installation().installed
 
-    async def _install_with_uv(self) -> Dict[str, Any]:
-        """Install Serena using uv."""
-        try:
-            cmd = [
-                "uv", "pip", "install", "--from", 
-                "git+https://github.com/oraios/serena"
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=300)
+    def install_from_wheelhouse(self, directory: str) -> Dict[str, Any]:
+        """
+        Install Serena from a wheelhouse, without contacting any package index.
+        
+        Args:
+            directory: Wheelhouse built by `serena-cli wheelhouse build`
             
-            if process.returncode == 0:
-                return {"success": True, "message": "Serena 通过 uv 安装成功"}
-            else:
-                error_msg = stderr.decode() if stderr else "未知错误"
-                return {
-                    "success": False, 
-                    "error": f"uv 安装失败: {error_msg}",
-                    "fallback": "将尝试使用 pip 安装"
-                }
-                
-        except asyncio.TimeoutError:
-            return {
-                "success": False, 
-                "error": "uv 安装超时",
-                "fallback": "将尝试使用 pip 安装"
-            }
-        except Exception as e:
-            return {
-                "success": False, 
-                "error": f"uv 安装异常: {str(e)}",
-                "fallback": "将尝试使用 pip 安装"
-            }
-
-    async def _install_with_pip(self) -> Dict[str, Any]:
-        """Install Serena using pip."""
+        Returns:
+            Dictionary with installation results
+        """
         try:
-            # Try different installation methods
-            install_methods = [
-                # Method 1: Direct git install
-                [sys.executable, "-m", "pip", "install", "git+https://github.com/oraios/serena"],
-                # Method 2: With --user flag
-                [sys.executable, "-m", "pip", "install", "--user", "git+https://github.com/oraios/serena"],
-                # Method 3: With --break-system-packages (for newer Python versions)
-                [sys.executable, "-m", "pip", "install", "--break-system-packages", "git+https://github.com/oraios/serena"]
-            ]
-            
-            for i, cmd in enumerate(install_methods, 1):
-                try:
-                    logger.info(f"尝试安装方法 {i}: {' '.join(cmd)}")
-                    
-                    process = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    
-                    stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=300)
-                    
-                    if process.returncode == 0:
-                        return {
-                            "success": True, 
-                            "message": f"Serena 通过 pip 安装成功 (方法 {i})",
-                            "method": f"pip method {i}"
-                        }
-                    else:
-                        error_msg = stderr.decode() if stderr else "未知错误"
-                        logger.warning(f"安装方法 {i} 失败: {error_msg}")
-                        
-                except asyncio.TimeoutError:
-                    logger.warning(f"安装方法 {i} 超时")
-                except Exception as e:
-                    logger.warning(f"安装方法 {i} 异常: {e}")
-            
-            # All methods failed
+            wheelhouse = load_wheelhouse(directory)
+        except WheelhouseError as e:
+            return {"success": False, "error": str(e)}
+        
+        if not wheelhouse.compatible:
             return {
-                "success": False, 
-                "error": "所有安装方法都失败了",
-                "suggestions": [
-                    "检查网络连接",
-                    "确保 Python 版本兼容 (推荐 3.10+)",
-                    "尝试手动安装: pip install git+https://github.com/oraios/serena",
-                    "检查是否有权限问题"
-                ]
+                "success": False,
+                "error": (f"Wheelhouse was built for Python {wheelhouse.python_version} on {wheelhouse.platform}; "
+                          f"rebuild it with this interpreter"),
             }
-                
-        except Exception as e:
-            logger.error(f"Error in pip installation: {e}")
-            return {"success": False, "error": f"pip 安装异常: {str(e)}"}
+        
+        cmd = wheelhouse.install_command()
+        logger.info(f"Installing from wheelhouse: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=WHEELHOUSE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return {"success": False, "error": f"wheelhouse 安装异常: {e}"}
+        
+        if result.returncode != 0:
+            return {"success": False, "error": f"wheelhouse 安装失败: {result.stderr.strip()}"}
+        invalidate_installation_cache()
+        return {
+            "success": True,
+            "message": f"Serena 通过 wheelhouse 安装成功 ({wheelhouse.wheel})",
+            "method": "wheelhouse",
+        }
 
     def _generate_project_config(self, project_path: Path, context: str) -> Dict[str, Any]:
         """Generate project configuration."""
@@ -417,6 +366,22 @@ class SerenaManager:
             return {"success": False, "error": str(e)}
 
 
+    def _register_project(self, project_path: Path, context: Optional[str] = None) -> bool:
+        """
+        Record an enabled project in the global registry.
+        
+        Args:
+            project_path: Project root
+            context: Serena context, read from the project configuration if None
+            
+        Returns:
+            True if the project was recorded, False otherwise
+        """
+        if context is None:
+            context = (self._get_project_config(project_path) or {}).get("serena_context")
+        project_type = self.project_detector.detect_project_type(str(project_path))
+        return self.registry.register(project_path, context, project_type)
+
     def _get_project_config_template(self, project_path: Path, context: str) -> str:
         """Get project configuration template."""
         return f"""# Serena CLI 项目配置
@@ -443,6 +408,9 @@ included_tools:
 # 排除的工具
 excluded_tools: []
 
+# 项目扫描时排除的路径 (gitignore 语法)
+excluded_paths: []
+
 # 项目特定设置
 project_settings:
   language_servers: []
@@ -0,0 +1,188 @@
+"""
+Discovery of the external tools serena-cli drives: uv, uvx, pip and claude.
+
+Each tool is resolved on PATH and its version probed once per process.
+Probes of several tools run concurrently, and their results are kept in
+~/.serena-cli keyed by the executable's path, mtime and size, so later
+processes only stat the binaries until one of them is replaced.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .results import ToolInfo
+
+logger = logging.getLogger(__name__)
+
+
+# Tools probed when no names are given
+KNOWN_TOOLS = ("uv", "uvx", "pip", "claude")
+
+# Cache file name inside the global ~/.serena-cli directory
+TOOLCHAIN_CACHE_FILE = "toolchain.json"
+
+# Bump whenever the cache layout changes; older caches are discarded
+TOOLCHAIN_CACHE_VERSION = 1
+
+# Seconds a single `<tool> --version` may take
+TOOL_PROBE_TIMEOUT = 10.0
+
+# First dotted version number in a tool's --version output
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)+[\w.+-]*")
+
+
+def _parse_version(output: str) -> Optional[str]:
+    """Extract the version number from --version output."""
+    match = _VERSION_RE.search(output)
+    return match.group(0) if match else None
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """Get the (mtime_ns, size) of an executable, following symlinks."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Toolchain:
+    """Resolved paths and versions of external tools, shared by wizard, installer and status."""
+
+    def __init__(self, cache_path: Optional[Union[str, Path]] = None, probe_timeout: float = TOOL_PROBE_TIMEOUT):
+        """
+        Initialize the toolchain; nothing is resolved until a tool is asked for.
+
+        Args:
+            cache_path: JSON cache file, ~/.serena-cli/toolchain.json by default
+            probe_timeout: Seconds a version probe may take
+        """
+        self.cache_path = (Path(cache_path) if cache_path is not None
+                           else Path.home() / ".serena-cli" / TOOLCHAIN_CACHE_FILE)
+        self.probe_timeout = probe_timeout
+        self._tools: Dict[str, ToolInfo] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ToolInfo:
+        """
+        Get one tool.
+
+        Args:
+            name: Executable name, e.g. "uv"
+
+        Returns:
+            The tool; unavailable if it is missing or its probe failed
+        """
+        return self.discover((name,))[name]
+
+    def discover(self, names: Iterable[str] = KNOWN_TOOLS, refresh: bool = False) -> Dict[str, ToolInfo]:
+        """
+        Resolve several tools, probing the versions of unknown binaries concurrently.
+
+        Args:
+            names: Executable names
+            refresh: Resolve again even if this process already did
+
+        Returns:
+            Name -> tool, in the order given
+        """
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            known = {} if refresh else {name: self._tools[name] for name in names if name in self._tools}
+        missing = [name for name in names if name not in known]
+        if missing:
+            found = self._resolve(missing)
+            with self._lock:
+                self._tools.update(found)
+            known.update(found)
+        return {name: known[name] for name in names}
+
+    def invalidate(self):
+        """Forget the tools resolved by this process, e.g. after installing one."""
+        with self._lock:
+            self._tools.clear()
+
+    def _resolve(self, names: List[str]) -> Dict[str, ToolInfo]:
+        """Resolve tools through PATH, the disk cache and version probes."""
+        cache = self._read_cache()
+        tools: Dict[str, ToolInfo] = {}
+        to_probe: List[Tuple[str, str, Tuple[int, int]]] = []
+        for name in names:
+            path = shutil.which(name)
+            stat_key = _stat_key(path) if path else None
+            if stat_key is None:
+                tools[name] = ToolInfo(name)
+                continue
+            entry = cache.get(path)
+            if entry is not None and (entry.get("mtime_ns"), entry.get("size")) == stat_key:
+                tools[name] = ToolInfo(name, path, entry.get("version"), bool(entry.get("available")))
+            else:
+                to_probe.append((name, path, stat_key))
+
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=len(to_probe), thread_name_prefix="serena-cli-toolchain") as pool:
+                results = list(pool.map(lambda item: self._probe(item[0], item[1]), to_probe))
+            for (name, path, stat_key), (tool, cacheable) in zip(to_probe, results):
+                tools[name] = tool
+                if cacheable:
+                    cache[path] = {"mtime_ns": stat_key[0], "size": stat_key[1],
+                                   "version": tool.version, "available": tool.available}
+            self._write_cache(cache)
+        return tools
+
+    def _probe(self, name: str, path: str) -> Tuple[ToolInfo, bool]:
+        """
+        Run `<tool> --version`.
+
+        Returns:
+            The tool, and whether the outcome is worth persisting (timeouts are not)
+        """
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True,
+                                    timeout=self.probe_timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{name} --version timed out after {self.probe_timeout}s")
+            return ToolInfo(name, path), False
+        except OSError as e:
+            logger.debug(f"Cannot run {path}: {e}")
+            return ToolInfo(name, path), True
+        if result.returncode != 0:
+            return ToolInfo(name, path), True
+        return ToolInfo(name, path, _parse_version(result.stdout or result.stderr), True), True
+
+    def _read_cache(self) -> Dict[str, Dict[str, object]]:
+        """Read the persisted probes, keyed by executable path."""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != TOOLCHAIN_CACHE_VERSION:
+                return {}
+            return dict(data["tools"])
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.debug(f"Discarding unreadable toolchain cache {self.cache_path}: {e}")
+            return {}
+
+    def _write_cache(self, tools: Dict[str, Dict[str, object]]):
+        """Persist the probes atomically; failures only cost a re-probe later."""
+        tmp_path = f"{os.fspath(self.cache_path)}.{os.getpid()}.tmp"
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": TOOLCHAIN_CACHE_VERSION, "tools": tools}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.debug(f"Cannot write toolchain cache {self.cache_path}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
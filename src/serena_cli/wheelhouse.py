@@ -0,0 +1,190 @@
+"""
+Local wheelhouses for installing Serena without network access.
+
+A wheelhouse is a directory of wheels for Serena and all of its
+dependencies, built once with pip on a machine that can reach the
+package index and the Serena repository. Hosts without outbound network
+then install with ``pip install --no-index --find-links <dir>``, which
+needs neither a git clone nor a build.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Where Serena is installed from when no wheelhouse is used
+SERENA_SOURCE = "git+https://github.com/oraios/serena"
+
+# Default wheelhouse directory name inside the global ~/.serena-cli directory
+WHEELHOUSE_DIR = "wheelhouse"
+
+# Manifest describing what a wheelhouse was built from and for
+WHEELHOUSE_MANIFEST = "wheelhouse.json"
+
+# Bump whenever the manifest layout changes
+WHEELHOUSE_MANIFEST_VERSION = 1
+
+# Seconds a pip wheel or pip install run may take
+WHEELHOUSE_TIMEOUT = 1800
+
+
+class WheelhouseError(Exception):
+    """Raised when a wheelhouse cannot be built or read."""
+
+
+def default_wheelhouse_dir() -> Path:
+    """Get the default wheelhouse directory, ~/.serena-cli/wheelhouse."""
+    return Path.home() / ".serena-cli" / WHEELHOUSE_DIR
+
+
+def _python_tag() -> str:
+    """Get the major.minor version of the running interpreter."""
+    return f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def _distribution_name(wheel_file: str) -> str:
+    """Get the project name of a wheel from its file name."""
+    return wheel_file.split("-", 1)[0].replace("_", "-")
+
+
+class Wheelhouse:
+    """A directory of wheels Serena can be installed from offline."""
+
+    __slots__ = ("directory", "requirement", "wheel", "source", "python_version", "platform", "built_at")
+
+    def __init__(self, directory: Union[str, Path], requirement: str, wheel: str, source: str,
+                 python_version: str, platform: str, built_at: float):
+        self.directory = Path(directory)
+        # Project name the wheelhouse installs, e.g. "serena-agent"
+        self.requirement = requirement
+        # File name of the project's own wheel
+        self.wheel = wheel
+        self.source = source
+        # Interpreter version and platform the wheels were resolved for
+        self.python_version = python_version
+        self.platform = platform
+        self.built_at = built_at
+
+    @property
+    def compatible(self) -> bool:
+        """Whether the wheels were resolved for the running interpreter and platform."""
+        return self.python_version == _python_tag() and self.platform == sysconfig.get_platform()
+
+    def install_command(self) -> List[str]:
+        """Get the pip command installing into the running interpreter from this wheelhouse only."""
+        return [
+            sys.executable, "-m", "pip", "install",
+            "--no-index", "--find-links", str(self.directory), self.requirement,
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the manifest as a dict."""
+        return {
+            "version": WHEELHOUSE_MANIFEST_VERSION,
+            "requirement": self.requirement,
+            "wheel": self.wheel,
+            "source": self.source,
+            "python_version": self.python_version,
+            "platform": self.platform,
+            "built_at": self.built_at,
+        }
+
+
+def load_wheelhouse(directory: Union[str, Path]) -> Wheelhouse:
+    """
+    Read a wheelhouse built by build_wheelhouse().
+
+    Args:
+        directory: Wheelhouse directory
+
+    Returns:
+        The wheelhouse
+
+    Raises:
+        WheelhouseError: If the directory holds no usable manifest
+    """
+    directory = Path(directory)
+    try:
+        with open(directory / WHEELHOUSE_MANIFEST, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != WHEELHOUSE_MANIFEST_VERSION:
+            raise WheelhouseError(f"Unsupported wheelhouse manifest version in {directory}")
+        wheelhouse = Wheelhouse(directory, data["requirement"], data["wheel"], data["source"],
+                                data["python_version"], data["platform"], data["built_at"])
+    except (OSError, ValueError, KeyError) as e:
+        raise WheelhouseError(f"No wheelhouse in {directory}: {e}") from e
+    if not (directory / wheelhouse.wheel).is_file():
+        raise WheelhouseError(f"Wheelhouse {directory} is missing {wheelhouse.wheel}")
+    return wheelhouse
+
+
+def _run_pip(args: List[str], timeout: float):
+    """Run the running interpreter's pip, raising WheelhouseError with its output on failure."""
+    cmd = [sys.executable, "-m", "pip"] + args
+    logger.info(f"Running {' '.join(cmd)}")
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise WheelhouseError(f"pip {args[0]} timed out after {timeout}s") from e
+    except OSError as e:
+        raise WheelhouseError(f"Cannot run pip: {e}") from e
+    if result.returncode != 0:
+        raise WheelhouseError(f"pip {args[0]} failed: {(result.stderr or result.stdout).strip()}")
+
+
+def build_wheelhouse(
+    directory: Union[str, Path],
+    source: str = SERENA_SOURCE,
+    build_isolation: bool = True,
+    timeout: float = WHEELHOUSE_TIMEOUT
+) -> Wheelhouse:
+    """
+    Build Serena and its dependencies into a wheelhouse for the running interpreter.
+
+    The project wheel is built alone first, so its name is known without
+    guessing; pip then resolves its dependencies into the same directory.
+
+    Args:
+        directory: Wheelhouse directory, created if needed
+        source: pip requirement or path Serena is built from
+        build_isolation: Build source distributions in isolated environments
+        timeout: Seconds each pip run may take
+
+    Returns:
+        The wheelhouse
+
+    Raises:
+        WheelhouseError: If pip fails
+    """
+    directory = Path(directory).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    isolation = [] if build_isolation else ["--no-build-isolation"]
+
+    with tempfile.TemporaryDirectory(prefix="serena-cli-wheel-") as tmp_dir:
+        _run_pip(["wheel", "--no-deps", "--wheel-dir", tmp_dir] + isolation + [source], timeout)
+        built = [name for name in os.listdir(tmp_dir) if name.endswith(".whl")]
+        if len(built) != 1:
+            raise WheelhouseError(f"Expected one wheel from {source}, got {len(built)}")
+        wheel = built[0]
+        shutil.move(os.path.join(tmp_dir, wheel), str(directory / wheel))
+
+    # Resolving from the built wheel fetches the dependencies without rebuilding the project
+    _run_pip(["wheel", "--wheel-dir", str(directory), "--find-links", str(directory)] + isolation
+             + [str(directory / wheel)], timeout)
+
+    wheelhouse = Wheelhouse(directory, _distribution_name(wheel), wheel, source,
+                            _python_tag(), sysconfig.get_platform(), time.time())
+    with open(directory / WHEELHOUSE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(wheelhouse.to_dict(), f, indent=2)
+    return wheelhouse
@@ -0,0 +1,123 @@
+"""
+Tests for archive listings and archive project info.
+"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from serena_cli.archive_listing import ArchiveListing, ArchiveTree, MemoryListing, open_listing
+from serena_cli.project_detector import ProjectDetector
+
+
+FILES = {
+    "pyproject.toml": b"[project]\n",
+    "README.md": b"# demo\n",
+    "src/demo/__init__.py": b"x = 1\n",
+    "src/demo/core.rs": b"fn main() {}\n",
+    "web/package.json": b"{}",
+    "node_modules/dep/index.js": b"module.exports = 1\n",
+}
+
+
+def _write_zip(path, prefix=""):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in FILES.items():
+            archive.writestr(prefix + name, data)
+
+
+def _write_tar(path, mode, prefix=""):
+    with tarfile.open(path, mode) as archive:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(prefix + name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+class TestArchiveListing:
+    """Test cases for archive listings and ProjectDetector.get_archive_info."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.detector = ProjectDetector()
+
+    def test_tree_strips_single_top_level_directory(self):
+        """Test that a release-style top-level directory becomes the root."""
+        tree = ArchiveTree.from_members(MemoryListing({
+            "demo-1.0/": 0,
+            "demo-1.0/setup.py": 10,
+            "demo-1.0/pkg/a.py": 5,
+            "../escape.py": 1,
+        }).members())
+
+        assert tree.prefix == "demo-1.0/"
+        assert tree.files == [("pkg/a.py", 5), ("setup.py", 10)]
+        assert tree.root_names == {"pkg", "setup.py"}
+        assert tree.root_dirs == {"pkg"}
+
+    def test_zip_info(self, tmp_path):
+        """Test project info computed from a zip's central directory."""
+        path = tmp_path / "demo.zip"
+        _write_zip(path, "demo-1.0/")
+
+        info = self.detector.get_project_info(str(path))
+
+        assert info.name == "demo.zip"
+        assert info.type == "python"
+        assert info.languages == ["Python", "Rust"]
+        assert info.size.total_files == 5
+        assert info.coverage.complete
+        assert [child.path for child in info.subprojects.children] == ["web"]
+
+    @pytest.mark.parametrize("suffix,mode", [(".tar.gz", "w:gz"), (".tar.xz", "w:xz"), (".tar", "w")])
+    def test_tar_info(self, tmp_path, suffix, mode):
+        """Test project info streamed from tar archives."""
+        path = tmp_path / f"demo{suffix}"
+        _write_tar(path, mode)
+
+        info = self.detector.get_project_info(str(path))
+
+        assert info.type == "python"
+        assert info.size.total_size_bytes == sum(
+            len(data) for name, data in FILES.items() if not name.startswith("node_modules/"))
+
+    def test_tar_zst(self, tmp_path):
+        """Test zstd-compressed tarballs when zstandard is installed."""
+        zstandard = pytest.importorskip("zstandard")
+        tar_path = tmp_path / "demo.tar"
+        _write_tar(tar_path, "w")
+        path = tmp_path / "demo.tar.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(tar_path.read_bytes()))
+
+        assert self.detector.get_project_info(str(path)).type == "python"
+
+    def test_memory_listing(self):
+        """Test the in-memory backend, including budgets and breakdowns."""
+        listing = MemoryListing({"Cargo.toml": 10, "README.md": 5, "src/main.rs": 100, "src/lib.rs": 50})
+
+        info = self.detector.get_archive_info(listing, top_k=1)
+        assert info.type == "rust"
+        assert info.breakdown.to_dict()["largest_files"][0]["path"] == "src/main.rs"
+
+        partial = self.detector.get_archive_info(listing, max_files=2)
+        assert not partial.coverage.complete
+        assert partial.size.total_files == 2
+
+    def test_not_a_project_or_unreadable(self, tmp_path):
+        """Test that archives without indicators or with bad data yield None."""
+        assert self.detector.get_archive_info(MemoryListing({"notes.txt": 3})) is None
+
+        broken = tmp_path / "broken.tar.gz"
+        broken.write_bytes(b"not a tarball")
+        assert self.detector.get_project_info(str(broken)) is None
+        assert open_listing(str(tmp_path / "a.whl")).__class__.__name__ == "ZipListing"
+
+    def test_listing_requires_members(self):
+        """Test that a listing without members() cannot be created."""
+        class Incomplete(ArchiveListing):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete("incomplete.zip")
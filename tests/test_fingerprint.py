@@ -0,0 +1,153 @@
+"""
+Tests for project fingerprints.
+"""
+
+import os
+
+from serena_cli.fingerprint import compute_fingerprint, read_git_state
+from serena_cli.ignore_rules import IgnoreRules
+from serena_cli.project_detector import ProjectDetector
+from serena_cli.project_scanner import ScanBudget
+
+
+OLD_NS = 1_000_000_000
+
+
+def _make_tree(root):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "node_modules" / "dep").mkdir(parents=True)
+    (root / "src" / "pkg" / "a.py").write_text("a = 1\n")
+    (root / "docs" / "index.md").write_text("# docs\n")
+    (root / "README.md").write_text("# test\n")
+
+
+def _age(root):
+    """Move every mtime out of the racy window."""
+    for directory, _, names in os.walk(root):
+        for name in names:
+            os.utime(os.path.join(directory, name), ns=(OLD_NS, OLD_NS))
+        os.utime(directory, ns=(OLD_NS, OLD_NS))
+
+
+class TestFingerprint:
+    """Test cases for compute_fingerprint and ProjectDetector.fingerprint."""
+
+    def test_stable_and_sensitive_to_edits(self, tmp_path):
+        """Test that an unchanged tree keeps its digest and an in-place edit changes it."""
+        _make_tree(tmp_path)
+        first = compute_fingerprint(str(tmp_path))
+
+        assert compute_fingerprint(str(tmp_path)).digest == first.digest
+        assert compute_fingerprint(str(tmp_path), first) == first
+
+        (tmp_path / "src" / "pkg" / "a.py").write_text("a = 22\n")
+        second = compute_fingerprint(str(tmp_path), first)
+
+        assert second.digest != first.digest
+        assert second.changed_dirs(first) == ["src/pkg"]
+
+    def test_changed_dirs_reports_added_and_removed(self, tmp_path):
+        """Test that added and removed directories are named."""
+        _make_tree(tmp_path)
+        first = compute_fingerprint(str(tmp_path), files=False)
+
+        (tmp_path / "docs" / "index.md").unlink()
+        (tmp_path / "docs").rmdir()
+        (tmp_path / "src" / "new").mkdir()
+        second = compute_fingerprint(str(tmp_path), first, files=False)
+
+        assert second.changed_dirs(first) == ["", "docs", "src", "src/new"]
+
+    def test_directory_mode_reuses_listings(self, tmp_path, monkeypatch):
+        """Test that unchanged directories are not listed again."""
+        _make_tree(tmp_path)
+        _age(tmp_path)
+        first = compute_fingerprint(str(tmp_path), files=False)
+        listed = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or real_scandir(path))
+
+        second = compute_fingerprint(str(tmp_path), first, files=False)
+
+        assert second.digest == first.digest
+        assert listed == []
+
+    def test_skip_dirs(self, tmp_path):
+        """Test that skipped directories do not affect the digest."""
+        _make_tree(tmp_path)
+        skip = frozenset({"node_modules"})
+        first = compute_fingerprint(str(tmp_path), skip_dirs=skip)
+
+        (tmp_path / "node_modules" / "dep" / "index.js").write_text("x")
+
+        assert compute_fingerprint(str(tmp_path), first, skip_dirs=skip) == first
+        assert "node_modules" not in first.nodes
+
+    def test_ignore_rules(self, tmp_path):
+        """Test that what the rules and ignore files exclude does not affect the digest."""
+        _make_tree(tmp_path)
+        (tmp_path / ".gitignore").write_text("*.log\n")
+        (tmp_path / "src" / ".gitignore").write_text("gen/\n")
+        (tmp_path / "src" / "gen").mkdir()
+        (tmp_path / "build").mkdir()
+        _age(tmp_path)
+        rules = IgnoreRules().extend(["build/"])
+        first = compute_fingerprint(str(tmp_path), files=False, rules=rules, ignore_files=True)
+        assert "build" not in first.nodes and "src/gen" not in first.nodes
+
+        # Listings reused from the previous fingerprint keep the nested ignore file's rules
+        (tmp_path / "src" / "gen" / "out").mkdir()
+        (tmp_path / "build" / "lib").mkdir()
+        second = compute_fingerprint(str(tmp_path), first, files=False, rules=rules, ignore_files=True)
+        assert second.digest == first.digest
+
+        with_files = compute_fingerprint(str(tmp_path), rules=rules, ignore_files=True)
+        (tmp_path / "debug.log").write_text("x")
+        assert compute_fingerprint(str(tmp_path), rules=rules, ignore_files=True).digest == with_files.digest
+
+    def test_budget(self, tmp_path):
+        """Test that an exhausted budget stops the walk."""
+        _make_tree(tmp_path)
+        budget = ScanBudget(max_seconds=0)
+
+        assert compute_fingerprint(str(tmp_path), budget=budget) is None
+        assert budget.stopped_by == "time"
+
+    def test_git_shortcut(self, tmp_path):
+        """Test that an unchanged HEAD and index reuse the previous fingerprint."""
+        _make_tree(tmp_path)
+        (tmp_path / ".git" / "refs" / "heads").mkdir(parents=True)
+        (tmp_path / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        (tmp_path / ".git" / "refs" / "heads" / "main").write_text("a" * 40 + "\n")
+        (tmp_path / ".git" / "index").write_bytes(b"DIRC")
+        first = compute_fingerprint(str(tmp_path), use_git=True)
+
+        assert read_git_state(str(tmp_path))[:2] == ("ref: refs/heads/main", "a" * 40)
+        assert compute_fingerprint(str(tmp_path), first, use_git=True) is first
+
+        (tmp_path / ".git" / "refs" / "heads" / "main").write_text("b" * 40 + "\n")
+        assert compute_fingerprint(str(tmp_path), first, use_git=True) != first
+
+    def test_detector_fingerprint(self, tmp_path):
+        """Test the detector API and its default skipped directories."""
+        _make_tree(tmp_path)
+        detector = ProjectDetector()
+
+        first = detector.fingerprint(str(tmp_path))
+        (tmp_path / "node_modules" / "dep" / "index.js").write_text("x")
+
+        assert detector.fingerprint(str(tmp_path), first) == first
+        assert detector.fingerprint(str(tmp_path / "missing")) is None
+
+    def test_detector_fingerprint_follows_scan_excludes(self, tmp_path):
+        """Test that the detector leaves out what its scans exclude."""
+        _make_tree(tmp_path)
+        (tmp_path / ".gitignore").write_text("dist/\n")
+        (tmp_path / "dist").mkdir()
+        detector = ProjectDetector()
+
+        first = detector.fingerprint(str(tmp_path))
+        (tmp_path / "dist" / "app.bin").write_text("x")
+
+        assert detector.fingerprint(str(tmp_path), first).digest == first.digest
@@ -0,0 +1,160 @@
+"""
+Tests for filesystem probes and slow-mount detection.
+"""
+
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from serena_cli.fs_probe import FilesystemProbe, MountInfo, ProbeTimeout, find_mount, parse_mountinfo
+from serena_cli.project_detector import ProjectDetector
+from serena_cli.project_scanner import ProjectScanner
+
+
+MOUNTINFO = """\
+28 1 254:0 / / rw,relatime - ext4 /dev/vda rw
+40 28 0:50 / /home/dev\\040work rw,relatime shared:1 - nfs4 server:/export rw,vers=4.2
+41 40 0:51 / /home/dev\\040work/remote rw - fuse.sshfs dev@host:/src rw
+bad line
+"""
+
+
+def _write_mountinfo(tmp_path, fs_type):
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(f"28 1 254:0 / / rw - ext4 /dev/vda rw\n40 28 0:50 / {tmp_path} rw - {fs_type} srv:/x rw\n")
+    return str(mountinfo)
+
+
+def _make_project(path):
+    (path / "src").mkdir()
+    (path / "README.md").write_text("# test")
+    (path / "src" / "main.py").write_text("print('hi')\n")
+
+
+class TestFilesystemProbe:
+    """Test cases for FilesystemProbe and the mount table helpers."""
+
+    def test_parse_mountinfo(self):
+        """Test mount point unescaping, optional fields and malformed lines."""
+        mounts = parse_mountinfo(MOUNTINFO)
+
+        assert mounts == [
+            MountInfo("/", "ext4", "/dev/vda"),
+            MountInfo("/home/dev work", "nfs4", "server:/export"),
+            MountInfo("/home/dev work/remote", "fuse.sshfs", "dev@host:/src"),
+        ]
+        assert [mount.network for mount in mounts] == [False, True, True]
+
+    def test_find_mount(self):
+        """Test that the innermost mount wins and prefixes respect path components."""
+        mounts = parse_mountinfo(MOUNTINFO)
+
+        assert find_mount("/home/dev work/remote/a", mounts).fs_type == "fuse.sshfs"
+        assert find_mount("/home/dev work", mounts).fs_type == "nfs4"
+        assert find_mount("/home/dev workshop", mounts).fs_type == "ext4"
+        assert find_mount("/x", []) is None
+
+    def test_call_timeout(self, tmp_path):
+        """Test that a hung call raises ProbeTimeout and marks its mount slow."""
+        probe = FilesystemProbe(timeout=0.05, mountinfo_path=_write_mountinfo(tmp_path, "nfs"))
+        release = threading.Event()
+
+        with pytest.raises(ProbeTimeout):
+            probe.call(str(tmp_path), release.wait)
+        release.set()
+
+        assert probe.call(str(tmp_path), len, "abc") == 3
+        assert probe.is_slow(str(tmp_path / "project"))
+
+    def test_call_timeout_on_local_mount(self, tmp_path, caplog):
+        """Test that a hung call on a local disk raises ProbeTimeout without marking the mount slow."""
+        probe = FilesystemProbe(timeout=0.05, mountinfo_path=_write_mountinfo(tmp_path, "ext4"))
+        release = threading.Event()
+
+        with pytest.raises(ProbeTimeout):
+            probe.call(str(tmp_path), release.wait)
+        release.set()
+
+        assert "Slow filesystem" not in caplog.text
+
+    def test_is_slow_ignores_local_mounts(self, tmp_path):
+        """Test that only network filesystems are reported as slow."""
+        probe = FilesystemProbe(slow_seconds=0, mountinfo_path=_write_mountinfo(tmp_path, "ext4"))
+
+        assert not probe.is_slow(str(tmp_path))
+
+    def test_project_info_degraded_on_slow_mount(self, tmp_path):
+        """Test that a project on a slow network mount gets an indicator-only scan."""
+        _make_project(tmp_path)
+        detector = ProjectDetector(use_scan_index=False)
+        detector.fs_probe = FilesystemProbe(slow_seconds=0, mountinfo_path=_write_mountinfo(tmp_path, "nfs"))
+
+        info = detector.get_project_info(str(tmp_path))
+
+        assert info.coverage.degraded is True
+        assert info.coverage.complete is False
+        assert info.size.total_files == 0
+
+    def test_project_info_on_responsive_network_mount(self, tmp_path):
+        """Test that a fast network mount is scanned in full."""
+        _make_project(tmp_path)
+        detector = ProjectDetector(use_scan_index=False)
+        detector.fs_probe = FilesystemProbe(mountinfo_path=_write_mountinfo(tmp_path, "nfs"))
+
+        info = detector.get_project_info(str(tmp_path))
+
+        assert info.coverage.degraded is False
+        assert info.languages == ["Python"]
+
+    @pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                        reason="workers must inherit the slowed-down scanner")
+    def test_sharded_scan_on_network_mount_keeps_heartbeat(self, tmp_path, monkeypatch):
+        """Test that worker progress keeps a sharded scan longer than the probe timeout alive."""
+        _make_project(tmp_path)
+        for top in ("a", "b"):
+            for i in range(10):
+                (tmp_path / top / f"d{i}").mkdir(parents=True)
+                (tmp_path / top / f"d{i}" / "mod.py").write_text("x = 1\n")
+        real_visit = ProjectScanner._visit_directory
+
+        def slow_visit(self, *args):
+            time.sleep(0.05)
+            return real_visit(self, *args)
+
+        monkeypatch.setattr(ProjectScanner, "_visit_directory", slow_visit)
+        detector = ProjectDetector(use_scan_index=False, jobs=2)
+        detector.fs_probe = FilesystemProbe(timeout=0.3, mountinfo_path=_write_mountinfo(tmp_path, "nfs"))
+
+        info = detector.get_project_info(str(tmp_path))
+
+        assert info.coverage.degraded is False
+        assert info.coverage.complete is True
+        # The 20 modules, README.md, src/main.py and the mountinfo file
+        assert info.size.total_files == 23
+        assert not detector.fs_probe.is_slow(str(tmp_path))
+
+    def test_discovery_skips_only_hung_directories(self, tmp_path, monkeypatch):
+        """Test that a hung listing does not cancel the siblings queued behind it."""
+        for name in ("hang1", "hang2", "ok1", "ok2"):
+            (tmp_path / name).mkdir()
+            _make_project(tmp_path / name)
+        real_probe = ProjectDetector._probe_directory
+
+        def probe(self, path):
+            if path == tmp_path:
+                # Queue the hung directories first so they take both workers
+                _, _, key = real_probe(self, path)
+                return False, [path / name for name in ("hang1", "hang2", "ok1", "ok2")], key
+            if path.name.startswith("hang"):
+                time.sleep(0.6)
+            return real_probe(self, path)
+
+        monkeypatch.setattr(ProjectDetector, "_probe_directory", probe)
+        detector = ProjectDetector(use_scan_index=False)
+        detector.fs_probe = FilesystemProbe(timeout=0.2, mountinfo_path=_write_mountinfo(tmp_path, "ext4"))
+
+        projects = detector.list_projects_in_directory(str(tmp_path), max_depth=1, max_workers=2)
+
+        assert projects == [str(tmp_path / "ok1"), str(tmp_path / "ok2")]
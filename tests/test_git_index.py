@@ -0,0 +1,90 @@
+"""
+Tests for the git index reader.
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from serena_cli.git_index import GitIndexError, find_git_index, iter_git_index
+from serena_cli.project_scanner import ProjectScanner
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Create a git checkout with tracked and untracked files."""
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "main.py").write_text("print('hi')\n")
+    (tmp_path / "lib.rs").write_text("fn main() {}\n")
+    (tmp_path / "untracked.go").write_text("package main\n")
+    _git(tmp_path, "add", "src", "lib.rs")
+    return tmp_path
+
+
+class TestGitIndex:
+    """Test cases for the git index reader."""
+
+    @pytest.mark.parametrize("eoie", ["false", "true"])
+    @pytest.mark.parametrize("version", ["2", "3", "4"])
+    def test_iter_git_index(self, repo, version, eoie):
+        """Test that every supported index version lists tracked files."""
+        _git(repo, "-c", f"index.recordEndOfIndexEntries={eoie}", "update-index", "--index-version", version)
+
+        entries = list(iter_git_index(find_git_index(repo)))
+
+        assert [entry.path for entry in entries] == ["lib.rs", "src/pkg/main.py"]
+        assert [entry.size for entry in entries] == [13, 12]
+
+    def test_split_index_is_rejected(self, repo):
+        """Test that a split index is reported instead of read partially."""
+        _git(repo, "update-index", "--split-index")
+
+        with pytest.raises(GitIndexError):
+            list(iter_git_index(find_git_index(repo)))
+
+    @pytest.mark.parametrize("eoie", ["false", "true"])
+    def test_sparse_index_is_rejected_before_entries(self, repo, eoie):
+        """Test that a sparse index fails before any of its entries are yielded."""
+        _git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "init")
+        _git(repo, "-c", f"index.recordEndOfIndexEntries={eoie}", "sparse-checkout", "init", "--cone", "--sparse-index")
+        _git(repo, "-c", f"index.recordEndOfIndexEntries={eoie}", "sparse-checkout", "set", "other")
+
+        with pytest.raises(GitIndexError):
+            next(iter_git_index(find_git_index(repo)))
+
+    def test_find_git_index_without_repository(self, tmp_path):
+        """Test that non-git directories have no index."""
+        assert find_git_index(tmp_path) is None
+
+    def test_scanner_uses_git_index(self, repo):
+        """Test tracked-only and tracked-plus-untracked scans."""
+        tracked = ProjectScanner().scan(repo)
+        assert tracked.total_files == 2
+        assert tracked.languages() == ["Python", "Rust"]
+
+        everything = ProjectScanner(include_untracked=True).scan(repo)
+        assert everything.total_files == 3
+        assert everything.languages() == ["Go", "Python", "Rust"]
+
+    def test_scanner_breakdown_from_git_index(self, repo):
+        """Test that directory sizes are aggregated from the sorted index."""
+        (repo / "src" / "top.py").write_text("x = 1\n")
+        _git(repo, "add", "src")
+
+        breakdown = ProjectScanner().scan(repo, top_k=5).breakdown.to_dict()
+
+        assert breakdown["largest_dirs"] == [
+            {"path": ".", "size_bytes": 13},
+            {"path": "src/pkg", "size_bytes": 12},
+            {"path": "src", "size_bytes": 6},
+        ]
+        assert [item["path"] for item in breakdown["largest_files"]] == ["lib.rs", "src/pkg/main.py", "src/top.py"]
@@ -0,0 +1,51 @@
+"""
+Tests for gitignore-style exclude rules.
+"""
+
+import pytest
+
+from serena_cli.ignore_rules import IgnoreRules, parse_rule
+
+
+class TestIgnoreRules:
+    """Test cases for IgnoreRules."""
+
+    def test_comments_and_blank_lines(self):
+        """Test that comments and blank lines produce no rules."""
+        assert parse_rule("# comment") is None
+        assert parse_rule("   ") is None
+
+    def test_unanchored_name_matches_any_depth(self):
+        """Test that a slash-free pattern matches by name at any depth."""
+        rules = IgnoreRules.from_patterns(["*.log"])
+        assert rules.is_ignored("a/b/debug.log", "debug.log", False)
+        assert not rules.is_ignored("a/b/debug.txt", "debug.txt", False)
+
+    def test_anchored_pattern(self):
+        """Test that a pattern containing a slash is relative to its base."""
+        rules = IgnoreRules.from_patterns(["/dist", "docs/*.html"])
+        assert rules.is_ignored("dist", "dist", True)
+        assert not rules.is_ignored("pkg/dist", "dist", True)
+        assert rules.is_ignored("docs/index.html", "index.html", False)
+        assert not rules.is_ignored("docs/api/index.html", "index.html", False)
+
+    def test_dir_only_and_negation(self):
+        """Test trailing-slash and negated patterns."""
+        rules = IgnoreRules.from_patterns(["out/", "*.txt", "!keep.txt"])
+        assert rules.is_ignored("out", "out", True)
+        assert not rules.is_ignored("out", "out", False)
+        assert rules.is_ignored("a.txt", "a.txt", False)
+        assert not rules.is_ignored("keep.txt", "keep.txt", False)
+
+    def test_double_star(self):
+        """Test '**' patterns."""
+        rules = IgnoreRules.from_patterns(["**/gen/**", "logs/**/*.gz"])
+        assert rules.is_ignored("a/gen/x.py", "x.py", False)
+        assert rules.is_ignored("logs/x.gz", "x.gz", False)
+        assert rules.is_ignored("logs/2024/01/x.gz", "x.gz", False)
+
+    def test_nested_base(self):
+        """Test that nested ignore files only apply below their directory."""
+        rules = IgnoreRules.from_patterns(["/tmp"], base="sub")
+        assert rules.is_ignored("sub/tmp", "tmp", True)
+        assert not rules.is_ignored("tmp", "tmp", True)
@@ -0,0 +1,109 @@
+"""
+Tests for the Serena install planner.
+"""
+
+import asyncio
+import sys
+
+from serena_cli.install_planner import InstallPlan, InstallPreflight, fatal_line, plan_install, run_plan, run_preflight
+from serena_cli.toolchain import Toolchain
+
+SOURCE = "git+https://github.com/oraios/serena"
+
+
+def _preflight(**overrides):
+    checks = dict(in_venv=False, externally_managed=False, site_writable=True, user_site_writable=True,
+                  uv_available=False, unreachable_hosts=[])
+    checks.update(overrides)
+    return InstallPreflight(**checks)
+
+
+class TestInstallPlanner:
+    """Test cases for run_preflight, plan_install and run_plan."""
+
+    def _toolchain(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PATH", str(tmp_path))
+        return Toolchain(tmp_path / "toolchain.json")
+
+    def test_plan_picks_one_strategy(self, tmp_path, monkeypatch):
+        """Test the strategy chosen for each interpreter situation."""
+        toolchain = self._toolchain(tmp_path, monkeypatch)
+
+        assert plan_install(_preflight(), SOURCE, toolchain).command == [sys.executable, "-m", "pip", "install", SOURCE]
+        assert plan_install(_preflight(site_writable=False), SOURCE, toolchain).command[-2:] == ["--user", SOURCE]
+
+        managed = plan_install(_preflight(externally_managed=True), SOURCE, toolchain)
+        assert managed.strategy == "pip-user"
+        assert "--break-system-packages" in managed.command
+
+        root_managed = plan_install(_preflight(externally_managed=True, user_site_writable=False), SOURCE, toolchain)
+        assert root_managed.strategy == "pip-break-system"
+
+        assert plan_install(_preflight(in_venv=True, site_writable=False), SOURCE, toolchain).command is None
+        assert plan_install(_preflight(site_writable=False, user_site_writable=False), SOURCE,
+                            toolchain).command is None
+
+    def test_unreachable_network_fails_without_running(self, tmp_path, monkeypatch):
+        """Test that unreachable hosts are detected up front and nothing is run."""
+        toolchain = self._toolchain(tmp_path, monkeypatch)
+        monkeypatch.delenv("HTTPS_PROXY", raising=False)
+        monkeypatch.delenv("https_proxy", raising=False)
+        # Port 9 on localhost is closed, so the check fails immediately
+        monkeypatch.setenv("PIP_INDEX_URL", "http://127.0.0.1:9/simple")
+        monkeypatch.delenv("UV_INDEX_URL", raising=False)
+
+        preflight = run_preflight("serena-standin", toolchain, timeout=1.0)
+        plan = plan_install(preflight, "serena-standin", toolchain)
+
+        assert preflight.unreachable_hosts == ["127.0.0.1:9"]
+        assert not preflight.uv_available
+        assert plan.command is None and "wheelhouse" in plan.reason
+
+    def test_run_plan_streams_output(self):
+        """Test that each output line is forwarded as it arrives."""
+        lines = []
+        plan = InstallPlan("pip", [sys.executable, "-c", "print('Collecting a'); print('Successfully installed a')"],
+                           "test")
+
+        result = asyncio.run(run_plan(plan, lines.append))
+
+        assert result["success"]
+        assert lines == ["Collecting a", "Successfully installed a"]
+
+    def test_run_plan_fails_fast_on_fatal_output(self):
+        """Test that a fatal line stops the install without waiting for the timeout."""
+        script = ("import sys, time; print('ERROR: No matching distribution found for serena', flush=True); "
+                  "time.sleep(30)")
+        plan = InstallPlan("pip", [sys.executable, "-c", script], "test")
+
+        result = asyncio.run(asyncio.wait_for(run_plan(plan, lambda line: None, timeout=60), 10))
+
+        assert not result["success"]
+        assert "No matching distribution" in result["error"]
+        assert fatal_line("error: externally-managed-environment")
+        assert not fatal_line("Collecting serena-agent")
+
+    def test_run_plan_survives_retry_warnings(self):
+        """Test that network and permission warnings pip recovers from are not fatal."""
+        retry = ("WARNING: Retrying (Retry(total=4, connect=None, read=None, redirect=None, status=None)) after "
+                 "connection broken by 'NewConnectionError('<pip._vendor.urllib3.connection.HTTPSConnection "
+                 "object at 0x7f>: Failed to establish a new connection: [Errno 111] Connection refused')': "
+                 "/simple/serena-agent/")
+        script = f"print({retry!r}); print('Successfully installed serena-agent')"
+        plan = InstallPlan("pip", [sys.executable, "-c", script], "test")
+
+        result = asyncio.run(run_plan(plan, lambda line: None))
+
+        assert result["success"]
+        assert not fatal_line("WARNING: The directory '/root/.cache/pip' is not writable: Permission denied")
+        assert fatal_line("ERROR: Could not install packages due to an OSError: [Errno 13] Permission denied")
+        assert fatal_line("  fatal: unable to access 'https://github.com/x/': Could not resolve host: github.com")
+
+    def test_run_plan_reports_exit_status(self):
+        """Test that a failing command without a fatal line reports its last output."""
+        plan = InstallPlan("pip", [sys.executable, "-c", "print('build went wrong'); raise SystemExit(1)"], "test")
+
+        result = asyncio.run(run_plan(plan, lambda line: None))
+
+        assert not result["success"]
+        assert "build went wrong" in result["error"]
@@ -0,0 +1,87 @@
+"""
+Tests for the Serena installation probe.
+"""
+
+import json
+import sys
+
+from serena_cli import install_probe
+from serena_cli.install_probe import invalidate_installation_cache, probe_serena_installation
+
+
+class TestInstallProbe:
+    """Test cases for probe_serena_installation."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        invalidate_installation_cache()
+
+    def teardown_method(self):
+        """Drop results computed against the temporary sys.path."""
+        invalidate_installation_cache()
+
+    def _make_package(self, root, version="1.2.3"):
+        package = root / "serena"
+        package.mkdir()
+        (package / "__init__.py").write_text("raise RuntimeError('imported')\n")
+        dist_info = root / "serena_agent-1.2.3.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: serena-agent\nVersion: {version}\n")
+        return package
+
+    def test_found_without_importing(self, tmp_path, monkeypatch):
+        """Test that version and location are read without importing the package."""
+        package = self._make_package(tmp_path)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "serena", raising=False)
+
+        installation = probe_serena_installation()
+
+        assert installation.installed
+        assert installation.version == "1.2.3"
+        assert installation.distribution == "serena-agent"
+        assert installation.location == str(package)
+        assert "serena" not in sys.modules
+
+    def test_namespace_directory_is_not_installed(self, tmp_path, monkeypatch):
+        """Test that a stray serena directory without metadata does not count."""
+        (tmp_path / "serena").mkdir()
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "serena", raising=False)
+
+        assert not probe_serena_installation().installed
+
+    def test_disk_cache_round_trip(self, tmp_path, monkeypatch):
+        """Test that a second process reuses the result while the key matches."""
+        site = tmp_path / "site"
+        site.mkdir()
+        self._make_package(site)
+        monkeypatch.syspath_prepend(str(site))
+        cache_path = tmp_path / "install-probe.json"
+
+        first = probe_serena_installation(cache_path)
+        data = json.loads(cache_path.read_text())
+        assert data["interpreters"][sys.executable]["installation"]["version"] == "1.2.3"
+
+        invalidate_installation_cache()
+        monkeypatch.setattr(install_probe, "_find_installation", lambda: (_ for _ in ()).throw(AssertionError))
+        assert probe_serena_installation(cache_path).to_dict() == first.to_dict()
+
+    def test_process_cache_follows_sys_path_changes(self, tmp_path, monkeypatch):
+        """Test that the cached result is reused until a sys.path directory changes."""
+        site = tmp_path / "site"
+        site.mkdir()
+        monkeypatch.syspath_prepend(str(site))
+        monkeypatch.delitem(sys.modules, "serena", raising=False)
+        calls = []
+        real_find = install_probe._find_installation
+        monkeypatch.setattr(install_probe, "_find_installation", lambda: calls.append(1) or real_find())
+
+        assert not probe_serena_installation().installed
+        assert not probe_serena_installation().installed
+        assert len(calls) == 1
+
+        # Installing a package touches the site directory
+        self._make_package(site)
+        assert probe_serena_installation().installed
+        assert len(calls) == 2
@@ -0,0 +1,81 @@
+"""
+Tests for streaming content analysis.
+"""
+
+import pytest
+
+from serena_cli import line_counter
+from serena_cli.line_counter import LineCounter, shebang_language
+from serena_cli.project_scanner import ProjectScanner
+
+
+class TestLineCounter:
+    """Test cases for LineCounter."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.counter = LineCounter()
+
+    def test_counts_lines(self, tmp_path):
+        """Test newline counting with and without a trailing newline."""
+        path = tmp_path / "a.py"
+        path.write_bytes(b"a\nb\nc\n")
+        assert self.counter.analyze(str(path), 6).lines == 3
+
+        path.write_bytes(b"a\nb\nc")
+        assert self.counter.analyze(str(path), 5).lines == 3
+
+        path.write_bytes(b"")
+        assert self.counter.analyze(str(path), 0).lines == 0
+
+    def test_counts_across_chunks(self, tmp_path, monkeypatch):
+        """Test counting files larger than the read buffer."""
+        monkeypatch.setattr(line_counter, "READ_CHUNK_BYTES", 16)
+        path = tmp_path / "big.py"
+        path.write_bytes(b"line\n" * 1000)
+
+        assert LineCounter().analyze(str(path), 5000).lines == 1000
+
+    def test_binary_and_size_cap(self, tmp_path):
+        """Test binary sniffing and the per-file size cap."""
+        binary = tmp_path / "video.ts"
+        binary.write_bytes(b"\x47\x00\x11" * 100)
+        assert self.counter.analyze(str(binary), 300).binary is True
+
+        large = tmp_path / "large.py"
+        large.write_bytes(b"x\n" * 100)
+        result = LineCounter(max_file_bytes=10).analyze(str(large), 200)
+        assert result.binary is False
+        assert result.lines is None
+
+    def test_shebang_language(self):
+        """Test interpreter detection from shebang lines."""
+        assert shebang_language(b"#!/usr/bin/env python3\n") == "Python"
+        assert shebang_language(b"#!/usr/bin/env -S node --harmony\n") == "JavaScript"
+        assert shebang_language(b"#!/usr/local/bin/ruby2.7 -w\n") == "Ruby"
+        assert shebang_language(b"#!/bin/sh\n") is None
+        assert shebang_language(b"print('no shebang')\n") is None
+
+    def test_scanner_language_stats(self, tmp_path):
+        """Test per-language lines, bytes and files from a scan."""
+        (tmp_path / "a.py").write_bytes(b"1\n2\n")
+        (tmp_path / "tool").write_bytes(b"#!/usr/bin/env python\nprint()\n")
+        (tmp_path / "clip.ts").write_bytes(b"\x47\x00" * 10)
+        (tmp_path / "b.rs").write_bytes(b"fn main() {}\n")
+
+        result = ProjectScanner(count_lines=True).scan(tmp_path)
+        stats = result.language_stats()
+
+        assert stats.get("Python") == (2, 34, 4)
+        assert stats.get("Rust") == (1, 13, 1)
+        assert "TypeScript" not in stats
+        assert result.binary_files == 1
+        assert result.total_files == 4
+
+    def test_scanner_without_line_counts(self, tmp_path):
+        """Test that lines are reported as unknown when not counted."""
+        (tmp_path / "a.py").write_bytes(b"1\n2\n")
+
+        stats = ProjectScanner().scan(tmp_path).language_stats()
+
+        assert stats.to_dict() == {"Python": {"files": 1, "bytes": 4, "lines": None}}
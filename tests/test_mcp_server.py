@@ -0,0 +1,87 @@
+"""
+Tests for the MCP server's tool handlers.
+"""
+
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+from serena_cli import mcp_server
+from serena_cli.mcp_server import SerenaCLIMCPServer
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """A server whose global state lives under a temporary home directory."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    return SerenaCLIMCPServer()
+
+
+class TestMCPServer:
+    """Test cases for SerenaCLIMCPServer."""
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+    def test_info_cache_follows_git_index(self, server, tmp_path):
+        """Test that staging a file invalidates the cached project info."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "README.md").write_text("# test")
+        (project / "a.py").write_text("a = 1\n")
+        git = ["git", "-C", str(project), "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        subprocess.run(git + ["init", "-q"], check=True)
+        subprocess.run(git + ["add", "-A"], check=True)
+        subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+        (project / "b.py").write_text("b = 1\n")
+
+        first = asyncio.run(server._handle_serena_info({"project_path": str(project)}))
+        subprocess.run(git + ["add", "b.py"], check=True)
+        second = asyncio.run(server._handle_serena_info({"project_path": str(project)}))
+
+        assert second["size"]["total_files"] == first["size"]["total_files"] + 1
+
+    def test_status_reports_config_and_errors(self, server, tmp_path, monkeypatch):
+        """Test that serena_status keeps its keys and reports errors as a dict."""
+        project = tmp_path / "project"
+        project.mkdir()
+
+        status = asyncio.run(server._handle_serena_status({"project_path": str(project)}))
+
+        assert status["installation_method"] == "Not installed"
+        assert status["serena_context"] == "Not configured"
+
+        def fail(project_path):
+            raise PermissionError(f"Permission denied: {project_path}")
+
+        monkeypatch.setattr(server.serena_manager, "get_status_sync", fail)
+        assert "Permission denied" in asyncio.run(server._handle_serena_status({"project_path": str(project)}))["error"]
+
+    def test_live_models_are_bounded(self, server, tmp_path, monkeypatch):
+        """Test that the least recently used project stops being watched past the limit."""
+        monkeypatch.setattr(mcp_server, "LIVE_MODEL_LIMIT", 2)
+        server.watch = True
+        projects = []
+        for name in ("a", "b", "c"):
+            project = tmp_path / name
+            project.mkdir()
+            (project / "README.md").write_text("# test")
+            projects.append(str(project))
+
+        async def load():
+            models = [await server._get_live_model(projects[0]), await server._get_live_model(projects[1])]
+            # Using a again makes b the least recently used
+            await server._get_live_model(projects[0])
+            models.append(await server._get_live_model(projects[2]))
+            return models
+
+        try:
+            a, b, c = asyncio.run(load())
+            assert list(server.live_models) == [projects[0], projects[2]]
+            assert set(server.watchers) == {projects[0], projects[2]}
+            assert b.watch_mode == "stopped"
+            assert a.watch_mode != "stopped" and c.watch_mode != "stopped"
+        finally:
+            server.stop_watchers()
@@ -2,11 +2,17 @@
 Tests for ProjectDetector class.
 """
 
+import asyncio
+import os
+import threading
+import time
+
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 from panda_index_helper.project_detector import ProjectDetector
+from panda_index_helper.project_scanner import ScanResult
 
 
 class TestProjectDetector:
@@ -78,25 +84,32 @@ class TestProjectDetector:
             result = self.detector.validate_project(str(self.test_project_path))
             assert result is False
 
-    def test_has_project_indicators_success(self):
+    def test_has_project_indicators_success(self, tmp_path):
         """Test successful project indicators check."""
-        mock_path = MagicMock()
-        mock_path.exists.return_value = True
+        (tmp_path / "README.md").write_text("# test")
+        (tmp_path / "src").mkdir()
         
-        with patch.object(mock_path, 'iterdir') as mock_iter:
-            mock_iter.return_value = [mock_path]
-            
-            result = self.detector._has_project_indicators(mock_path)
-            assert result is True
+        result = self.detector._has_project_indicators(tmp_path)
+        assert result is True
 
-    def test_has_project_indicators_failure(self):
+    def test_has_project_indicators_failure(self, tmp_path):
         """Test failed project indicators check."""
-        mock_path = MagicMock()
-        mock_path.exists.return_value = False
+        (tmp_path / "README.md").write_text("# test")
+        # Directory-only indicators do not match plain files
+        (tmp_path / "src").write_text("not a directory")
         
-        result = self.detector._has_project_indicators(mock_path)
+        result = self.detector._has_project_indicators(tmp_path)
         assert result is False
 
+    def test_get_project_indicators(self, tmp_path):
+        """Test that found indicators keep their configured spelling and order."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / ".git").mkdir()
+        (tmp_path / "Makefile").write_text("all:")
+        
+        result = self.detector._get_project_indicators(tmp_path)
+        assert result == [".git", "Makefile", "src/"]
+
     def test_detect_project_type_python(self):
         """Test Python project type detection."""
         mock_path = MagicMock()
@@ -121,36 +134,25 @@ class TestProjectDetector:
         result = self.detector._detect_project_type(mock_path)
         assert result == "generic"
 
-    def test_get_project_size(self):
+    def test_get_project_size(self, tmp_path):
         """Test project size calculation."""
-        mock_path = MagicMock()
-        mock_file = MagicMock()
-        mock_file.is_file.return_value = True
-        mock_file.stat.return_value.st_size = 1024
+        (tmp_path / "main.py").write_bytes(b"x" * 1024)
         
-        with patch.object(mock_path, 'rglob') as mock_rglob:
-            mock_rglob.return_value = [mock_file]
-            
-            result = self.detector._get_project_size(mock_path)
-            assert result["total_files"] == 1
-            assert result["total_size_bytes"] == 1024
-            assert result["total_size_mb"] == 0.0
+        result = self.detector._get_project_size(tmp_path)
+        assert result.total_files == 1
+        assert result.total_size_bytes == 1024
+        assert result.total_size_mb == 0.0
 
-    def test_detect_languages(self):
+    def test_detect_languages(self, tmp_path):
         """Test programming language detection."""
-        mock_path = MagicMock()
-        mock_py_file = MagicMock()
-        mock_py_file.suffix = ".py"
-        mock_js_file = MagicMock()
-        mock_js_file.suffix = ".js"
+        (tmp_path / "main.py").write_text("print('hi')")
+        (tmp_path / "web").mkdir()
+        (tmp_path / "web" / "app.js").write_text("console.log('hi')")
         
-        with patch.object(mock_path, 'rglob') as mock_rglob:
-            mock_rglob.return_value = [mock_py_file, mock_js_file]
-            
-            result = self.detector._detect_languages(mock_path)
-            assert "Python" in result
-            assert "JavaScript" in result
-            assert len(result) == 2
+        result = self.detector._detect_languages(tmp_path)
+        assert "Python" in result
+        assert "JavaScript" in result
+        assert len(result) == 2
 
     def test_has_serena_config(self):
         """Test Serena configuration check."""
@@ -175,3 +177,98 @@ class TestProjectDetector:
             
             result = self.detector._has_panda_config(mock_path)
             assert result is True
+
+    def test_find_project_root_uses_cache(self, tmp_path):
+        """Test that repeated root lookups skip listings until a directory changes."""
+        project = tmp_path / "project"
+        deep = project / "a" / "b"
+        deep.mkdir(parents=True)
+        (project / "README.md").write_text("# test")
+        (project / ".git").mkdir()
+        # Back-date the tree so the entries are outside the racy window
+        for directory in (tmp_path, project, project / "a", deep):
+            os.utime(directory, ns=(1_000_000_000, 1_000_000_000))
+        ProjectDetector.clear_root_cache()
+        
+        assert self.detector._find_project_root(deep) == str(project)
+        with patch.object(self.detector, '_has_project_indicators') as mock_has:
+            assert self.detector._find_project_root(deep) == str(project)
+            assert self.detector._find_project_root(project / "a") == str(project)
+            mock_has.assert_not_called()
+        
+        # Adding indicators below the root changes the answer
+        (deep / "package.json").write_text("{}")
+        (deep / "src").mkdir()
+        assert self.detector._find_project_root(deep) == str(deep)
+
+    def test_iter_projects_in_directory(self, tmp_path):
+        """Test recursive, depth-limited workspace discovery."""
+        def make_project(path):
+            path.mkdir(parents=True)
+            (path / "README.md").write_text("# test")
+            (path / "pyproject.toml").write_text("")
+        
+        make_project(tmp_path / "a")
+        make_project(tmp_path / "group" / "b")
+        make_project(tmp_path / "group" / "sub" / "deep" / "c")
+        make_project(tmp_path / "a" / "packages" / "nested")
+        make_project(tmp_path / "node_modules" / "dep")
+        
+        result = self.detector.list_projects_in_directory(str(tmp_path))
+        assert result == [str(tmp_path / "a"), str(tmp_path / "group" / "b")]
+        
+        nested = self.detector.list_projects_in_directory(str(tmp_path), max_depth=4, include_nested=True)
+        assert str(tmp_path / "a" / "packages" / "nested") in nested
+        assert str(tmp_path / "group" / "sub" / "deep" / "c") in nested
+        assert str(tmp_path / "node_modules" / "dep") not in nested
+
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX symlinks required")
+    def test_iter_projects_follows_symlinks(self, tmp_path):
+        """Test that symlinked checkouts are found and symlink loops end."""
+        checkout = tmp_path / "checkouts" / "app"
+        checkout.mkdir(parents=True)
+        (checkout / "README.md").write_text("# test")
+        (checkout / "pyproject.toml").write_text("")
+        workspace = tmp_path / "workspace"
+        workspace.mkdir()
+        (workspace / "app").symlink_to(checkout)
+        (workspace / "loop").symlink_to(workspace)
+        
+        result = self.detector.list_projects_in_directory(str(workspace), max_depth=5)
+        assert result == [str(workspace / "app")]
+
+    def test_aget_project_info(self, tmp_path):
+        """Test that the async API returns the same information as the sync one."""
+        (tmp_path / "README.md").write_text("# test")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "main.py").write_text("print('hi')\n")
+        
+        info = asyncio.run(self.detector.aget_project_info(str(tmp_path)))
+        assert info.languages == ["Python"]
+        assert info.size.to_dict() == self.detector.get_project_info(str(tmp_path)).size.to_dict()
+        assert asyncio.run(self.detector.adetect_project(str(tmp_path / "src"))) == str(tmp_path)
+
+    def test_aget_project_info_cancellation_stops_scan(self, tmp_path):
+        """Test that cancelling the awaiting task stops a running scan."""
+        (tmp_path / "README.md").write_text("# test")
+        (tmp_path / "src").mkdir()
+        started = threading.Event()
+        budgets = []
+        
+        def slow_scan(path, changed_dirs=None, budget=None, top_k=0):
+            budgets.append(budget)
+            started.set()
+            while not budget.exhausted(0):
+                time.sleep(0.01)
+            return ScanResult()
+        
+        async def cancel_scan():
+            task = asyncio.ensure_future(self.detector.aget_project_info(str(tmp_path)))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        with patch.object(self.detector, '_scan_project', side_effect=slow_scan):
+            asyncio.run(cancel_scan())
+        assert budgets[0].stopped_by == "cancelled"
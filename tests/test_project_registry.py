@@ -0,0 +1,89 @@
+"""
+Tests for the global project registry.
+"""
+
+import sqlite3
+
+from serena_cli.project_detector import ProjectDetector
+from serena_cli.project_registry import ProjectRegistry
+
+
+def _enable(path, context="ide-assistant"):
+    (path / ".serena-cli").mkdir(parents=True)
+    (path / ".serena-cli" / "project.yml").write_text(f"serena_context: {context}\n")
+    (path / "pyproject.toml").write_text("")
+    (path / "README.md").write_text("# test")
+
+
+class TestProjectRegistry:
+    """Test cases for ProjectRegistry."""
+
+    def test_register_and_query(self, tmp_path):
+        """Test that registered projects can be filtered by context and type."""
+        registry = ProjectRegistry(tmp_path / "registry" / "projects.db")
+        _enable(tmp_path / "a")
+        _enable(tmp_path / "b", "agent")
+
+        assert registry.register(tmp_path / "a", "ide-assistant", "python")
+        assert registry.register(tmp_path / "b", "agent", "rust")
+
+        assert [p.name for p in registry.list_projects()] == ["a", "b"]
+        assert [p.name for p in registry.list_projects(context="agent")] == ["b"]
+        assert registry.list_projects(project_type="python", context="agent") == []
+        entry = registry.get(tmp_path / "a")
+        assert (entry.type, entry.context) == ("python", "ide-assistant")
+        assert entry.config_mtime_ns is not None
+        assert entry.scanned_at is None
+
+    def test_register_keeps_known_fields(self, tmp_path):
+        """Test that re-registering without a context or type keeps the recorded ones."""
+        registry = ProjectRegistry(tmp_path / "projects.db")
+        _enable(tmp_path / "a")
+
+        registry.register(tmp_path / "a", "ide-assistant", "python")
+        registry.register(tmp_path / "a")
+
+        assert len(registry.list_projects()) == 1
+        assert registry.get(tmp_path / "a").context == "ide-assistant"
+
+    def test_database_uses_wal(self, tmp_path):
+        """Test that the database is shared in WAL mode."""
+        registry = ProjectRegistry(tmp_path / "projects.db")
+        registry.list_projects()
+
+        with sqlite3.connect(str(tmp_path / "projects.db")) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_detector_records_scan_summary(self, tmp_path):
+        """Test that scanning a registered project stores its summary."""
+        registry = ProjectRegistry(tmp_path / "projects.db")
+        project = tmp_path / "a"
+        _enable(project)
+        (project / "main.py").write_text("print('hi')\n")
+        registry.register(project, "ide-assistant")
+
+        ProjectDetector(use_scan_index=False, registry=registry).get_project_info(str(project))
+
+        entry = registry.get(project)
+        assert entry.type == "python"
+        assert entry.total_files == 3
+        assert entry.languages == ("Python",)
+        assert entry.scanned_at is not None
+
+    def test_prune(self, tmp_path):
+        """Test that projects without a configuration are dropped."""
+        registry = ProjectRegistry(tmp_path / "projects.db")
+        _enable(tmp_path / "a")
+        registry.register(tmp_path / "a")
+        registry.register(tmp_path / "gone")
+
+        assert registry.prune() == [str(tmp_path / "gone")]
+        assert [p.name for p in registry.list_projects()] == ["a"]
+
+    def test_unusable_database(self, tmp_path):
+        """Test that registry failures are reported instead of raised."""
+        (tmp_path / "projects.db").mkdir()
+        registry = ProjectRegistry(tmp_path / "projects.db")
+
+        assert not registry.register(tmp_path)
+        assert registry.list_projects() == []
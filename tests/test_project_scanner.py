@@ -0,0 +1,323 @@
+"""
+Tests for ProjectScanner class.
+"""
+
+import os
+
+import pytest
+
+from serena_cli.project_scanner import ProjectScanner, ScanBudget, ScanResult, language_for_name
+from serena_cli.scan_index import ScanIndex
+
+
+class TestProjectScanner:
+    """Test cases for ProjectScanner."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.scanner = ProjectScanner()
+
+    def test_language_for_name(self):
+        """Test extension based language lookup."""
+        assert language_for_name("main.py") == "Python"
+        assert language_for_name("Main.JAVA") == "Java"
+        assert language_for_name(".py") is None
+        assert language_for_name("Makefile") is None
+
+    def test_scan_counts_files_and_languages(self, tmp_path):
+        """Test that a single scan collects size and language counters."""
+        (tmp_path / "a.py").write_bytes(b"x" * 10)
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "b.py").write_bytes(b"x" * 20)
+        (tmp_path / "pkg" / "c.rs").write_bytes(b"x" * 30)
+        (tmp_path / "README").write_bytes(b"x" * 40)
+
+        result = self.scanner.scan(tmp_path)
+
+        assert result.total_files == 4
+        assert result.total_size_bytes == 100
+        assert result.language_files == {"Python": 2, "Rust": 1}
+        assert result.languages() == ["Python", "Rust"]
+
+    def test_language_stats_largest_first(self, tmp_path):
+        """Test that language counters are ordered by size and serialize to dicts."""
+        (tmp_path / "a.py").write_bytes(b"x" * 10)
+        (tmp_path / "b.rs").write_bytes(b"x" * 30)
+
+        stats = self.scanner.scan(tmp_path).language_stats()
+
+        assert list(stats.items()) == [("Rust", 1, 30, None), ("Python", 1, 10, None)]
+        assert "Python" in stats and stats.get("Go") is None
+        assert stats.to_dict()["Rust"] == {"files": 1, "bytes": 30, "lines": None}
+
+    def test_scan_missing_directory(self, tmp_path):
+        """Test that an unreadable root yields an empty result."""
+        result = self.scanner.scan(tmp_path / "missing")
+
+        assert result.total_files == 0
+        assert result.size_info().total_size_mb == 0
+
+    def test_size_info(self):
+        """Test size summary formatting."""
+        result = ScanResult()
+        result.add_file("big.bin", 3 * 1024 * 1024)
+
+        assert result.size_info().to_dict() == {
+            "total_files": 1,
+            "total_size_bytes": 3 * 1024 * 1024,
+            "total_size_mb": 3.0,
+        }
+
+    def test_scan_prunes_default_excludes(self, tmp_path):
+        """Test that dependency and VCS directories are skipped."""
+        (tmp_path / "main.py").write_text("x")
+        for name in ("node_modules", ".git", ".venv", "target"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "vendored.js").write_text("x")
+
+        result = self.scanner.scan(tmp_path)
+
+        assert result.total_files == 1
+        assert result.languages() == ["Python"]
+
+    def test_scan_respects_gitignore_and_excludes(self, tmp_path):
+        """Test .gitignore files, nested ignore files and extra excludes."""
+        (tmp_path / ".gitignore").write_text("*.log\n")
+        (tmp_path / "app.log").write_text("x")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / ".ignore").write_text("gen/\n")
+        (tmp_path / "sub" / "gen").mkdir()
+        (tmp_path / "sub" / "gen" / "out.js").write_text("x")
+        (tmp_path / "sub" / "keep.py").write_text("x")
+        (tmp_path / "fixtures").mkdir()
+        (tmp_path / "fixtures" / "data.go").write_text("x")
+
+        result = self.scanner.scan(tmp_path, excludes=["fixtures/"])
+
+        # .gitignore, sub/.ignore and sub/keep.py
+        assert result.total_files == 3
+        assert result.languages() == ["Python"]
+
+    def test_scan_without_excludes(self, tmp_path):
+        """Test that pruning can be disabled."""
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "dep.js").write_text("x")
+
+        result = ProjectScanner(use_default_excludes=False).scan(tmp_path)
+
+        assert result.languages() == ["JavaScript"]
+
+    def test_scan_index_reuses_unchanged_directories(self, tmp_path, monkeypatch):
+        """Test that a warm scan only lists directories whose mtime changed."""
+        project = tmp_path / "project"
+        (project / "sub").mkdir(parents=True)
+        (project / "a.py").write_text("x")
+        (project / "sub" / "b.rs").write_text("xx")
+        index_path = tmp_path / "index.json.gz"
+
+        index = ScanIndex()
+        self.scanner.scan(project, index=index)
+        # The tree was just written, so records are flagged as racy; pretend
+        # the scan happened long after the last modification instead
+        for rel, record in index.dirs.items():
+            record.mtime_ns = os.stat(project / rel).st_mtime_ns
+        assert index.save(index_path)
+
+        listed = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda p: listed.append(p) or real_scandir(p))
+
+        warm = self.scanner.scan(project, index=ScanIndex.load(index_path))
+        assert listed == []
+        assert warm.total_files == 2
+        assert warm.language_files == {"Python": 1, "Rust": 1}
+
+        (project / "sub" / "c.go").write_text("x")
+        changed = self.scanner.scan(project, index=ScanIndex.load(index_path))
+        assert listed == [os.path.join(str(project), "sub")]
+        assert changed.total_files == 3
+
+    def test_scan_index_drops_records_on_rule_change(self, tmp_path):
+        """Test that changing the root excludes invalidates the index."""
+        (tmp_path / "a.py").write_text("x")
+        index = ScanIndex()
+        self.scanner.scan(tmp_path, index=index)
+
+        result = self.scanner.scan(tmp_path, excludes=["*.py"], index=index)
+        assert result.total_files == 0
+        assert index.dirty
+
+    def test_sharded_scan_matches_serial_scan(self, tmp_path):
+        """Test that scanning with worker processes merges to the same counters."""
+        for top in ("a", "b", "c"):
+            (tmp_path / top / "deep").mkdir(parents=True)
+            (tmp_path / top / "x.py").write_text("1\n2\n")
+            (tmp_path / top / "deep" / "y.rs").write_text("1\n")
+        (tmp_path / "a" / ".gitignore").write_text("deep/\n")
+        (tmp_path / "root.go").write_text("1\n2\n3\n")
+
+        serial = ProjectScanner(count_lines=True).scan(tmp_path)
+        index = ScanIndex()
+        sharded = ProjectScanner(count_lines=True, jobs=2).scan(tmp_path, index=index)
+
+        assert sharded.total_files == serial.total_files == 7
+        assert sharded.total_size_bytes == serial.total_size_bytes
+        assert sharded.language_stats().to_dict() == serial.language_stats().to_dict()
+        assert set(index.dirs) == {"", "a", "b", "b/deep", "c", "c/deep"}
+
+    def test_scan_budget_returns_partial_result(self, tmp_path):
+        """Test that a file budget stops the walk and reports coverage."""
+        for i in range(5):
+            (tmp_path / f"d{i}").mkdir()
+            (tmp_path / f"d{i}" / "a.py").write_text("x")
+        reports = []
+
+        budget = ScanBudget(max_files=2, progress=lambda *args: reports.append(args))
+        result = self.scanner.scan(tmp_path, budget=budget)
+
+        assert not result.complete
+        assert result.stopped_by == "files"
+        assert result.total_files == 2
+        assert result.coverage().dirs_pending == 3
+        assert reports[-1][0] == 2
+
+        full = self.scanner.scan(tmp_path, budget=ScanBudget(max_seconds=60))
+        assert full.complete
+        assert full.coverage().dirs_scanned == 6
+
+    def test_scan_budget_deadline(self, tmp_path):
+        """Test that an expired deadline yields an empty partial result."""
+        (tmp_path / "a.py").write_text("x")
+
+        result = self.scanner.scan(tmp_path, budget=ScanBudget(max_seconds=0))
+
+        assert not result.complete
+        assert result.stopped_by == "time"
+        assert result.total_files == 0
+
+    @pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="POSIX links required")
+    def test_symlink_policies(self, tmp_path):
+        """Test symlink policies, loop protection and links back into the tree."""
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "lib.py").write_text("x" * 5)
+        project = tmp_path / "project"
+        (project / "src").mkdir(parents=True)
+        (project / "src" / "main.py").write_text("x" * 10)
+        (project / "alias.py").symlink_to(project / "src" / "main.py")
+        (project / "lib.py").symlink_to(outside / "lib.py")
+        (project / "loop").symlink_to(project)
+        (project / "vendor").symlink_to(outside)
+        (outside / "back").symlink_to(outside)
+
+        none = ProjectScanner(follow_symlinks="none").scan(project)
+        files = ProjectScanner(follow_symlinks="files").scan(project)
+        everything = ProjectScanner(follow_symlinks="all").scan(project)
+
+        assert (none.total_files, none.total_size_bytes) == (1, 10)
+        assert (files.total_files, files.total_size_bytes) == (2, 15)
+        # vendor/lib.py and lib.py are the same file; vendor/back loops
+        assert (everything.total_files, everything.total_size_bytes) == (2, 15)
+
+        with pytest.raises(ValueError):
+            ProjectScanner(follow_symlinks="sometimes")
+
+    @pytest.mark.skipif(not hasattr(os, "link") or os.name == "nt", reason="POSIX links required")
+    def test_hardlinks_counted_once(self, tmp_path):
+        """Test that hard links to one inode are counted once, also with an index."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a" / "data.py").write_text("x" * 100)
+        os.link(tmp_path / "a" / "data.py", tmp_path / "b" / "copy.py")
+
+        index = ScanIndex()
+        first = self.scanner.scan(tmp_path, index=index)
+        second = self.scanner.scan(tmp_path, index=index)
+        sharded = ProjectScanner(jobs=2).scan(tmp_path)
+
+        for result in (first, second, sharded):
+            assert (result.total_files, result.total_size_bytes) == (1, 100)
+
+    def test_sharded_scan_over_file_budget_is_partial(self, tmp_path):
+        """Test that a sharded scan past max_files is partial even when every shard finished."""
+        # As many shards as workers, so that none is still queued when the budget runs out
+        for i in range(4):
+            (tmp_path / f"d{i}").mkdir()
+            for j in range(50):
+                (tmp_path / f"d{i}" / f"f{j}.py").write_text("x")
+
+        for jobs in (1, 4):
+            result = ProjectScanner(jobs=jobs).scan(tmp_path, budget=ScanBudget(60, 20))
+
+            assert result.complete is False
+            assert result.stopped_by == "files"
+
+    def test_sharded_scan_shares_file_budget(self, tmp_path):
+        """Test that workers stop near max_files together instead of each collecting max_files."""
+        for i in range(4):
+            for k in range(20):
+                (tmp_path / f"d{i}" / f"s{k}").mkdir(parents=True)
+                for j in range(5):
+                    (tmp_path / f"d{i}" / f"s{k}" / f"f{j}.py").write_text("x")
+
+        result = ProjectScanner(jobs=4).scan(tmp_path, budget=ScanBudget(60, 40))
+
+        # Each worker may finish the directory it is in when the shared limit is reached
+        assert 40 <= result.total_files <= 40 + 4 * 5
+        assert result.stopped_by == "files"
+
+    def test_size_breakdown(self, tmp_path):
+        """Test top-K directories and files and the size histogram, serial and sharded."""
+        (tmp_path / "big").mkdir()
+        (tmp_path / "big" / "a.bin").write_bytes(b"x" * 5000)
+        (tmp_path / "big" / "b.bin").write_bytes(b"x" * 3000)
+        (tmp_path / "small").mkdir()
+        (tmp_path / "small" / "c.py").write_bytes(b"x" * 10)
+        (tmp_path / "empty.txt").write_bytes(b"")
+
+        for jobs in (1, 2):
+            result = ProjectScanner(jobs=jobs).scan(tmp_path, index=ScanIndex(), top_k=2)
+            breakdown = result.breakdown.to_dict()
+
+            assert breakdown["largest_files"] == [
+                {"path": "big/a.bin", "size_bytes": 5000},
+                {"path": "big/b.bin", "size_bytes": 3000},
+            ]
+            assert breakdown["largest_dirs"] == [
+                {"path": "big", "size_bytes": 8000},
+                {"path": "small", "size_bytes": 10},
+            ]
+            assert breakdown["size_histogram"] == [
+                {"min_bytes": 0, "max_bytes": 0, "files": 1},
+                {"min_bytes": 8, "max_bytes": 15, "files": 1},
+                {"min_bytes": 2048, "max_bytes": 4095, "files": 1},
+                {"min_bytes": 4096, "max_bytes": 8191, "files": 1},
+            ]
+
+        assert self.scanner.scan(tmp_path).breakdown is None
+
+    def test_subprojects_from_manifests(self, tmp_path):
+        """Test the sub-project tree, with and without the scan index."""
+        (tmp_path / "package.json").write_text("{}")
+        (tmp_path / "pyproject.toml").write_text("")
+        (tmp_path / "packages" / "web").mkdir(parents=True)
+        (tmp_path / "packages" / "web" / "package.json").write_text("{}")
+        (tmp_path / "packages" / "core" / "ffi").mkdir(parents=True)
+        (tmp_path / "packages" / "core" / "Cargo.toml").write_text("")
+        (tmp_path / "packages" / "core" / "ffi" / "go.mod").write_text("")
+        (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+        (tmp_path / "node_modules" / "dep" / "package.json").write_text("{}")
+        for directory, _, _ in os.walk(tmp_path):
+            os.utime(directory, ns=(1_000_000_000, 1_000_000_000))
+
+        index = ScanIndex()
+        for _ in range(2):
+            tree = self.scanner.scan(tmp_path, index=index).subprojects()
+
+            assert tree.path == "."
+            assert tree.types == ("nodejs", "python")
+            assert tree.manifests == ("package.json", "pyproject.toml")
+            assert [child.path for child in tree.children] == ["packages/core", "packages/web"]
+            core = tree.children[0]
+            assert core.types == ("rust",)
+            assert [(node.path, node.types) for node in core.children] == [("packages/core/ffi", ("go",))]
@@ -0,0 +1,129 @@
+"""
+Tests for the live project model and its watcher.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from serena_cli.project_watcher import ALL_CHANGES, LiveProjectModel, ProjectWatcher
+
+
+def _make_project(path):
+    (path / "src").mkdir(parents=True)
+    (path / "README.md").write_text("# test")
+    (path / "src" / "main.py").write_text("print('hi')\n")
+
+
+class TestProjectWatcher:
+    """Test cases for LiveProjectModel and ProjectWatcher."""
+
+    def test_model_loads_initial_state(self, tmp_path):
+        """Test that the model reflects the project on creation."""
+        _make_project(tmp_path)
+
+        snapshot = LiveProjectModel(str(tmp_path)).snapshot()
+
+        assert snapshot["enabled"] is False
+        assert snapshot["languages"] == ["Python"]
+        assert snapshot["size"]["total_files"] == 2
+        assert snapshot["indicators"] == ["README.md", "src/"]
+
+    @pytest.mark.parametrize("use_inotify", [
+        pytest.param(True, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")),
+        False,
+    ])
+    def test_watcher_updates_model(self, tmp_path, use_inotify):
+        """Test that config and tree changes reach the model."""
+        _make_project(tmp_path)
+        model = LiveProjectModel(str(tmp_path))
+        changed = threading.Event()
+        watcher = ProjectWatcher(model, poll_interval=0.1, debounce=0.05,
+                                 use_inotify=use_inotify, on_change=lambda m: changed.set())
+        watcher.start()
+        try:
+            assert watcher.mode == ("inotify" if use_inotify else "polling")
+
+            (tmp_path / ".serena-cli").mkdir(exist_ok=True)
+            (tmp_path / ".serena-cli" / "project.yml").write_text("serena_context: ide-assistant\n")
+            (tmp_path / "src" / "lib.rs").write_text("fn main() {}\n")
+
+            for _ in range(50):
+                changed.wait(1)
+                changed.clear()
+                snapshot = model.snapshot()
+                if snapshot["enabled"] and "Rust" in snapshot["languages"]:
+                    break
+
+            assert snapshot["enabled"] is True
+            assert snapshot["config"] == {"serena_context": "ide-assistant"}
+            assert snapshot["languages"] == ["Python", "Rust"]
+        finally:
+            watcher.stop()
+        assert watcher.mode == "stopped"
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+    def test_watcher_follows_git_worktree(self, tmp_path):
+        """Test that staged, new and edited files of a git checkout reach the model."""
+        _make_project(tmp_path)
+        git = ["git", "-C", str(tmp_path), "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        subprocess.run(git + ["init", "-q"], check=True)
+        subprocess.run(git + ["add", "-A"], check=True)
+        subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+
+        model = LiveProjectModel(str(tmp_path))
+        before = model.snapshot()["size"]
+        changed = threading.Event()
+        watcher = ProjectWatcher(model, poll_interval=0.1, debounce=0.05, on_change=lambda m: changed.set())
+        watcher.start()
+        try:
+            (tmp_path / "src" / "lib.rs").write_text("fn main() {}\n")
+            subprocess.run(git + ["add", "src/lib.rs"], check=True)
+            # An unstaged in-place edit does not show in .git/index
+            (tmp_path / "src" / "main.py").write_text("print('hello, world')\n" * 10)
+            expected_size = (before["total_size_bytes"] + len("fn main() {}\n")
+                             + len("print('hello, world')\n") * 10 - len("print('hi')\n"))
+
+            for _ in range(50):
+                changed.wait(1)
+                changed.clear()
+                snapshot = model.snapshot()
+                if snapshot["size"]["total_size_bytes"] == expected_size:
+                    break
+
+            assert snapshot["size"]["total_files"] == before["total_files"] + 1
+            assert snapshot["size"]["total_size_bytes"] == expected_size
+            assert snapshot["languages"] == ["Python", "Rust"]
+        finally:
+            watcher.stop()
+
+    def test_polling_sees_in_place_edits(self, tmp_path):
+        """Test that polling refreshes sizes after an existing file is rewritten."""
+        _make_project(tmp_path)
+        # Old enough for the scan index to trust the directory's cached listing
+        old = time.time() - 60
+        os.utime(tmp_path / "src", (old, old))
+        model = LiveProjectModel(str(tmp_path))
+        before = model.snapshot()["size"]["total_size_bytes"]
+        changed = threading.Event()
+        watcher = ProjectWatcher(model, poll_interval=0.1, use_inotify=False, on_change=lambda m: changed.set())
+        watcher.start()
+        try:
+            (tmp_path / "src" / "main.py").write_text("print('hello, world')\n" * 10)
+            expected_size = before + len("print('hello, world')\n") * 10 - len("print('hi')\n")
+
+            for _ in range(50):
+                changed.wait(1)
+                changed.clear()
+                snapshot = model.snapshot()
+                if snapshot["size"]["total_size_bytes"] == expected_size:
+                    break
+
+            assert snapshot["size"]["total_size_bytes"] == expected_size
+        finally:
+            watcher.stop()
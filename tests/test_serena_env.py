@@ -0,0 +1,169 @@
+"""
+Tests for pinned Serena environments.
+"""
+
+import json
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from serena_cli import serena_env
+from serena_cli.serena_env import SERENA_PYTHON, SerenaEnvError, SerenaEnvironment, SerenaEnvironments, resolve_ref
+from serena_cli.toolchain import Toolchain
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+
+
+def _git(repo, *args):
+    result = subprocess.run(["git", "-C", str(repo)] + list(args), capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def _commit(repo, message):
+    (repo / "README.md").write_text(message)
+    _git(repo, "add", "README.md")
+    _git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", message)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A local repository standing in for the Serena repository."""
+    path = tmp_path / "serena-repo"
+    path.mkdir()
+    _git(path, "init", "-q", "-b", "main")
+    return path
+
+
+class FakeInstallEnvironments(SerenaEnvironments):
+    """Environments whose install step only writes the entry point."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.installed = []
+
+    def _install(self, env):
+        self.installed.append(env.commit)
+        bin_dir = env.env_dir / "bin"
+        bin_dir.mkdir(parents=True)
+        (bin_dir / "serena").write_text(env.commit)
+
+
+class TestSerenaEnv:
+    """Test cases for resolve_ref and SerenaEnvironments."""
+
+    def test_resolve_ref(self, repo):
+        """Test resolving HEAD, branches, annotated tags and commits."""
+        first = _commit(repo, "one")
+        _git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "tag", "-a", "v1", "-m", "v1")
+        second = _commit(repo, "two")
+
+        assert resolve_ref("HEAD", str(repo)) == second
+        assert resolve_ref("main", str(repo)) == second
+        assert resolve_ref("v1", str(repo)) == first
+        assert resolve_ref(first, "unused") == first
+        with pytest.raises(SerenaEnvError):
+            resolve_ref("missing", str(repo))
+
+    def test_pin_is_reused(self, repo, tmp_path):
+        """Test that launches reuse the pinned environment without resolving again."""
+        commit = _commit(repo, "one")
+        envs = FakeInstallEnvironments(tmp_path / "envs", repo=str(repo))
+
+        command = envs.launch_command("start-mcp-server")
+        _commit(repo, "two")
+
+        assert command == [str(tmp_path / "envs" / "current" / "bin" / "serena"), "start-mcp-server"]
+        assert envs.launch_command("start-mcp-server") == command
+        assert envs.installed == [commit]
+        assert json.loads((tmp_path / "envs" / "pin.json").read_text())["commit"] == commit
+
+    def test_upgrade_moves_pin_and_prunes(self, repo, tmp_path):
+        """Test that pinning a newer commit flips the current link and prune keeps it."""
+        first = _commit(repo, "one")
+        envs = FakeInstallEnvironments(tmp_path / "envs", repo=str(repo))
+        command = envs.launch_command()
+        second = _commit(repo, "two")
+
+        env = envs.pin()
+
+        assert env.commit == second
+        assert envs.pinned().commit == second
+        # The configured command now runs the new environment
+        assert open(command[0]).read() == second
+        assert envs.prune() == [first]
+        assert not (tmp_path / "envs" / first).exists()
+
+    def test_interrupted_install_is_redone(self, repo, tmp_path):
+        """Test that an environment without the completion marker is rebuilt."""
+        commit = _commit(repo, "one")
+        (tmp_path / "envs" / commit / "bin").mkdir(parents=True)
+        envs = FakeInstallEnvironments(tmp_path / "envs", repo=str(repo))
+
+        assert envs.pinned() is None
+        assert envs.ensure().complete
+        assert envs.installed == [commit]
+
+    def test_failed_ensure_is_not_retried(self, repo, tmp_path):
+        """Test that launches after a failed pin fail fast until pin() succeeds."""
+        envs = FakeInstallEnvironments(tmp_path / "envs", repo=str(repo))
+        # An empty repository has no HEAD to resolve
+        with pytest.raises(SerenaEnvError):
+            envs.ensure()
+        commit = _commit(repo, "one")
+
+        with pytest.raises(SerenaEnvError, match="failed recently"):
+            envs.ensure()
+        assert envs.pin().commit == commit
+        assert envs.ensure().commit == commit
+        assert not (tmp_path / "envs" / "failure.json").exists()
+
+    def test_uv_creates_env_on_serena_python(self, tmp_path, monkeypatch):
+        """Test that uv venv is asked for Serena's Python version."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        uv = bin_dir / "uv"
+        uv.write_text("#!/bin/sh\necho uv 0.5.0\n")
+        uv.chmod(0o755)
+        monkeypatch.setenv("PATH", str(bin_dir))
+        envs = SerenaEnvironments(tmp_path / "envs", toolchain=Toolchain(tmp_path / "toolchain.json"))
+        assert envs.toolchain.get("uv").available
+        commands = []
+        monkeypatch.setattr(serena_env.subprocess, "run",
+                            lambda cmd, **kwargs: commands.append(cmd) or subprocess.CompletedProcess(cmd, 0, "", ""))
+
+        envs._install(SerenaEnvironment("a" * 40, "HEAD", tmp_path / "envs" / ("a" * 40), 0.0))
+
+        assert commands[0][:5] == [str(uv), "venv", "--quiet", "--python", SERENA_PYTHON]
+
+    def test_concurrent_creation_installs_once(self, repo, tmp_path):
+        """Test that concurrent launches wait for one install instead of deleting it."""
+        commit = _commit(repo, "one")
+
+        class SlowInstallEnvironments(FakeInstallEnvironments):
+            def _install(self, env):
+                super()._install(env)
+                time.sleep(0.2)
+
+        envs = [SlowInstallEnvironments(tmp_path / "envs", repo=str(repo)) for _ in range(3)]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            pinned = list(pool.map(lambda e: e.pin(), envs))
+
+        assert [env.commit for env in pinned] == [commit] * 3
+        assert sum(len(e.installed) for e in envs) == 1
+        assert envs[0].pinned().complete
+
+    def test_prune_skips_locked_environment(self, repo, tmp_path):
+        """Test that prune leaves an environment alone while another process creates it."""
+        _commit(repo, "one")
+        envs = FakeInstallEnvironments(tmp_path / "envs", repo=str(repo))
+        envs.pin()
+        other = "b" * 40
+        (tmp_path / "envs" / other).mkdir()
+
+        with serena_env._file_lock(envs._lock_path(other)):
+            assert envs.prune() == []
+        assert envs.prune() == [other]
@@ -0,0 +1,99 @@
+"""
+Tests for toolchain discovery.
+"""
+
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+from serena_cli.toolchain import Toolchain
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts as fake tools")
+
+# PATH only holds the fake tools, so the scripts call sleep by path
+SLEEP = shutil.which("sleep")
+
+
+def _make_tool(directory, name, body):
+    path = directory / name
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    path.chmod(0o755)
+    return path
+
+
+class TestToolchain:
+    """Test cases for Toolchain."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.calls = []
+
+    def _toolchain(self, tmp_path, monkeypatch):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        monkeypatch.setenv("PATH", str(bin_dir))
+        return bin_dir, Toolchain(tmp_path / "toolchain.json", probe_timeout=5.0)
+
+    def test_discover_versions(self, tmp_path, monkeypatch):
+        """Test that paths and versions are resolved and missing tools reported."""
+        bin_dir, toolchain = self._toolchain(tmp_path, monkeypatch)
+        _make_tool(bin_dir, "uv", "echo 'uv 0.4.18 (abc 2024-09-01)'")
+        _make_tool(bin_dir, "claude", "echo '1.0.3 (Claude Code)'")
+        _make_tool(bin_dir, "pip", "exit 1")
+
+        tools = toolchain.discover()
+
+        assert list(tools) == ["uv", "uvx", "pip", "claude"]
+        assert tools["uv"].to_dict() == {
+            "name": "uv", "path": str(bin_dir / "uv"), "version": "0.4.18", "available": True}
+        assert tools["claude"].version == "1.0.3"
+        assert not tools["uvx"].available and tools["uvx"].path is None
+        assert not tools["pip"].available and tools["pip"].path == str(bin_dir / "pip")
+
+    def test_probes_once_and_persists(self, tmp_path, monkeypatch):
+        """Test that a second process reuses the probe until the binary changes."""
+        bin_dir, toolchain = self._toolchain(tmp_path, monkeypatch)
+        uv = _make_tool(bin_dir, "uv", "echo 'uv 0.4.18'")
+        real_probe = Toolchain._probe
+        monkeypatch.setattr(Toolchain, "_probe",
+                            lambda toolchain, name, path: self.calls.append(name) or real_probe(toolchain, name, path))
+
+        assert toolchain.get("uv").version == "0.4.18"
+        assert toolchain.get("uv").version == "0.4.18"
+        assert Toolchain(tmp_path / "toolchain.json").get("uv").version == "0.4.18"
+        assert self.calls == ["uv"]
+
+        # Upgrading the binary changes its size and mtime
+        _make_tool(bin_dir, "uv", "echo 'uv 0.5.0'")
+        os.utime(uv, ns=(time.time_ns() + 10**9,) * 2)
+        assert Toolchain(tmp_path / "toolchain.json").get("uv").version == "0.5.0"
+        assert self.calls == ["uv", "uv"]
+
+    def test_probes_run_concurrently(self, tmp_path, monkeypatch):
+        """Test that slow probes of several tools overlap."""
+        bin_dir, toolchain = self._toolchain(tmp_path, monkeypatch)
+        for name in ("uv", "uvx", "pip", "claude"):
+            _make_tool(bin_dir, name, f"{SLEEP} 0.5; echo '{name} 1.0'")
+
+        start = time.monotonic()
+        tools = toolchain.discover()
+
+        assert all(tool.available for tool in tools.values())
+        assert time.monotonic() - start < 1.5
+
+    def test_invalidate_and_timeouts(self, tmp_path, monkeypatch):
+        """Test that timed-out probes are not persisted and invalidate() re-resolves."""
+        bin_dir, _ = self._toolchain(tmp_path, monkeypatch)
+        toolchain = Toolchain(tmp_path / "toolchain.json", probe_timeout=0.2)
+        _make_tool(bin_dir, "uv", f"exec {SLEEP} 5")
+
+        assert not toolchain.get("uv").available
+        assert not (tmp_path / "toolchain.json").read_text().count("mtime_ns")
+
+        _make_tool(bin_dir, "uv", "echo 'uv 0.4.18'")
+        assert not toolchain.get("uv").available
+        toolchain.invalidate()
+        assert toolchain.get("uv").available
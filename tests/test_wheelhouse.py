@@ -0,0 +1,87 @@
+"""
+Tests for offline wheelhouses, using a local stand-in for Serena.
+"""
+
+import json
+import subprocess
+import zipfile
+
+import pytest
+
+from serena_cli.wheelhouse import WheelhouseError, build_wheelhouse, load_wheelhouse
+
+
+def _make_wheel(directory, name, version, requires=()):
+    """Write a minimal pure-Python wheel for a stand-in package."""
+    module = name.replace("-", "_")
+    wheel = directory / f"{module}-{version}-py3-none-any.whl"
+    dist_info = f"{module}-{version}.dist-info"
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    metadata += "".join(f"Requires-Dist: {requirement}\n" for requirement in requires)
+    files = {
+        f"{module}/__init__.py": f"VERSION = {version!r}\n",
+        f"{dist_info}/METADATA": metadata,
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    record = "".join(f"{path},,\n" for path in files) + f"{dist_info}/RECORD,,\n"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, text in files.items():
+            archive.writestr(path, text)
+        archive.writestr(f"{dist_info}/RECORD", record)
+    return wheel
+
+
+class TestWheelhouse:
+    """Test cases for build_wheelhouse and load_wheelhouse."""
+
+    @pytest.fixture(autouse=True)
+    def offline(self, monkeypatch):
+        """Keep pip away from any package index."""
+        monkeypatch.setenv("PIP_NO_INDEX", "1")
+        monkeypatch.setenv("PIP_DISABLE_PIP_VERSION_CHECK", "1")
+
+    def test_build_and_install_offline(self, tmp_path):
+        """Test that a built wheelhouse installs the stand-in and its dependency offline."""
+        sources = tmp_path / "sources"
+        sources.mkdir()
+        source = _make_wheel(sources, "serena-standin", "0.3.0", requires=["standin-dep>=1.0"])
+        house = tmp_path / "house"
+        house.mkdir()
+        # The dependency is already in the wheelhouse, as if fetched earlier
+        _make_wheel(house, "standin-dep", "1.1")
+
+        wheelhouse = build_wheelhouse(house, str(source))
+
+        assert wheelhouse.requirement == "serena-standin"
+        assert wheelhouse.wheel == "serena_standin-0.3.0-py3-none-any.whl"
+        assert wheelhouse.compatible
+        assert json.loads((house / "wheelhouse.json").read_text())["source"] == str(source)
+
+        loaded = load_wheelhouse(house)
+        assert loaded.install_command()[-4:] == ["--no-index", "--find-links", str(house), "serena-standin"]
+
+        target = tmp_path / "site"
+        result = subprocess.run(loaded.install_command() + ["--target", str(target)],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert (target / "serena_standin" / "__init__.py").exists()
+        assert (target / "standin_dep" / "__init__.py").exists()
+
+    def test_missing_dependency_fails(self, tmp_path):
+        """Test that unresolvable dependencies surface as WheelhouseError."""
+        source = _make_wheel(tmp_path, "serena-standin", "0.3.0", requires=["not-in-house"])
+
+        with pytest.raises(WheelhouseError, match="pip wheel failed"):
+            build_wheelhouse(tmp_path / "house", str(source))
+
+    def test_load_rejects_incomplete(self, tmp_path):
+        """Test that directories without a manifest or wheel are not wheelhouses."""
+        with pytest.raises(WheelhouseError):
+            load_wheelhouse(tmp_path)
+
+        (tmp_path / "wheelhouse.json").write_text(json.dumps({
+            "version": 1, "requirement": "serena-agent", "wheel": "serena_agent-1.0-py3-none-any.whl",
+            "source": "x", "python_version": "3.11", "platform": "linux-x86_64", "built_at": 0,
+        }))
+        with pytest.raises(WheelhouseError, match="missing"):
+            load_wheelhouse(tmp_path)